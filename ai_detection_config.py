@@ -1,6 +1,7 @@
 # AI Detection Configuration
 
 import os
+import json
 from dotenv import load_dotenv
 
 # Load environment variables from .env file if it exists
@@ -27,6 +28,84 @@ class AIDetectionConfig:
             return cls.ORIGINALITY_API_KEY
         return None
     
+    # Base URLs can be pointed at the local stub server (ai_provider_stub.py)
+    GPTZERO_API_URL = os.environ.get('GPTZERO_API_URL')
+    ORIGINALITY_API_URL = os.environ.get('ORIGINALITY_API_URL')
+    
+    # Connection pool, timeout, retry and circuit breaker policy for provider calls
+    MAX_CONCURRENCY = int(os.environ.get('AI_DETECTION_MAX_CONCURRENCY', 4))
+    CONNECT_TIMEOUT = float(os.environ.get('AI_DETECTION_CONNECT_TIMEOUT', 3.05))
+    READ_TIMEOUT = float(os.environ.get('AI_DETECTION_READ_TIMEOUT', 20))
+    MAX_RETRIES = int(os.environ.get('AI_DETECTION_MAX_RETRIES', 2))
+    BACKOFF_FACTOR = float(os.environ.get('AI_DETECTION_BACKOFF_FACTOR', 0.5))
+    BREAKER_FAILURE_THRESHOLD = int(os.environ.get('AI_DETECTION_BREAKER_FAILURES', 5))
+    BREAKER_RESET_TIMEOUT = float(os.environ.get('AI_DETECTION_BREAKER_RESET', 30))
+    
+    # Get the base URL override for a provider
+    @classmethod
+    def get_api_url(cls, provider):
+        if provider == 'gptzero':
+            return cls.GPTZERO_API_URL
+        elif provider == 'originality':
+            return cls.ORIGINALITY_API_URL
+        return None
+    
+    # Versioned phrase lists used for stylistic features in local detection.
+    # Add a new version instead of editing an existing one so that scores
+    # computed with an older list can still be reproduced.
+    PHRASE_LISTS = {
+        'v1': {
+            'formal': [
+                'furthermore', 'moreover', 'in conclusion', 'subsequently', 'nevertheless',
+                'in addition', 'consequently', 'thus', 'hence', 'therefore', 'in summary',
+                'in essence', 'in other words', 'to illustrate', 'for instance'
+            ],
+        },
+    }
+    
+    DEFAULT_PHRASE_LIST_VERSION = 'v1'
+    PHRASE_LIST_VERSION = os.environ.get('AI_DETECTION_PHRASE_LIST_VERSION', DEFAULT_PHRASE_LIST_VERSION)
+    
+    # Optional JSON file with extra versions: {"v2": {"formal": [...], ...}}
+    PHRASE_LIST_FILE = os.environ.get('AI_DETECTION_PHRASE_LIST_FILE')
+    
+    # (path, mtime, lists) of the last PHRASE_LIST_FILE read; it is parsed again only when it changes
+    _phrase_list_file_cache = None
+    
+    # Extra phrase list versions from PHRASE_LIST_FILE, cached on the file's mtime
+    @classmethod
+    def _load_phrase_list_file(cls):
+        path = cls.PHRASE_LIST_FILE
+        if not path:
+            return {}
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return {}
+        cache = cls._phrase_list_file_cache
+        if cache and cache[0] == path and cache[1] == mtime:
+            return cache[2]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                phrase_lists = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading phrase list file: {str(e)}")
+            phrase_lists = {}
+        cls._phrase_list_file_cache = (path, mtime, phrase_lists)
+        return phrase_lists
+    
+    # Get the phrase lists for a version as (version, {category: [phrases]})
+    @classmethod
+    def get_phrase_lists(cls, version=None):
+        phrase_lists = dict(cls.PHRASE_LISTS)
+        phrase_lists.update(cls._load_phrase_list_file())
+        
+        version = version or cls.PHRASE_LIST_VERSION
+        if version not in phrase_lists:
+            print(f"Unknown phrase list version '{version}', using {cls.DEFAULT_PHRASE_LIST_VERSION}")
+            version = cls.DEFAULT_PHRASE_LIST_VERSION
+        return version, phrase_lists[version]
+    
     # Instructions for setting up API keys
     @staticmethod
     def get_setup_instructions():
@@ -44,6 +123,10 @@ class AIDetectionConfig:
            
            # If using Originality.ai
            ORIGINALITY_API_KEY=your_api_key_here
+           
+           # Optional: phrase list version and extra versions for local detection
+           AI_DETECTION_PHRASE_LIST_VERSION=v1
+           AI_DETECTION_PHRASE_LIST_FILE=/path/to/phrase_lists.json
         
         3. Restart the application for changes to take effect
         """
\ No newline at end of file
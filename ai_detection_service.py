@@ -1,6 +1,5 @@
 import re
 import nltk
-import requests
 import json
 import statistics
 import os
@@ -8,6 +7,9 @@ import sys
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.corpus import stopwords
 from collections import Counter
+from phrase_matcher import get_phrase_matcher
+from ai_detection_config import AIDetectionConfig
+from ai_provider_client import get_provider_client, ProviderError
 
 # Download necessary NLTK data (will only download if not already present)
 def download_nltk_data():
@@ -58,7 +60,7 @@ class AIContentDetector:
         """Detect if content is AI-generated using the configured provider"""
         try:
             if not text or len(text.strip()) < 10:
-                return self._format_result(0, 'Text too short for analysis', [])
+                return self._format_result(0, {'message': 'Text too short for analysis', 'level': 'info'}, [])
                 
             if self.api_provider == 'gptzero' and self.api_key:
                 return self._detect_with_gptzero(text)
@@ -68,65 +70,64 @@ class AIContentDetector:
                 return self._detect_locally(text)
         except Exception as e:
             print(f"Error in AI detection: {str(e)}")
-            return self._format_result(0, 'Error during analysis', [{'name': 'Error', 'value': str(e)}])
+            return self._format_result(0, {'message': 'Error during analysis', 'level': 'danger'}, [{'name': 'Error', 'value': str(e)}])
     
-    def _detect_with_gptzero(self, text):
-        """Use GPTZero API to detect AI-generated content"""
+    def _get_client(self):
+        """Return the shared pooled client for the configured provider"""
+        return get_provider_client(
+            self.api_provider,
+            self.api_key,
+            base_url=AIDetectionConfig.get_api_url(self.api_provider),
+            max_concurrency=AIDetectionConfig.MAX_CONCURRENCY,
+            connect_timeout=AIDetectionConfig.CONNECT_TIMEOUT,
+            read_timeout=AIDetectionConfig.READ_TIMEOUT,
+            max_retries=AIDetectionConfig.MAX_RETRIES,
+            backoff_factor=AIDetectionConfig.BACKOFF_FACTOR,
+            breaker_failure_threshold=AIDetectionConfig.BREAKER_FAILURE_THRESHOLD,
+            breaker_reset_timeout=AIDetectionConfig.BREAKER_RESET_TIMEOUT
+        )
+    
+    def _detect_with_provider(self, text):
+        """Use the external provider (GPTZero or Originality.ai) to detect AI-generated content"""
         try:
-            url = "https://api.gptzero.me/v2/predict/text"
-            headers = {
-                "Content-Type": "application/json",
-                "x-api-key": self.api_key
-            }
-            data = {"document": text}
-            
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code == 200:
-                result = response.json()
-                # Extract the relevant information from GPTZero response
-                ai_score = result.get('documents', [{}])[0].get('completely_generated_prob', 0) * 100
-                confidence = self._get_confidence_level(ai_score)
-                features = [
-                    {'name': 'GPTZero AI Score', 'value': f"{ai_score:.1f}%"},
-                    {'name': 'Document Classification', 'value': result.get('documents', [{}])[0].get('document_classification', 'Unknown')}
-                ]
-                return self._format_result(ai_score, confidence, features)
-            else:
-                # Fall back to local detection if API fails
-                return self._detect_locally(text, [{'name': 'API Error', 'value': f"GPTZero API returned status {response.status_code}"}])
-        except Exception as e:
-            # Fall back to local detection if API call fails
+            ai_score, features = self._get_client().detect(text)
+            confidence = self._get_confidence_level(ai_score)
+            return self._format_result(ai_score, confidence, features)
+        except ProviderError as e:
+            # Fall back to local detection if the API fails or the circuit is open
             return self._detect_locally(text, [{'name': 'API Error', 'value': str(e)}])
     
+    def _detect_with_gptzero(self, text):
+        """Use GPTZero API to detect AI-generated content"""
+        return self._detect_with_provider(text)
+    
     def _detect_with_originality(self, text):
         """Use Originality.ai API to detect AI-generated content"""
-        try:
-            url = "https://api.originality.ai/api/v1/scan/ai"
-            headers = {
-                "X-OAI-API-KEY": self.api_key,
-                "Content-Type": "application/json"
-            }
-            data = {"content": text}
-            
-            response = requests.post(url, headers=headers, json=data)
-            
-            if response.status_code == 200:
-                result = response.json()
-                # Extract the relevant information from Originality.ai response
-                ai_score = result.get('ai_score', 0) * 100
-                confidence = self._get_confidence_level(ai_score)
-                features = [
-                    {'name': 'Originality.ai Score', 'value': f"{ai_score:.1f}%"},
-                    {'name': 'AI Model', 'value': result.get('ai_model', 'Unknown')}
-                ]
-                return self._format_result(ai_score, confidence, features)
+        return self._detect_with_provider(text)
+    
+    def detect_many(self, texts):
+        """Detect AI-generated content for many texts, calling the provider concurrently"""
+        if self.api_provider not in ('gptzero', 'originality') or not self.api_key:
+            return [self.detect(text) for text in texts]
+        
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not text or len(text.strip()) < 10:
+                results[i] = self.detect(text)
             else:
-                # Fall back to local detection if API fails
-                return self._detect_locally(text, [{'name': 'API Error', 'value': f"Originality.ai API returned status {response.status_code}"}])
-        except Exception as e:
-            # Fall back to local detection if API call fails
-            return self._detect_locally(text, [{'name': 'API Error', 'value': str(e)}])
+                pending.append(i)
+        
+        def fallback(text, error):
+            return self._detect_locally(text, [{'name': 'API Error', 'value': str(error)}])
+        
+        provider_results = self._get_client().detect_many([texts[i] for i in pending], fallback=fallback)
+        for i, result in zip(pending, provider_results):
+            if isinstance(result, tuple):
+                ai_score, features = result
+                result = self._format_result(ai_score, self._get_confidence_level(ai_score), features)
+            results[i] = result
+        return results
     
     def _detect_locally(self, text, additional_features=None):
         """Use local heuristics to detect AI-generated content"""
@@ -173,16 +174,15 @@ class AIContentDetector:
             sentence_length_variance_normalized = 0
         
         # Check for formal academic phrases (common in AI writing)
+        # All configured phrases are matched in a single pass over the text
         try:
-            formal_phrases = [
-                'furthermore', 'moreover', 'in conclusion', 'subsequently', 'nevertheless',
-                'in addition', 'consequently', 'thus', 'hence', 'therefore', 'in summary',
-                'in essence', 'in other words', 'to illustrate', 'for instance'
-            ]
-            formal_count = sum(1 for phrase in formal_phrases if phrase in text.lower())
+            phrase_matches = get_phrase_matcher().scan(text)
+            formal_count = phrase_matches.category_counts['formal']
             formal_ratio = formal_count / max(sentence_count, 1)
         except Exception as e:
             print(f"Error in formal phrase detection: {str(e)}")
+            phrase_matches = None
+            formal_count = 0
             formal_ratio = 0
         
         # Check for repetitive phrases (AI sometimes repeats patterns)
@@ -224,7 +224,7 @@ class AIContentDetector:
         
         confidence = self._get_confidence_level(ai_score)
         
-        return self._format_result(ai_score, confidence, features)
+        return self._format_result(ai_score, confidence, features, phrase_matches)
     
     def _get_confidence_level(self, score):
         """Determine confidence level based on score"""
@@ -235,11 +235,15 @@ class AIContentDetector:
         else:
             return {'message': 'Low probability of AI-generated content', 'level': 'success'}
     
-    def _format_result(self, score, confidence, features):
+    def _format_result(self, score, confidence, features, phrase_matches=None):
         """Format the detection result"""
-        return {
+        result = {
             'score': round(score, 1),
             'confidence': confidence['message'],
             'level': confidence['level'],
             'features': features
-        }
\ No newline at end of file
+        }
+        if phrase_matches is not None:
+            # Phrase positions let the grading page highlight the matched text
+            result['phrase_matches'] = phrase_matches.to_list()
+        return result
\ No newline at end of file
@@ -3,10 +3,18 @@ import statistics
 import os
 import sys
 from collections import Counter
+from phrase_matcher import get_phrase_matcher
 
 class AIContentDetector:
     """A simplified and robust service for detecting AI-generated content in text submissions"""
     
+    # Windowed analysis settings
+    MIN_WINDOW_WORDS = 5          # Shorter windows (headings, sign-offs) are skipped
+    MAX_WINDOW_CHARS = 2000       # Longer paragraphs are split at sentence boundaries
+    SENTENCES_PER_WINDOW = 3
+    EARLY_STOP_THRESHOLD = 50     # Score separating likely-AI from likely-human text
+    EARLY_STOP_MARGIN = 20        # Distance from the threshold that counts as decisive
+    
     def __init__(self):
         """Initialize the detector with local detection capabilities only"""
         pass
@@ -52,12 +60,9 @@ class AIContentDetector:
                 sentence_length_variance_normalized = 0
             
             # Check for formal academic phrases (common in AI writing)
-            formal_phrases = [
-                'furthermore', 'moreover', 'in conclusion', 'subsequently', 'nevertheless',
-                'in addition', 'consequently', 'thus', 'hence', 'therefore', 'in summary',
-                'in essence', 'in other words', 'to illustrate', 'for instance'
-            ]
-            formal_count = sum(1 for phrase in formal_phrases if phrase.lower() in text.lower())
+            # All configured phrases are matched in a single pass over the text
+            phrase_matches = get_phrase_matcher().scan(text)
+            formal_count = phrase_matches.category_counts['formal']
             formal_ratio = formal_count / max(sentence_count, 1)
             
             # Check for repetitive phrases
@@ -103,11 +108,157 @@ class AIContentDetector:
             
             confidence = self._get_confidence_level(ai_score)
             
-            return self._format_result(ai_score, confidence, features)
+            return self._format_result(ai_score, confidence, features, phrase_matches)
         except Exception as e:
             print(f"Error in local detection: {str(e)}")
             return self._format_result(0, 'Error during analysis', [{'name': 'Error', 'value': str(e)}])
     
+    def detect_stream(self, source, window='paragraph', early_stop=True, min_windows=3):
+        """Analyze text window by window and yield a result for each window
+        
+        Only the current window is tokenized, so memory stays bounded by the
+        window size and the cost per window is flat however long the essay is.
+        Scoring stops early once enough windows agree that the text is clearly
+        AI-generated or clearly human-written.
+        
+        Args:
+            source: The essay text, or an iterable of text chunks (e.g. a file)
+            window: 'paragraph' or 'sentence'
+            early_stop: Stop once the running score is decisive
+            min_windows: Windows to analyze before early stopping is considered
+            
+        Yields:
+            Dicts with the window offsets and text, its score and level, and the
+            running score
+        """
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        weighted_sum = 0.0
+        total_words = 0
+        
+        for start, end, window_text in self.iter_windows(source, window):
+            words = self._split_into_words(window_text)
+            if len(words) < self.MIN_WINDOW_WORDS:
+                continue
+            
+            result = self._detect_locally(window_text)
+            score = result['score']
+            
+            # Running mean and variance of window scores (Welford's algorithm)
+            count += 1
+            delta = score - mean
+            mean += delta / count
+            m2 += delta * (score - mean)
+            weighted_sum += score * len(words)
+            total_words += len(words)
+            
+            margin = abs(mean - self.EARLY_STOP_THRESHOLD)
+            stderr = (m2 / (count - 1)) ** 0.5 / count ** 0.5 if count > 1 else float('inf')
+            decisive = count >= min_windows and margin >= self.EARLY_STOP_MARGIN and margin > 2 * stderr
+            
+            yield {
+                'index': count - 1,
+                'start': start,
+                'end': end,
+                'text': window_text,  # Offsets may not match the page once the browser normalizes line breaks
+                'word_count': len(words),
+                'score': score,
+                'level': result['level'],
+                'running_score': round(weighted_sum / total_words, 1),
+                'final': early_stop and decisive
+            }
+            
+            if early_stop and decisive:
+                return
+    
+    def detect_windowed(self, text, window='paragraph', early_stop=True, min_windows=3):
+        """Analyze text per window and combine the windows into one result
+        
+        The overall score is the word-weighted mean of the window scores; the
+        per-window scores are returned under 'windows' for highlighting.
+        """
+        try:
+            if not text or len(text.strip()) < 10:
+                return self._format_result(0, {'message': 'Text too short for analysis', 'level': 'info'}, [])
+            
+            windows = list(self.detect_stream(text, window, early_stop, min_windows))
+            if not windows:
+                return self._detect_locally(text)
+            
+            ai_score = windows[-1]['running_score']
+            stopped_early = windows[-1]['final'] and windows[-1]['end'] < len(text.rstrip())
+            features = [
+                {'name': 'Windows Analyzed', 'value': f"{len(windows)} {window}s"},
+                {'name': 'Highest Window Score', 'value': f"{max(w['score'] for w in windows):.1f}%"},
+                {'name': 'Stopped Early', 'value': 'Yes' if stopped_early else 'No'},
+            ]
+            result = self._format_result(ai_score, self._get_confidence_level(ai_score), features)
+            result['windows'] = windows
+            result['stopped_early'] = stopped_early
+            return result
+        except Exception as e:
+            print(f"Error in windowed detection: {str(e)}")
+            return self._format_result(0, {'message': 'Error during analysis', 'level': 'danger'}, [{'name': 'Error', 'value': str(e)}])
+    
+    def iter_windows(self, source, window='paragraph'):
+        """Yield (start, end, text) windows from a string or an iterable of text chunks
+        
+        Paragraphs end at line breaks; paragraphs longer than MAX_WINDOW_CHARS
+        are split at sentence boundaries. Sentence windows hold
+        SENTENCES_PER_WINDOW sentences. Only the unfinished tail of the input
+        is buffered, and offsets refer to the original text.
+        """
+        if isinstance(source, str):
+            source = [source]
+        
+        if window == 'paragraph':
+            boundary = re.compile(r'\n\s*')
+            per_window = 1
+        else:
+            boundary = re.compile(r'(?<=[.!?])[\'"]?\s+(?=[A-Z])')
+            per_window = self.SENTENCES_PER_WINDOW
+        
+        buffer = ''
+        offset = 0      # Position of buffer[0] in the whole text
+        scan_from = 0   # Boundaries before this index have been counted
+        seen = 0
+        
+        for chunk in source:
+            buffer += chunk
+            position = 0
+            for match in boundary.finditer(buffer, scan_from):
+                # A boundary at the very end may continue in the next chunk
+                if match.end() == len(buffer):
+                    scan_from = match.start()
+                    break
+                scan_from = match.end()
+                seen += 1
+                if seen % per_window:
+                    continue
+                yield from self._emit_window(offset + position, buffer[position:match.start()])
+                position = match.end()
+            buffer = buffer[position:]
+            offset += position
+            scan_from = max(scan_from - position, 0)
+        
+        yield from self._emit_window(offset, buffer)
+    
+    def _emit_window(self, start, text):
+        """Strip a window and split it if it is longer than MAX_WINDOW_CHARS"""
+        while text:
+            if len(text) > self.MAX_WINDOW_CHARS:
+                cut = text.rfind('. ', 0, self.MAX_WINDOW_CHARS)
+                cut = cut + 1 if cut > 0 else self.MAX_WINDOW_CHARS
+            else:
+                cut = len(text)
+            piece = text[:cut]
+            stripped = piece.strip()
+            if stripped:
+                lead = len(piece) - len(piece.lstrip())
+                yield start + lead, start + lead + len(stripped), stripped
+            start, text = start + cut, text[cut:]
+    
     def _split_into_sentences(self, text):
         """Split text into sentences without using NLTK"""
         # Simple sentence splitting by common sentence terminators
@@ -131,11 +282,15 @@ class AIContentDetector:
         else:
             return {'message': 'Low probability of AI-generated content', 'level': 'success'}
     
-    def _format_result(self, score, confidence, features):
+    def _format_result(self, score, confidence, features, phrase_matches=None):
         """Format the detection result"""
-        return {
+        result = {
             'score': round(score, 1),
             'confidence': confidence['message'],
             'level': confidence['level'],
             'features': features
-        }
\ No newline at end of file
+        }
+        if phrase_matches is not None:
+            # Phrase positions let the grading page highlight the matched text
+            result['phrase_matches'] = phrase_matches.to_list()
+        return result
\ No newline at end of file
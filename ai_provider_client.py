@@ -0,0 +1,237 @@
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ProviderError(Exception):
+    """Raised when an external AI-detection provider cannot return a result"""
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without calling the provider while its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stop calling a failing provider for a while, then probe it again
+
+    After `failure_threshold` consecutive failures the breaker opens and every
+    call fails fast for `reset_timeout` seconds. The next call after that is
+    let through as a probe: success closes the breaker, failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self):
+        """Return True if a call may be made now"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+
+class Provider:
+    """Request and response format of one external detection API"""
+
+    def __init__(self, name, url, build_headers, build_payload, parse_response):
+        self.name = name
+        self.url = url
+        self.build_headers = build_headers
+        self.build_payload = build_payload
+        self.parse_response = parse_response
+
+
+def _parse_gptzero(result):
+    document = result.get('documents', [{}])[0]
+    ai_score = document.get('completely_generated_prob', 0) * 100
+    return ai_score, [
+        {'name': 'GPTZero AI Score', 'value': f"{ai_score:.1f}%"},
+        {'name': 'Document Classification', 'value': document.get('document_classification', 'Unknown')}
+    ]
+
+
+def _parse_originality(result):
+    ai_score = result.get('ai_score', 0) * 100
+    return ai_score, [
+        {'name': 'Originality.ai Score', 'value': f"{ai_score:.1f}%"},
+        {'name': 'AI Model', 'value': result.get('ai_model', 'Unknown')}
+    ]
+
+
+def get_provider(name, base_url=None):
+    """Return the Provider definition for 'gptzero' or 'originality'"""
+    if name == 'gptzero':
+        return Provider(
+            'GPTZero',
+            (base_url or 'https://api.gptzero.me') + '/v2/predict/text',
+            lambda api_key: {'Content-Type': 'application/json', 'x-api-key': api_key},
+            lambda text: {'document': text},
+            _parse_gptzero
+        )
+    if name == 'originality':
+        return Provider(
+            'Originality.ai',
+            (base_url or 'https://api.originality.ai') + '/api/v1/scan/ai',
+            lambda api_key: {'X-OAI-API-KEY': api_key, 'Content-Type': 'application/json'},
+            lambda text: {'content': text},
+            _parse_originality
+        )
+    raise ValueError(f"Unknown AI detection provider: {name}")
+
+
+class ProviderClient:
+    """Thread-safe client for an external AI-detection provider
+
+    Keeps a persistent connection pool, limits the number of requests in
+    flight, applies connect/read timeouts, retries transient errors with
+    exponential backoff and trips a circuit breaker when the provider keeps
+    failing so callers can fall back to local analysis immediately.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, provider, api_key, max_concurrency=4, connect_timeout=3.05,
+                 read_timeout=20.0, max_retries=2, backoff_factor=0.5, breaker=None,
+                 breaker_failure_threshold=5, breaker_reset_timeout=30.0):
+        self.provider = provider
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.timeout = (connect_timeout, read_timeout)
+        # One breaker per client, so failures are counted across all requests it serves
+        self.breaker = breaker or CircuitBreaker(breaker_failure_threshold, breaker_reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(['POST']),
+            raise_on_status=False,
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(provider.build_headers(api_key))
+
+    def detect(self, text):
+        """Call the provider for one text
+
+        Returns:
+            (ai_score, features) as parsed from the provider response
+
+        Raises:
+            CircuitOpenError: The breaker is open; the provider was not called
+            ProviderError: The call failed after retries, or the response
+                could not be parsed
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"{self.provider.name} is unavailable, circuit breaker is open")
+
+        try:
+            with self._slots:
+                response = self.session.post(
+                    self.provider.url,
+                    json=self.provider.build_payload(text),
+                    timeout=self.timeout
+                )
+            if response.status_code != 200:
+                raise ProviderError(f"{self.provider.name} API returned status {response.status_code}")
+            result = self.provider.parse_response(response.json())
+        except ProviderError:
+            self.breaker.record_failure()
+            raise
+        except (requests.RequestException, ValueError) as e:
+            self.breaker.record_failure()
+            raise ProviderError(str(e)) from e
+        except Exception as e:
+            # A malformed body must still count, or a half-open breaker never closes again
+            self.breaker.record_failure()
+            raise ProviderError(f"{self.provider.name} API returned an unexpected response: {e!r}") from e
+
+        self.breaker.record_success()
+        return result
+
+    def detect_many(self, texts, fallback=None):
+        """Call the provider for many texts with at most max_concurrency in flight
+
+        Args:
+            texts: Texts to analyze
+            fallback: Optional callable (text, error) -> result used when a
+                call fails; without it the exception is returned in place
+
+        Returns:
+            Results in the same order as texts
+        """
+        def run(text):
+            try:
+                return self.detect(text)
+            except ProviderError as e:
+                return fallback(text, e) if fallback else e
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(run, texts))
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_provider_client(provider_name, api_key, base_url=None, **options):
+    """Return a shared client per provider so the connection pool is reused across requests"""
+    key = (provider_name, api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ProviderClient(get_provider(provider_name, base_url), api_key, **options)
+            _clients[key] = client
+        return client
@@ -0,0 +1,113 @@
+"""Local stub of the GPTZero and Originality.ai detection APIs for tests and benchmarks
+
+Run it and point the detector at it:
+
+    python ai_provider_stub.py --port 8765 --latency 0.2
+    GPTZERO_API_URL=http://127.0.0.1:8765 AI_DETECTION_PROVIDER=gptzero GPTZERO_API_KEY=test ...
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    """Behaviour of the stub server, adjustable while it is running"""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, fail_status=503, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_status = fail_status
+        self.request_count = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def enter(self):
+        with self._lock:
+            self.request_count += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            return self._random.random() < self.failure_rate
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+
+
+def _score(text):
+    """Deterministic pseudo score in [0, 1) derived from the text"""
+    return (zlib.crc32(text.encode('utf-8')) % 1000) / 1000
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so connection reuse is observable
+
+    def do_POST(self):
+        state = self.server.state
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        should_fail = state.enter()
+        try:
+            if state.latency:
+                time.sleep(state.latency)
+            if should_fail:
+                return self._send(state.fail_status, {'error': 'stub failure'})
+
+            if self.path == '/v2/predict/text':
+                score = _score(body.get('document', ''))
+                return self._send(200, {'documents': [{
+                    'completely_generated_prob': score,
+                    'document_classification': 'AI_ONLY' if score > 0.5 else 'HUMAN_ONLY'
+                }]})
+            if self.path == '/api/v1/scan/ai':
+                return self._send(200, {'ai_score': _score(body.get('content', '')), 'ai_model': 'stub'})
+            return self._send(404, {'error': 'not found'})
+        finally:
+            state.leave()
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host='127.0.0.1', port=0, **state_options):
+    """Start the stub server in a background thread
+
+    Returns:
+        (server, base_url); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(**state_options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stub AI-detection provider server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    server.state = StubState(latency=args.latency, failure_rate=args.failure_rate)
+    print(f"Stub AI-detection provider listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -3,7 +3,7 @@ from flask_login import LoginManager, login_user, logout_user, login_required, c
 from werkzeug.security import generate_password_hash
 from datetime import timedelta,  datetime
 from models import db, User, Question, StudentSubmission, Quiz, Subject, QuizSubmission, StudentSubject, Announcement
-from forms import LoginForm, RegistrationForm, GradeSubmissionForm, QuizForm
+from forms import LoginForm, RegistrationForm, GradeSubmissionForm, QuizForm, ActivationForm
 from question_forms import get_question_form, MultipleChoiceQuestionForm, IdentificationQuestionForm, TrueFalseQuestionForm
 from flask_wtf.csrf import CSRFProtect
 from flask_wtf import FlaskForm
@@ -11,6 +11,11 @@ from quiz_module import quiz_bp
 from subject_module import subject_bp
 from settings_module import settings_bp
 from import_document import import_document_bp
+from question_service import QuestionService
+from upload_store import UPLOAD_MAX_BYTES, start_upload_janitor
+from quiz_purge import resume_quiz_purges
+from roster_jobs import fail_interrupted_imports
+from import_jobs import fail_interrupted_jobs
 
 app = Flask(__name__)
 
@@ -39,6 +44,9 @@ if not os.path.exists(instance_path):
 app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Reject request bodies well over the upload limit before they are read
+app.config['MAX_CONTENT_LENGTH'] = UPLOAD_MAX_BYTES + 1024 * 1024
+
 # Initialize extensions
 try:
     db.init_app(app)
@@ -48,6 +56,27 @@ except Exception as e:
     print(f"Database initialization error: {str(e)}")
     # If database is corrupted, you may need to run repair_db.py
 
+# Remove stored uploads once they have not been used for UPLOAD_TTL_SECONDS
+start_upload_janitor()
+
+# Finish purging quizzes that were deleted before the last shutdown
+try:
+    resume_quiz_purges(app)
+except Exception as e:
+    print(f"Could not resume quiz purges: {str(e)}")
+
+# Roster imports cut off by the last shutdown will never finish
+try:
+    fail_interrupted_imports(app)
+except Exception as e:
+    print(f"Could not close interrupted roster imports: {str(e)}")
+
+# Neither will document imports; their half-created quizzes are removed
+try:
+    fail_interrupted_jobs(app)
+except Exception as e:
+    print(f"Could not close interrupted document imports: {str(e)}")
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -93,6 +122,10 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
+        if user and user.check_activation_code(form.password.data):
+            # First login of an imported account: the student chooses a password now
+            session['activation_user_id'] = user.id
+            return redirect(url_for('activate_account'))
         if user and user.check_password(form.password.data):
             login_user(user)
             next_page = request.args.get('next')
@@ -100,6 +133,24 @@ def login():
         flash('Invalid username or password')
     return render_template('auth/login.html', form=form)
 
+@app.route('/activate', methods=['GET', 'POST'])
+def activate_account():
+    user_id = session.get('activation_user_id')
+    user = User.query.get(user_id) if user_id else None
+    if not user or not user.needs_activation:
+        session.pop('activation_user_id', None)
+        return redirect(url_for('login'))
+    
+    form = ActivationForm()
+    if form.validate_on_submit():
+        user.activate(form.password.data)
+        db.session.commit()
+        session.pop('activation_user_id', None)
+        login_user(user)
+        flash('Your account is activated. Welcome!')
+        return redirect(url_for('dashboard'))
+    return render_template('auth/activate.html', form=form, user=user)
+
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
@@ -212,6 +263,18 @@ def grade_submission(submission_id):
             quiz_submission.graded = True
             quiz_submission.graded_at = datetime.utcnow()
             db.session.commit()
+            
+            # Fold the graded essays into each student's style baseline
+            try:
+                from stylometry import StylometryService
+                for submission in quiz_submission.question_submissions:
+                    if submission.question.question_type == 'essay' and submission.submitted_answer != 'Missing':
+                        StylometryService.record_essay(submission, commit=False)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error updating stylometric profile: {str(e)}")
+            
             flash('Submission graded successfully!')
             return redirect(url_for('dashboard'))
         except Exception as e:
@@ -279,8 +342,28 @@ def check_ai_content(submission_id):
         # Initialize the detector with the new simplified implementation
         detector = AIContentDetector()
         
-        # Get the detection result
-        result = detector.detect(essay_text)
+        # Get the detection result; ?mode=paragraph or ?mode=sentence scores
+        # the essay window by window for highlighting
+        mode = request.args.get('mode')
+        if mode in ('paragraph', 'sentence'):
+            result = detector.detect_windowed(essay_text, window=mode)
+        else:
+            result = detector.detect(essay_text)
+        
+        # Compare the essay with the student's own writing history
+        try:
+            from stylometry import StylometryService, FEATURE_LABELS
+            baseline = StylometryService.compare_to_baseline(submission)
+            if baseline:
+                result['baseline'] = baseline
+                result['features'].append({
+                    'name': 'Deviation from Student Baseline',
+                    'value': f"{baseline['deviation_score']:.1f}% ({baseline['essay_count']} earlier essays)"
+                })
+                for feature, zscore in baseline['zscores'].items():
+                    result['features'].append({'name': f"{FEATURE_LABELS[feature]} (z-score)", 'value': f"{zscore:+.2f}"})
+        except Exception as e:
+            print(f"Error comparing with stylometric baseline: {str(e)}")
         
         # Return JSON response
         return jsonify(result)
@@ -297,6 +380,37 @@ def check_ai_content(submission_id):
             'features': [{'name': 'Error Details', 'value': str(e)}]
         }), 500
 
+@app.route('/check_essay_similarity/<int:quiz_id>', methods=['POST'])
+@login_required
+def check_essay_similarity(quiz_id):
+    """Find near-duplicate essay answers between students of a quiz"""
+    from flask import jsonify
+    from essay_similarity import EssaySimilarityService
+    
+    try:
+        if current_user.role != 'teacher':
+            return jsonify({'error': 'Unauthorized', 'level': 'danger'}), 403
+        
+        quiz = Quiz.query.get(quiz_id)
+        if not quiz:
+            return jsonify({'error': 'Quiz not found', 'level': 'danger', 'pairs': []}), 404
+        
+        # Verify teacher owns the quiz
+        if quiz.user_id != current_user.id:
+            return jsonify({'error': 'Unauthorized', 'level': 'danger'}), 403
+        
+        pairs = EssaySimilarityService.find_similar_pairs(quiz_id)
+        return jsonify({'quiz_id': quiz_id, 'pairs': pairs})
+    
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in check_essay_similarity: {str(e)}")
+        return jsonify({
+            'error': 'The similarity check encountered an error. Please try again later.',
+            'level': 'danger',
+            'pairs': []
+        }), 500
+
 # This duplicate route was removed to fix the AssertionError
 # The route is already defined earlier in the file
 
@@ -316,7 +430,7 @@ def submit_answer(question_id):
     try:
         question = Question.query.get_or_404(question_id)
         quiz = question.quiz
-        if not quiz:
+        if not quiz or quiz.deleted_at:
             flash('This question is not part of any quiz.')
             return redirect(url_for('dashboard'))
             
@@ -325,6 +439,18 @@ def submit_answer(question_id):
             flash('You are not enrolled in this subject.')
             return redirect(url_for('dashboard'))
         
+        # Only the questions drawn for this student can be answered
+        from quiz_shuffle import sample_questions, drawn_questions
+        in_progress = QuizSubmission.query.filter_by(
+            student_id=current_user.id,
+            quiz_id=quiz.id,
+            submitted_at=None
+        ).first()
+        quiz_questions = drawn_questions(quiz, in_progress) if in_progress else sample_questions(quiz, current_user.id)
+        if question not in quiz_questions:
+            flash('This question is not part of your quiz.')
+            return redirect(url_for('dashboard'))
+        
         # Check if quiz has started
         now = datetime.utcnow()
         if quiz.start_time:
@@ -368,6 +494,7 @@ def submit_answer(question_id):
                     quiz_id=quiz.id,
                     start_time=now
                 )
+                drawn_questions(quiz, quiz_submission)  # Fix the attempt's questions
                 db.session.add(quiz_submission)
                 db.session.commit()
         except Exception:
@@ -413,7 +540,7 @@ def submit_answer(question_id):
                     answered_question_ids = [sub.question_id for sub in answered_questions]
                     
                     # Create "Missing" submissions for all unanswered questions
-                    for q in quiz.questions:
+                    for q in quiz_questions:
                         if q.id not in answered_question_ids and q.id != question_id:  # Skip current question
                             missing_submission = StudentSubmission(
                                 student_id=current_user.id,
@@ -432,7 +559,7 @@ def submit_answer(question_id):
                     quiz_submission.total_score = sum([sub.score for sub in answered_questions]) + score
                     
                     # Create announcement for the teacher
-                    missing_count = len(quiz.questions) - len(answered_questions) - 1  # -1 for current question
+                    missing_count = len(quiz_questions) - len(answered_questions) - 1  # -1 for current question
                     missing_info = f" ({missing_count} questions unanswered)" if missing_count > 0 else ""
                     announcement = Announcement(
                         title=f'New Submission Received (Time Expired){missing_info}',
@@ -492,10 +619,10 @@ def submit_answer(question_id):
             db.session.add(submission)
             
             # Update quiz submission status
-            total_questions = len(quiz.questions)
+            total_questions = len(quiz_questions)
             answered_questions = StudentSubmission.query.filter(
                 StudentSubmission.student_id == current_user.id,
-                StudentSubmission.question_id.in_([q.id for q in quiz.questions])
+                StudentSubmission.question_id.in_([q.id for q in quiz_questions])
             ).count() + 1  # Include current submission
             
             if answered_questions == total_questions:
@@ -546,9 +673,11 @@ def add_question(subject_id):
                 next_order_index = 0
                 
                 if quiz_id:
-                    quiz = Quiz.query.get(quiz_id)
-                    if quiz:
-                        next_order_index = len(quiz.questions)
+                    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first()
+                    if not quiz:
+                        flash('This quiz was deleted.')
+                        return redirect(url_for('dashboard'))
+                    next_order_index = len(quiz.questions)
                 
                 question = Question(
                     question_text=form.question_text.data,
@@ -705,28 +834,19 @@ def delete_quiz(quiz_id):
         flash('You do not have permission to delete this quiz.')
         return redirect(url_for('dashboard'))
     
-    try:
-        # Delete all related submissions first
-        QuizSubmission.query.filter_by(quiz_id=quiz.id).delete()
-        
-        # Delete all questions associated with this quiz
-        Question.query.filter_by(quiz_id=quiz.id).delete()
-        
-        # Finally delete the quiz
-        db.session.delete(quiz)
-        db.session.commit()
-        flash(f'Quiz "{quiz.title}" deleted successfully!')
-    except Exception as e:
-        db.session.rollback()
-        flash('An error occurred while deleting the quiz.')
+    # Hide the quiz now; its submissions and questions are purged in the background
+    from quiz_service import QuizService
+    success, message = QuizService.delete_quiz(quiz)
+    flash(message if success else 'An error occurred while deleting the quiz.')
     
     return redirect(url_for('dashboard'))
 
 @app.route('/view_quiz/<int:quiz_id>')
 @login_required
 def view_quiz(quiz_id):
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     subject = quiz.subject
+    questions = quiz.questions
     
     # Check if user has permission to view this quiz
     if current_user.role == 'teacher' and subject.teacher_id != current_user.id:
@@ -746,8 +866,20 @@ def view_quiz(quiz_id):
         if not submission or not submission.submitted_at:
             # If no submission or quiz not submitted, redirect to take quiz page
             return redirect(url_for('take_quiz', quiz_id=quiz_id))
+        
+        # Students only see the questions they were given from the pool
+        questions = submission.questions
     
-    return render_template('auth/view_quiz.html', quiz=quiz)
+    # Subjects the quiz can be copied to, and how each question performed
+    subjects = []
+    item_stats = {}
+    if current_user.role == 'teacher':
+        from quiz_service import QuizService
+        subjects = Subject.query.filter_by(teacher_id=current_user.id).order_by(Subject.name).all()
+        item_stats = QuizService.item_analysis(quiz)
+    
+    return render_template('auth/view_quiz.html', quiz=quiz, questions=questions,
+                           subjects=subjects, item_stats=item_stats)
 
 @app.route('/enroll_student', methods=['POST'])
 @login_required
@@ -788,13 +920,15 @@ def take_quiz(quiz_id):
             flash('Only students can take quizzes/exams.')
             return redirect(url_for('dashboard'))
         
-        quiz = Quiz.query.get_or_404(quiz_id)
+        quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
         subject = quiz.subject
         
         if subject not in current_user.enrolled_subjects:
             flash('You are not enrolled in this subject.')
             return redirect(url_for('dashboard'))
         
+        from quiz_shuffle import drawn_questions, question_order, option_orders
+        
         # Check if quiz has started
         now = datetime.utcnow()
         if quiz.start_time:
@@ -839,7 +973,10 @@ def take_quiz(quiz_id):
                     start_time=now
                 )
                 db.session.add(quiz_submission)
-                db.session.commit()
+            
+            # The questions drawn for this student, fixed for the whole attempt
+            quiz_questions = drawn_questions(quiz, quiz_submission)
+            db.session.commit()
         except Exception as e:
             db.session.rollback()
             flash(f'Error accessing quiz. Please try again. {str(e)}')
@@ -859,7 +996,7 @@ def take_quiz(quiz_id):
                     existing_question_ids = [sub.question_id for sub in existing_submissions]
                     
                     # Create "Missing" submissions for unanswered questions
-                    for question in quiz.questions:
+                    for question in quiz_questions:
                         if question.id not in existing_question_ids:
                             missing_submission = StudentSubmission(
                                 student_id=current_user.id,
@@ -878,7 +1015,7 @@ def take_quiz(quiz_id):
                     quiz_submission.total_score = sum([sub.score for sub in existing_submissions])
                     
                     # Create announcement for the teacher
-                    missing_count = len(quiz.questions) - len(existing_submissions)
+                    missing_count = len(quiz_questions) - len(existing_submissions)
                     missing_info = f" ({missing_count} questions unanswered)" if missing_count > 0 else ""
                     announcement = Announcement(
                         title=f'New Submission Received (Time Expired){missing_info}',
@@ -904,11 +1041,11 @@ def take_quiz(quiz_id):
         try:
             answered_questions = StudentSubmission.query.filter(
                 StudentSubmission.student_id == current_user.id,
-                StudentSubmission.question_id.in_([q.id for q in quiz.questions])
+                StudentSubmission.question_id.in_([q.id for q in quiz_questions])
             ).with_for_update().all()
             
             answered_question_ids = [sub.question_id for sub in answered_questions]
-            unanswered_questions = [q for q in quiz.questions if q.id not in answered_question_ids]
+            unanswered_questions = [q for q in quiz_questions if q.id not in answered_question_ids]
             
             if not unanswered_questions:
                 quiz_submission.submitted_at = now
@@ -922,9 +1059,11 @@ def take_quiz(quiz_id):
             # Create a form for CSRF protection
             form = FlaskForm()
             
+            # This student's question and option order, computed rather than stored
             return render_template('auth/take_quiz.html',
                                 quiz=quiz,
-                                questions=quiz.questions,
+                                questions=question_order(quiz.id, current_user.id, quiz_questions),
+                                option_orders=option_orders(quiz.id, current_user.id, quiz_questions),
                                 remaining_time=remaining_time,
                                 form=form)
         except Exception:
@@ -943,13 +1082,15 @@ def submit_quiz(quiz_id):
         flash('Only students can submit quizzes/exams.')
         return redirect(url_for('dashboard'))
     
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     subject = quiz.subject
     
     if subject not in current_user.enrolled_subjects:
         flash('You are not enrolled in this subject.')
         return redirect(url_for('dashboard'))
     
+    from quiz_shuffle import drawn_questions, canonical_answer
+    
     # Get quiz submission - only get in-progress submissions
     quiz_submission = QuizSubmission.query.filter_by(
         student_id=current_user.id,
@@ -971,6 +1112,9 @@ def submit_quiz(quiz_id):
             flash('No active quiz session found.')
         return redirect(url_for('dashboard'))
     
+    # The questions drawn when the attempt started
+    quiz_questions = drawn_questions(quiz, quiz_submission)
+    
     form = FlaskForm()  # For CSRF protection
     if form.validate_on_submit():
         try:
@@ -984,9 +1128,12 @@ def submit_quiz(quiz_id):
             
             total_score = 0.0
             missing_questions = 0
+            essay_submissions = []
             
-            for question in quiz.questions:
-                answer = request.form.get(f'answer_{question.id}')
+            for question in quiz_questions:
+                # Options were shown in this student's order; save the canonical index
+                answer = canonical_answer(quiz.id, current_user.id, question,
+                                          request.form.get(f'answer_{question.id}'))
                 
                 # Handle missing answers - mark as "Missing" instead of requiring all answers
                 if answer is None or not answer.strip():
@@ -1021,6 +1168,8 @@ def submit_quiz(quiz_id):
                         score=score,
                         submitted_at=datetime.utcnow()
                     )
+                    if question.question_type == 'essay':
+                        essay_submissions.append(submission)
                 
                 db.session.add(submission)
             
@@ -1044,6 +1193,17 @@ def submit_quiz(quiz_id):
             
             db.session.commit()
             
+            # Store essay signatures so copied answers are found incrementally
+            if essay_submissions:
+                try:
+                    from essay_similarity import EssaySimilarityService
+                    for essay_submission in essay_submissions:
+                        EssaySimilarityService.index_submission(essay_submission, commit=False)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error indexing essay signatures: {str(e)}")
+            
             if missing_questions > 0:
                 flash(f'Your {quiz.quiz_type} has been submitted with {missing_questions} unanswered questions.')
             else:
@@ -1107,7 +1267,7 @@ def add_quiz_question():
         flash('No active quiz setup session.')
         return redirect(url_for('create_quiz'))
     
-    quiz = Quiz.query.get_or_404(quiz_setup['quiz_id'])
+    quiz = Quiz.query.filter_by(id=quiz_setup['quiz_id'], deleted_at=None).first_or_404()
     if quiz.user_id != current_user.id:
         flash('You do not have permission to modify this quiz.')
         return redirect(url_for('dashboard'))
@@ -1121,34 +1281,32 @@ def add_quiz_question():
             flash('Please fill in all required fields.')
             return redirect(url_for('create_quiz'))
         
-        question = Question(
-            question_text=question_text,
-            question_type=question_type,
-            points=points,
-            user_id=current_user.id,
-            subject_id=quiz.subject_id,
-            quiz_id=quiz.id,
-            order_index=quiz_setup['questions_added']
-        )
+        question_data = {
+            'question_text': question_text,
+            'question_type': question_type,
+            'points': points
+        }
         
         if question_type == 'multiple_choice':
             options = [request.form.get(f'options-{i}') for i in range(4)]
             if not all(options):
                 flash('Please fill in all options for multiple choice question.')
                 return redirect(url_for('create_quiz'))
-            question.options = options
-            question.correct_answer = request.form.get('correct_option')
+            question_data['options'] = options
+            question_data['correct_answer'] = request.form.get('correct_option')
         elif question_type in ['identification', 'true_false']:
-            question.correct_answer = request.form.get('correct_answer')
+            question_data['correct_answer'] = request.form.get('correct_answer')
         elif question_type == 'essay':
-            word_limit = request.form.get('word_limit', type=int)
-            correct_answer = request.form.get('correct_answer', '')
-            
-            question.word_limit = word_limit
-            question.correct_answer = correct_answer
+            question_data['word_limit'] = request.form.get('word_limit', type=int)
+            question_data['correct_answer'] = request.form.get('correct_answer', '')
         
-        db.session.add(question)
-        db.session.commit()  # Commit before updating session to ensure question is saved
+        # Validated and committed before updating session to ensure question is saved
+        success, message, _ = QuestionService.add_questions(
+            quiz, [question_data], current_user.id, start_index=quiz_setup['questions_added']
+        )
+        if not success:
+            flash(message)
+            return redirect(url_for('create_quiz'))
         
         quiz_setup['questions_added'] += 1
         session.modified = True
@@ -48,6 +48,8 @@ def create_app(config_name='default'):
         try:
             db.create_all()
             app.logger.info("Database tables created successfully")
+            from app.question.services import QuestionService
+            QuestionService.ensure_search_index()
         except Exception as e:
             app.logger.error(f"Database initialization error: {str(e)}")
     
@@ -63,6 +65,7 @@ def register_blueprints(app):
     from app.main.routes import main_bp
     from app.import_document import import_document_bp
     from app.import_document.batch_operations import batch_bp
+    from app.question.routes import question_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(quiz_bp, url_prefix='/quiz')
@@ -71,6 +74,7 @@ def register_blueprints(app):
     app.register_blueprint(main_bp)
     app.register_blueprint(import_document_bp, url_prefix='/import')
     app.register_blueprint(batch_bp, url_prefix='/batch')
+    app.register_blueprint(question_bp, url_prefix='/question')
 
 # Error handlers are now managed by ErrorService
 
@@ -26,10 +26,13 @@ class DashboardService:
             questions = Question.query.filter_by(user_id=teacher_id).all()
             
             # Get quiz submissions for teacher's quizzes
-            quiz_submissions = QuizSubmission.query.join(Quiz).filter(Quiz.user_id == teacher_id).all()
+            quiz_submissions = QuizSubmission.query.join(Quiz).filter(
+                Quiz.user_id == teacher_id,
+                Quiz.deleted_at.is_(None)
+            ).options(*QuizSubmission.score_options()).all()
             
-            # Get teacher's quizzes
-            quizzes = Quiz.query.filter_by(user_id=teacher_id).all()
+            # Get teacher's quizzes; deleted ones are hidden until they are purged
+            quizzes = Quiz.query.filter_by(user_id=teacher_id, deleted_at=None).all()
             
             # Get pending enrollments for teacher's subjects
             pending_enrollments = StudentSubject.query.join(Subject).filter(
@@ -40,6 +43,7 @@ class DashboardService:
             # Get submission announcements for teacher
             submission_announcements = Announcement.query.join(Quiz).filter(
                 Quiz.user_id == teacher_id,
+                Quiz.deleted_at.is_(None),
                 Announcement.announcement_type == 'submission_received'
             ).order_by(Announcement.created_at.desc()).limit(10).all()
             
@@ -79,14 +83,18 @@ class DashboardService:
             # Get student's enrollments
             enrollments = StudentSubject.query.filter_by(student_id=student_id).all()
             
-            # Get student's quiz submissions
-            quiz_submissions = QuizSubmission.query.filter_by(student_id=student_id).order_by(QuizSubmission.submitted_at.desc()).all()
+            # Get student's quiz submissions; those of deleted quizzes are hidden until they are purged
+            quiz_submissions = QuizSubmission.query.join(Quiz).filter(
+                QuizSubmission.student_id == student_id,
+                Quiz.deleted_at.is_(None)
+            ).options(*QuizSubmission.score_options()).order_by(QuizSubmission.submitted_at.desc()).all()
             
             # Get quiz announcements for student's enrolled subjects
             enrolled_subject_ids = [enrollment.subject_id for enrollment in enrollments if enrollment.enrollment_status == 'approved']
-            quiz_announcements = Announcement.query.filter(
+            quiz_announcements = Announcement.query.outerjoin(Quiz, Announcement.quiz_id == Quiz.id).filter(
                 Announcement.subject_id.in_(enrolled_subject_ids) if enrolled_subject_ids else False,
-                Announcement.announcement_type == 'quiz_created'
+                Announcement.announcement_type == 'quiz_created',
+                Quiz.deleted_at.is_(None)
             ).order_by(Announcement.created_at.desc()).limit(10).all()
             
             return {
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, redirect, url_for, request, flash,
 from flask_login import login_required, current_user
 from app.models import db, Quiz, Question
 from app.import_document.forms import QuestionForm
+from app.quiz.services import QuizService
 
 batch_bp = Blueprint('batch_operations', __name__, url_prefix='/batch')
 
@@ -49,20 +50,11 @@ def batch_delete(quiz_id):
         flash('No questions selected for deletion.', 'warning')
         return redirect(url_for('batch_operations.manage_questions', quiz_id=quiz_id))
     
-    try:
-        # Delete the selected questions
-        deleted_count = 0
-        for question_id in selected_questions:
-            question = Question.query.get(question_id)
-            if question and question.quiz_id == quiz_id:
-                db.session.delete(question)
-                deleted_count += 1
-        
-        db.session.commit()
+    success, message, deleted_count = QuizService.delete_questions(quiz_id, current_user.id, selected_questions)
+    if success:
         flash(f'Successfully deleted {deleted_count} question(s).', 'success')
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error deleting questions: {str(e)}', 'danger')
+    else:
+        flash(f'Error deleting questions: {message}', 'danger')
     
     return redirect(url_for('batch_operations.manage_questions', quiz_id=quiz_id))
 
@@ -114,32 +106,81 @@ def update_questions(quiz_id):
         flash('You do not have permission to manage this quiz.', 'danger')
         return redirect(url_for('dashboard.index'))
     
-    # Process the form data
-    try:
-        updated_count = 0
-        for key, value in request.form.items():
-            if key.startswith('question_text_'):
-                question_id = key.split('_')[-1]
-                question = Question.query.get(question_id)
-                
-                if question and question.quiz_id == quiz_id:
-                    # Update question text
-                    question.question_text = value
-                    
-                    # Update points if provided
-                    points_key = f'points_{question_id}'
-                    if points_key in request.form:
-                        try:
-                            question.points = float(request.form[points_key])
-                        except ValueError:
-                            pass
-                    
-                    updated_count += 1
-        
-        db.session.commit()
+    # Collect the changes from the form, then apply them in one statement
+    changes = form_question_changes(request.form)
+    if not changes:
+        flash('No questions to update.', 'warning')
+        return redirect(url_for('batch_operations.manage_questions', quiz_id=quiz_id))
+    
+    success, message, updated_count = QuizService.update_questions(quiz_id, current_user.id, changes)
+    if success:
         flash(f'Successfully updated {updated_count} question(s).', 'success')
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error updating questions: {str(e)}', 'danger')
+    else:
+        flash(f'Error updating questions: {message}', 'danger')
+    
+    return redirect(url_for('batch_operations.manage_questions', quiz_id=quiz_id))
+
+def form_question_changes(form):
+    """Question changes from question_text_<id> and points_<id> form fields
+    
+    Points that are not a number are left unchanged, as before.
+    """
+    changes = []
+    for key, value in form.items():
+        if key.startswith('question_text_'):
+            question_id = key.split('_')[-1]
+            change = {'id': question_id, 'question_text': value}
+            try:
+                change['points'] = float(form[f'points_{question_id}'])
+            except (KeyError, ValueError):
+                pass
+            changes.append(change)
+    return changes
+
+def _json_result(success, message, status=400, **data):
+    """JSON response for the bulk endpoints"""
+    return jsonify({'success': success, 'message': message, **data}), 200 if success else status
+
+@batch_bp.route('/<int:quiz_id>/questions', methods=['PATCH'])
+@login_required
+def bulk_update_questions(quiz_id):
+    """Edit many questions at once
+    
+    Body: {"questions": [{"id": 1, "question_text": "...", "points": 2}, ...]}
+    """
+    if current_user.role != 'teacher':
+        return _json_result(False, 'Only teachers can update questions.', 403)
+    
+    payload = request.get_json(silent=True) or {}
+    success, message, updated_count = QuizService.update_questions(
+        quiz_id, current_user.id, payload.get('questions'))
+    return _json_result(success, message, updated=updated_count)
+
+@batch_bp.route('/<int:quiz_id>/order', methods=['PUT'])
+@login_required
+def bulk_reorder_questions(quiz_id):
+    """Reorder a whole quiz
+    
+    Body: {"question_ids": [3, 1, 2, ...]} listing every question of the quiz
+    """
+    if current_user.role != 'teacher':
+        return _json_result(False, 'Only teachers can reorder questions.', 403)
+    
+    payload = request.get_json(silent=True) or {}
+    success, message = QuizService.reorder_questions(quiz_id, current_user.id, payload.get('question_ids'))
+    return _json_result(success, message)
+
+@batch_bp.route('/<int:quiz_id>/questions', methods=['DELETE'])
+@login_required
+def bulk_delete_questions(quiz_id):
+    """Delete a selection of questions
+    
+    Body: {"question_ids": [4, 5, ...]}
+    """
+    if current_user.role != 'teacher':
+        return _json_result(False, 'Only teachers can delete questions.', 403)
     
-    return redirect(url_for('batch_operations.manage_questions', quiz_id=quiz_id))
\ No newline at end of file
+    payload = request.get_json(silent=True) or {}
+    success, message, deleted_count = QuizService.delete_questions(
+        quiz_id, current_user.id, payload.get('question_ids'))
+    return _json_result(success, message, deleted=deleted_count)
\ No newline at end of file
@@ -4,6 +4,8 @@ from flask_login import login_required, current_user
 from app.models import db, Quiz, Question
 from app.import_document.forms import QuestionForm
 from app.import_document import import_document_bp
+from app.import_document.batch_operations import form_question_changes
+from app.quiz.services import QuizService
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import StringField, TextAreaField, SelectField, IntegerField, BooleanField
@@ -107,20 +109,11 @@ def batch_delete(quiz_id):
         flash('No questions selected for deletion.', 'warning')
         return redirect(url_for('import_document.review_imported', quiz_id=quiz_id))
     
-    try:
-        # Delete the selected questions
-        deleted_count = 0
-        for question_id in selected_questions:
-            question = Question.query.get(question_id)
-            if question and question.quiz_id == quiz_id:
-                db.session.delete(question)
-                deleted_count += 1
-        
-        db.session.commit()
+    success, message, deleted_count = QuizService.delete_questions(quiz_id, current_user.id, selected_questions)
+    if success:
         flash(f'Successfully deleted {deleted_count} question(s).', 'success')
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error deleting questions: {str(e)}', 'danger')
+    else:
+        flash(f'Error deleting questions: {message}', 'danger')
     
     return redirect(url_for('import_document.review_imported', quiz_id=quiz_id))
 
@@ -139,45 +132,27 @@ def update_questions(quiz_id):
         flash('You do not have permission to manage this quiz.', 'danger')
         return redirect(url_for('dashboard.index'))
     
-    try:
-        updated_count = 0
-        # Process form data for individual question updates
-        for key, value in request.form.items():
-            if key.startswith('question_text_'):
-                question_id = key.split('_')[-1]
-                question = Question.query.get(question_id)
-                
-                if question and question.quiz_id == quiz_id:
-                    # Update question text
-                    question.question_text = value
-                    
-                    # Update points if provided
-                    points_key = f'points_{question_id}'
-                    if points_key in request.form:
-                        try:
-                            question.points = float(request.form[points_key])
-                        except ValueError:
-                            pass
-                    
-                    updated_count += 1
-        
-        # Handle batch updates for selected questions
-        selected_questions = request.form.getlist('selected_questions')
-        if selected_questions and ('question_text' in request.form or 'points' in request.form):
-            for question_id in selected_questions:
-                question = Question.query.get(question_id)
-                if question and question.quiz_id == quiz_id:
-                    # Update question properties if provided
-                    if 'question_text' in request.form:
-                        question.question_text = request.form['question_text']
-                    if 'points' in request.form:
-                        question.points = float(request.form['points'])
-                    updated_count += 1
-        
-        db.session.commit()
+    # Individual question updates
+    changes = {change['id']: change for change in form_question_changes(request.form)}
+    
+    # The same values applied to every selected question
+    selected_questions = request.form.getlist('selected_questions')
+    if selected_questions and ('question_text' in request.form or 'points' in request.form):
+        for question_id in selected_questions:
+            change = changes.setdefault(question_id, {'id': question_id})
+            if 'question_text' in request.form:
+                change['question_text'] = request.form['question_text']
+            if 'points' in request.form:
+                change['points'] = request.form['points']
+    
+    if not changes:
+        flash('No questions to update.', 'warning')
+        return redirect(url_for('import_document.review_imported', quiz_id=quiz_id))
+    
+    success, message, updated_count = QuizService.update_questions(quiz_id, current_user.id, list(changes.values()))
+    if success:
         flash(f'Successfully updated {updated_count} question(s).', 'success')
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error updating questions: {str(e)}', 'danger')
+    else:
+        flash(f'Error updating questions: {message}', 'danger')
     
     return redirect(url_for('import_document.review_imported', quiz_id=quiz_id))
\ No newline at end of file
@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -23,7 +24,10 @@ class Subject(db.Model):
     # Relationships
     teacher = db.relationship('User', backref='subjects_taught', foreign_keys=[teacher_id])
     enrolled_students = db.relationship('User', secondary='student_subjects', backref='enrolled_subjects')
-    quizzes = db.relationship('Quiz', backref='subject', lazy=True, cascade='all, delete-orphan')
+    all_quizzes = db.relationship('Quiz', backref='subject', lazy=True, cascade='all, delete-orphan')
+    # Quizzes that were not deleted; deleted ones are hidden until they are purged
+    quizzes = db.relationship('Quiz', lazy=True, viewonly=True,
+                              primaryjoin='and_(Subject.id == Quiz.subject_id, Quiz.deleted_at.is_(None))')
     announcements = db.relationship('Announcement', backref='subject', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
@@ -106,6 +110,7 @@ class Quiz(db.Model):
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
     duration = db.Column(db.Integer, nullable=True)  # Duration in minutes
     start_time = db.Column(db.DateTime, nullable=True)  # When the quiz becomes available
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)  # Set on delete; the rows are purged later
     
     # Relationships
     questions = db.relationship('Question', backref='quiz', lazy=True, order_by='Question.order_index', cascade='all, delete-orphan')
@@ -188,11 +193,38 @@ class QuizSubmission(db.Model):
     visible_to_students = db.Column(db.Boolean, nullable=False, default=False)
     show_answers = db.Column(db.Boolean, nullable=False, default=False)  # Control whether students can see correct answers
     feedback = db.Column(db.Text, nullable=True)
+    question_ids = db.Column(db.JSON, nullable=True)  # Questions drawn when the attempt started
     
     # Relationships
     question_submissions = db.relationship('StudentSubmission', backref='quiz_submission', lazy=True, cascade='all, delete-orphan')
     announcements = db.relationship('Announcement', backref='submission', lazy=True, cascade='all, delete-orphan')
     
+    @property
+    def questions(self):
+        """The questions this student was given, which may be fewer than the quiz has"""
+        if self.question_submissions:
+            return sorted((submission.question for submission in self.question_submissions),
+                          key=lambda question: question.order_index)
+        if self.question_ids is not None:
+            question_ids = set(self.question_ids)
+            return [question for question in self.quiz.questions if question.id in question_ids]
+        return self.quiz.questions
+    
+    @property
+    def max_score(self):
+        """The points this attempt is scored out of"""
+        return sum(question.points for question in self.questions)
+    
+    @staticmethod
+    def score_options():
+        """Loader options for listing submissions with their max_score
+        
+        The questions are read with a few queries for the whole list,
+        instead of lazily for every submission.
+        """
+        return (selectinload(QuizSubmission.question_submissions).joinedload(StudentSubmission.question),
+                joinedload(QuizSubmission.quiz).selectinload(Quiz.questions))
+    
     def __repr__(self):
         return f'<QuizSubmission {self.student_id}-{self.quiz_id}>' 
 
@@ -1,24 +1,65 @@
 """Routes for question module"""
-from flask import render_template, redirect, url_for, flash, request, Blueprint
+from flask import render_template, redirect, url_for, flash, request, Blueprint, jsonify
 from flask_login import login_required, current_user
-from app.models import Question, Quiz
+from app.models import Question, Quiz, Subject
 from app.question.forms import get_question_form, BaseQuestionForm
-from app.question.services import QuestionService
+from app.question.services import QuestionService, SEARCH_MAX_PER_PAGE
 import json
 import logging
 
 question_bp = Blueprint('question', __name__)
 
+def _search_args():
+    """Search query and filters from the request arguments"""
+    return {
+        'query': request.args.get('q', '').strip(),
+        'question_type': request.args.get('type') or None,
+        'quiz_id': request.args.get('quiz_id', type=int),
+        'subject_id': request.args.get('subject_id', type=int),
+        'page': max(request.args.get('page', 1, type=int), 1),
+        'per_page': min(max(request.args.get('per_page', 20, type=int), 1), SEARCH_MAX_PER_PAGE)
+    }
+
 @question_bp.route('/bank')
 @login_required
 def question_bank():
-    """View all questions created by the current teacher"""
+    """View and search the questions created by the current teacher"""
     if not current_user.is_teacher():
         flash('Only teachers can access the question bank.', 'danger')
         return redirect(url_for('dashboard.index'))
     
-    questions = QuestionService.get_questions_by_teacher(current_user.id)
-    return render_template('auth/question_bank.html', questions=questions, title='Question Bank')
+    search = _search_args()
+    questions, total = QuestionService.search_questions(current_user.id, **search)
+    pages = max((total + search['per_page'] - 1) // search['per_page'], 1)
+    quizzes = Quiz.query.filter_by(user_id=current_user.id, deleted_at=None).order_by(Quiz.title).all()
+    subjects = Subject.query.filter_by(teacher_id=current_user.id).order_by(Subject.name).all()
+    return render_template('auth/question_bank.html', questions=questions, total=total, pages=pages,
+                           search=search, quizzes=quizzes, subjects=subjects, title='Question Bank')
+
+@question_bp.route('/bank/search')
+@login_required
+def search_questions():
+    """Search the current teacher's question bank (JSON)"""
+    if not current_user.is_teacher():
+        return jsonify({'error': 'Only teachers can search the question bank.'}), 403
+    
+    search = _search_args()
+    questions, total = QuestionService.search_questions(current_user.id, **search)
+    return jsonify({
+        'results': [{
+            'id': question.id,
+            'question_text': question.question_text,
+            'question_type': question.question_type,
+            'options': question.options,
+            'points': question.points,
+            'quiz_id': question.quiz_id,
+            'created_at': question.created_at.isoformat()
+        } for question in questions],
+        'page': search['page'],
+        'per_page': search['per_page'],
+        'total': total,
+        'pages': (total + search['per_page'] - 1) // search['per_page']
+    })
 
 @question_bp.route('/create', methods=['GET', 'POST'])
 @login_required
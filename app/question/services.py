@@ -1,10 +1,41 @@
 """Service layer for question-related business logic"""
 from app.models import db, Question, Quiz, StudentSubmission
 from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from flask import current_app
 import json
 import logging
+import re
+
+# Full-text index over question_text and options. The owner column holds a
+# 'u<user_id>' token so a search only scores the searching teacher's questions.
+SEARCH_INDEX_SQL = [
+    """CREATE VIEW IF NOT EXISTS question_search_source AS
+       SELECT id, question_text, options, 'u' || user_id AS owner FROM question""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS question_fts USING fts5(
+       question_text, options, owner,
+       content='question_search_source', content_rowid='id',
+       tokenize='porter unicode61', prefix='2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS question_fts_insert AFTER INSERT ON question BEGIN
+       INSERT INTO question_fts(rowid, question_text, options, owner)
+       VALUES (new.id, new.question_text, new.options, 'u' || new.user_id);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS question_fts_delete AFTER DELETE ON question BEGIN
+       INSERT INTO question_fts(question_fts, rowid, question_text, options, owner)
+       VALUES ('delete', old.id, old.question_text, old.options, 'u' || old.user_id);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS question_fts_update
+       AFTER UPDATE OF question_text, options, user_id ON question BEGIN
+       INSERT INTO question_fts(question_fts, rowid, question_text, options, owner)
+       VALUES ('delete', old.id, old.question_text, old.options, 'u' || old.user_id);
+       INSERT INTO question_fts(rowid, question_text, options, owner)
+       VALUES (new.id, new.question_text, new.options, 'u' || new.user_id);
+       END""",
+]
+
+SEARCH_MAX_TERMS = 8
+SEARCH_MAX_PER_PAGE = 100
 
 class QuestionService:
     """Service class for question-related operations"""
@@ -219,4 +250,132 @@ class QuestionService:
             return is_correct, points_earned, feedback
         except Exception as e:
             current_app.logger.error(f"Error validating answer for question {question_id}: {str(e)}")
-            return False, 0, f"An error occurred while validating the answer: {str(e)}"
\ No newline at end of file
+            return False, 0, f"An error occurred while validating the answer: {str(e)}"
+    
+    @staticmethod
+    def ensure_search_index() -> bool:
+        """Create the question full-text index and its sync triggers if missing
+        
+        Only SQLite with FTS5 is supported; on other databases search falls
+        back to LIKE matching. A newly created index is filled from the
+        existing questions.
+        
+        Returns:
+            True if the index is available
+        """
+        if db.engine.dialect.name != 'sqlite':
+            return False
+        try:
+            existed = QuestionService._search_index_exists()
+            for statement in SEARCH_INDEX_SQL:
+                db.session.execute(text(statement))
+            if not existed:
+                db.session.execute(text("INSERT INTO question_fts(question_fts) VALUES ('rebuild')"))
+            db.session.commit()
+            return True
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error creating question search index: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _search_index_exists() -> bool:
+        if db.engine.dialect.name != 'sqlite':
+            return False
+        return db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'question_fts'"
+        )).first() is not None
+    
+    @staticmethod
+    def _search_terms(query: str) -> List[str]:
+        # Words only, so user input can never be read as FTS5 query syntax
+        return re.findall(r'\w+', (query or '').lower())[:SEARCH_MAX_TERMS]
+    
+    @staticmethod
+    def search_questions(user_id: int, query: str = '', question_type: Optional[str] = None,
+                         quiz_id: Optional[int] = None, subject_id: Optional[int] = None,
+                         page: int = 1, per_page: int = 20) -> Tuple[List[Question], int]:
+        """Search a teacher's question bank
+        
+        Every word of the query must appear in the question text or options;
+        words of two or more characters also match as prefixes. Results are
+        ranked by bm25 with question text weighted above options. Without a
+        query the filtered questions are returned newest first.
+        
+        Args:
+            user_id: The ID of the teacher whose questions are searched
+            query: The search text
+            question_type: Optional question type to filter by
+            quiz_id: Optional quiz to filter by
+            subject_id: Optional subject (of the question's quiz) to filter by
+            page: The 1-based page number
+            per_page: Results per page, at most SEARCH_MAX_PER_PAGE
+            
+        Returns:
+            Tuple containing (questions on the page, total number of matches)
+        """
+        page = max(page, 1)
+        per_page = min(max(per_page, 1), SEARCH_MAX_PER_PAGE)
+        terms = QuestionService._search_terms(query)
+        try:
+            if terms and QuestionService._search_index_exists():
+                return QuestionService._search_fts(user_id, terms, question_type, quiz_id,
+                                                   subject_id, page, per_page)
+            
+            search = Question.query.filter(Question.user_id == user_id)
+            for term in terms:
+                search = search.filter(db.or_(Question.question_text.ilike(f'%{term}%'),
+                                              db.cast(Question.options, db.String).ilike(f'%{term}%')))
+            if question_type:
+                search = search.filter(Question.question_type == question_type)
+            if quiz_id:
+                search = search.filter(Question.quiz_id == quiz_id)
+            if subject_id:
+                search = search.join(Quiz, Quiz.id == Question.quiz_id).filter(Quiz.subject_id == subject_id)
+            total = search.count()
+            questions = (search.order_by(Question.created_at.desc(), Question.id.desc())
+                         .limit(per_page).offset((page - 1) * per_page).all())
+            return questions, total
+        except SQLAlchemyError as e:
+            current_app.logger.error(f"Error searching questions for teacher {user_id}: {str(e)}")
+            return [], 0
+    
+    @staticmethod
+    def _search_fts(user_id: int, terms: List[str], question_type: Optional[str],
+                    quiz_id: Optional[int], subject_id: Optional[int],
+                    page: int, per_page: int) -> Tuple[List[Question], int]:
+        phrases = ' '.join(f'"{term}"*' if len(term) > 1 else f'"{term}"' for term in terms)
+        params = {
+            'match': f'owner:u{int(user_id)} AND {{question_text options}}: ({phrases})',
+            'user_id': user_id,
+            'limit': per_page,
+            'offset': (page - 1) * per_page
+        }
+        # CROSS JOIN keeps the full-text match as the outer loop; otherwise SQLite
+        # may drive the join from the question table and probe the index per row
+        joins = 'CROSS JOIN question ON question.id = question_fts.rowid'
+        conditions = ['question_fts MATCH :match', 'question.user_id = :user_id']
+        if question_type:
+            conditions.append('question.question_type = :question_type')
+            params['question_type'] = question_type
+        if quiz_id:
+            conditions.append('question.quiz_id = :quiz_id')
+            params['quiz_id'] = quiz_id
+        if subject_id:
+            joins += ' CROSS JOIN quiz ON quiz.id = question.quiz_id'
+            conditions.append('quiz.subject_id = :subject_id')
+            params['subject_id'] = subject_id
+        where = ' AND '.join(conditions)
+        
+        total = db.session.execute(
+            text(f'SELECT count(*) FROM question_fts {joins} WHERE {where}'), params
+        ).scalar()
+        ids = [row[0] for row in db.session.execute(text(
+            f'SELECT question.id FROM question_fts {joins} WHERE {where} '
+            'ORDER BY bm25(question_fts, 2.0, 1.0, 0.0), question.id '
+            'LIMIT :limit OFFSET :offset'
+        ), params)]
+        if not ids:
+            return [], total
+        by_id = {question.id: question for question in Question.query.filter(Question.id.in_(ids))}
+        return [by_id[question_id] for question_id in ids if question_id in by_id], total
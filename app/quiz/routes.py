@@ -23,7 +23,7 @@ def review_submissions(quiz_id):
         return redirect(url_for('dashboard.index'))
     
     # Get the quiz and verify ownership
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     if quiz.user_id != current_user.id:
         flash('You do not have permission to review this quiz.', 'danger')
         return redirect(url_for('dashboard.index'))
@@ -1,12 +1,22 @@
 """Service layer for quiz-related business logic"""
 from app.models import db, Quiz, Question, Subject, Announcement, QuizSubmission, StudentSubmission
 from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy import insert, update, delete, select, func, case
 from sqlalchemy.exc import SQLAlchemyError
 from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import os
+import time
 import json
 import logging
 
+# Deleted quizzes are purged in chunks of this many rows, one short transaction each
+PURGE_CHUNK_SIZE = int(os.environ.get('QUIZ_PURGE_CHUNK_SIZE', 500))
+PURGE_PAUSE_SECONDS = float(os.environ.get('QUIZ_PURGE_PAUSE_SECONDS', 0.05))
+
+_purge_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quiz-purge')
+
 class QuizService:
     """Service class for quiz-related operations"""
     
@@ -21,7 +31,7 @@ class QuizService:
             Quiz object or None if not found
         """
         try:
-            return Quiz.query.get(quiz_id)
+            return Quiz.query.filter_by(id=quiz_id, deleted_at=None).first()
         except Exception as e:
             current_app.logger.error(f"Error retrieving quiz {quiz_id}: {str(e)}")
             return None
@@ -77,6 +87,8 @@ class QuizService:
             current_app.logger.error(f"Error creating quiz: {str(e)}")
             return False, f"An error occurred while creating the {quiz_type}: {str(e)}", None
     
+    QUESTION_TYPES = ('multiple_choice', 'identification', 'true_false', 'essay')
+    
     @staticmethod
     def add_question(quiz_id: int, question_text: str, question_type: str, options: Optional[List[str]],
                     correct_answer: str, points: float, order_index: int, word_limit: Optional[int] = None) -> Tuple[bool, str, Optional[Question]]:
@@ -95,35 +107,242 @@ class QuizService:
         Returns:
             Tuple containing (success, message, question_object)
         """
+        success, message, questions = QuizService.add_questions(quiz_id, [{
+            'question_text': question_text,
+            'question_type': question_type,
+            'options': options,
+            'correct_answer': correct_answer,
+            'points': points,
+            'word_limit': word_limit
+        }], start_index=order_index)
+        if not success:
+            return False, message, None
+        return True, "Question added successfully!", questions[0]
+    
+    @staticmethod
+    def add_questions(quiz_id: int, questions_data: List[Dict[str, Any]],
+                      start_index: Optional[int] = None) -> Tuple[bool, str, List[Question]]:
+        """Validate a list of questions and add them to a quiz in one statement and one transaction
+        
+        Args:
+            quiz_id: The ID of the quiz
+            questions_data: Dictionaries with question_text, question_type, options,
+                correct_answer, points and word_limit
+            start_index: Order index of the first question; defaults to after the
+                quiz's last question
+            
+        Returns:
+            Tuple containing (success, message, question_objects)
+        """
         try:
             quiz = Quiz.query.get(quiz_id)
             if not quiz:
-                return False, "Quiz not found", None
-            
-            # Process options for multiple choice questions
-            options_json = None
-            if question_type == 'multiple_choice' and options:
-                options_json = json.dumps(options)
-            
-            question = Question(
-                question_text=question_text,
-                question_type=question_type,
-                options=options_json,
-                correct_answer=correct_answer,
-                points=points,
-                order_index=order_index,
-                word_limit=word_limit,
-                user_id=quiz.user_id,
-                quiz_id=quiz_id
+                return False, "Quiz not found", []
+            
+            # Validate the whole list before inserting anything
+            rows = []
+            errors = []
+            for position, data in enumerate(questions_data, 1):
+                question_text = (data.get('question_text') or '').strip()
+                question_type = data.get('question_type')
+                options = data.get('options')
+                if not question_text or len(question_text) > 500:
+                    errors.append(f"Question {position}: question text must be 1-500 characters")
+                elif question_type not in QuizService.QUESTION_TYPES:
+                    errors.append(f"Question {position}: unknown question type {question_type}")
+                elif data.get('correct_answer') is None:
+                    errors.append(f"Question {position}: a correct answer is required")
+                elif question_type == 'multiple_choice' and (not options or len(options) < 2):
+                    errors.append(f"Question {position}: multiple choice questions need at least 2 options")
+                else:
+                    rows.append({
+                        'question_text': question_text,
+                        'question_type': question_type,
+                        # Options are stored as a JSON string for multiple choice questions
+                        'options': json.dumps(options) if question_type == 'multiple_choice' else None,
+                        'correct_answer': data['correct_answer'],
+                        'points': data.get('points') or 1.0,
+                        'word_limit': data.get('word_limit'),
+                        'user_id': quiz.user_id,
+                        'quiz_id': quiz_id
+                    })
+            if errors:
+                return False, '; '.join(errors), []
+            if not rows:
+                return False, "No questions to add", []
+            
+            if start_index is None:
+                last_index = db.session.query(func.max(Question.order_index)).filter(Question.quiz_id == quiz_id).scalar()
+                start_index = 0 if last_index is None else last_index + 1
+            for offset, row in enumerate(rows):
+                row['order_index'] = start_index + offset
+            
+            questions = db.session.scalars(insert(Question).returning(Question), rows).all()
+            db.session.commit()
+            
+            return True, f"{len(questions)} question(s) added successfully!", questions
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error adding questions: {str(e)}")
+            return False, f"An error occurred while adding the questions: {str(e)}", []
+    
+    @staticmethod
+    def _owned_question_types(quiz_id: int, user_id: int, question_ids: Optional[List[int]] = None) -> Dict[int, str]:
+        """Question types by ID for questions of a quiz owned by user_id, read with one SELECT"""
+        query = select(Question.id, Question.question_type).join(Quiz, Quiz.id == Question.quiz_id).where(
+            Quiz.id == quiz_id, Quiz.user_id == user_id)
+        if question_ids is not None:
+            query = query.where(Question.id.in_(question_ids))
+        return dict(db.session.execute(query).all())
+    
+    @staticmethod
+    def _question_ids(values) -> Optional[List[int]]:
+        try:
+            ids = [int(value) for value in values]
+        except (TypeError, ValueError):
+            return None
+        return ids if len(set(ids)) == len(ids) else None
+    
+    @staticmethod
+    def update_questions(quiz_id: int, user_id: int, changes: List[Dict[str, Any]]) -> Tuple[bool, str, int]:
+        """Edit many questions of a quiz with one ownership check and one bulk UPDATE
+        
+        Args:
+            quiz_id: The ID of the quiz
+            user_id: The teacher making the change; must own the quiz
+            changes: Dictionaries with the question 'id' and any of question_text,
+                points, correct_answer, options and word_limit
+            
+        Returns:
+            Tuple containing (success, message, number of questions updated)
+        """
+        if not isinstance(changes, list) or not changes or not all(isinstance(c, dict) for c in changes):
+            return False, "No question changes given", 0
+        ids = QuizService._question_ids(change.get('id') for change in changes)
+        if ids is None:
+            return False, "Every change needs a distinct question id", 0
+        
+        try:
+            types = QuizService._owned_question_types(quiz_id, user_id, ids)
+            missing = [question_id for question_id in ids if question_id not in types]
+            if missing:
+                return False, f"Question(s) not found in this quiz: {', '.join(map(str, missing))}", 0
+            
+            rows = []
+            errors = []
+            for question_id, change in zip(ids, changes):
+                row = {'id': question_id}
+                if 'question_text' in change:
+                    question_text = (change['question_text'] or '').strip()
+                    if not question_text or len(question_text) > 500:
+                        errors.append(f"Question {question_id}: question text must be 1-500 characters")
+                    row['question_text'] = question_text
+                if 'points' in change:
+                    try:
+                        row['points'] = float(change['points'])
+                    except (TypeError, ValueError):
+                        row['points'] = 0
+                    if row['points'] <= 0:
+                        errors.append(f"Question {question_id}: points must be a positive number")
+                if 'correct_answer' in change:
+                    if change['correct_answer'] is None:
+                        errors.append(f"Question {question_id}: a correct answer is required")
+                    row['correct_answer'] = str(change['correct_answer'])
+                if 'options' in change:
+                    options = change['options']
+                    if types[question_id] != 'multiple_choice':
+                        errors.append(f"Question {question_id}: only multiple choice questions have options")
+                    elif not isinstance(options, list) or len(options) < 2:
+                        errors.append(f"Question {question_id}: multiple choice questions need at least 2 options")
+                    else:
+                        row['options'] = json.dumps(options)
+                if 'word_limit' in change:
+                    try:
+                        row['word_limit'] = int(change['word_limit']) if change['word_limit'] is not None else None
+                    except (TypeError, ValueError):
+                        errors.append(f"Question {question_id}: word limit must be a whole number")
+                if len(row) == 1:
+                    errors.append(f"Question {question_id}: nothing to change")
+                rows.append(row)
+            if errors:
+                return False, '; '.join(errors), 0
+            
+            # UPDATE ... WHERE id = ? executed for all rows at once
+            db.session.execute(update(Question), rows)
+            db.session.commit()
+            return True, f"{len(rows)} question(s) updated successfully!", len(rows)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error updating questions of quiz {quiz_id}: {str(e)}")
+            return False, f"An error occurred while updating the questions: {str(e)}", 0
+    
+    @staticmethod
+    def reorder_questions(quiz_id: int, user_id: int, question_ids: List[int]) -> Tuple[bool, str]:
+        """Rewrite order_index for a whole quiz with one UPDATE
+        
+        Args:
+            quiz_id: The ID of the quiz
+            user_id: The teacher making the change; must own the quiz
+            question_ids: Every question ID of the quiz, in the new order
+            
+        Returns:
+            Tuple containing (success, message)
+        """
+        ids = QuizService._question_ids(question_ids or [])
+        if not ids:
+            return False, "The new order must list each question once"
+        
+        try:
+            existing = QuizService._owned_question_types(quiz_id, user_id)
+            if set(ids) != set(existing):
+                return False, "The new order must list every question of the quiz exactly once"
+            
+            db.session.execute(
+                update(Question)
+                .where(Question.quiz_id == quiz_id)
+                .values(order_index=case({question_id: index for index, question_id in enumerate(ids)},
+                                         value=Question.id))
+                .execution_options(synchronize_session=False)
             )
-            db.session.add(question)
             db.session.commit()
+            return True, f"{len(ids)} question(s) reordered successfully!"
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error reordering questions of quiz {quiz_id}: {str(e)}")
+            return False, f"An error occurred while reordering the questions: {str(e)}"
+    
+    @staticmethod
+    def delete_questions(quiz_id: int, user_id: int, question_ids: List[int]) -> Tuple[bool, str, int]:
+        """Delete a selection of a quiz's questions and their answers with set-based DELETEs
+        
+        Args:
+            quiz_id: The ID of the quiz
+            user_id: The teacher making the change; must own the quiz
+            question_ids: The questions to delete
             
-            return True, "Question added successfully!", question
+        Returns:
+            Tuple containing (success, message, number of questions deleted)
+        """
+        ids = QuizService._question_ids(question_ids or [])
+        if not ids:
+            return False, "No questions selected for deletion", 0
+        
+        try:
+            existing = QuizService._owned_question_types(quiz_id, user_id, ids)
+            missing = [question_id for question_id in ids if question_id not in existing]
+            if missing:
+                return False, f"Question(s) not found in this quiz: {', '.join(map(str, missing))}", 0
+            
+            db.session.execute(delete(StudentSubmission).where(StudentSubmission.question_id.in_(ids))
+                               .execution_options(synchronize_session=False))
+            db.session.execute(delete(Question).where(Question.id.in_(ids))
+                               .execution_options(synchronize_session=False))
+            db.session.commit()
+            return True, f"{len(ids)} question(s) deleted successfully!", len(ids)
         except Exception as e:
             db.session.rollback()
-            current_app.logger.error(f"Error adding question: {str(e)}")
-            return False, f"An error occurred while adding the question: {str(e)}", None
+            current_app.logger.error(f"Error deleting questions of quiz {quiz_id}: {str(e)}")
+            return False, f"An error occurred while deleting the questions: {str(e)}", 0
     
     @staticmethod
     def get_quizzes_by_subject(subject_id: int) -> List[Quiz]:
@@ -136,7 +355,7 @@ class QuizService:
             List of Quiz objects
         """
         try:
-            return Quiz.query.filter_by(subject_id=subject_id).order_by(Quiz.created_at.desc()).all()
+            return Quiz.query.filter_by(subject_id=subject_id, deleted_at=None).order_by(Quiz.created_at.desc()).all()
         except Exception as e:
             current_app.logger.error(f"Error retrieving quizzes for subject {subject_id}: {str(e)}")
             return []
@@ -152,7 +371,7 @@ class QuizService:
             List of Quiz objects
         """
         try:
-            return Quiz.query.filter_by(user_id=teacher_id).order_by(Quiz.created_at.desc()).all()
+            return Quiz.query.filter_by(user_id=teacher_id, deleted_at=None).order_by(Quiz.created_at.desc()).all()
         except Exception as e:
             current_app.logger.error(f"Error retrieving quizzes for teacher {teacher_id}: {str(e)}")
             return []
@@ -168,45 +387,102 @@ class QuizService:
             List of QuizSubmission objects
         """
         try:
-            return QuizSubmission.query.filter_by(quiz_id=quiz_id).order_by(QuizSubmission.submitted_at.desc()).all()
+            return QuizSubmission.query.filter_by(quiz_id=quiz_id).options(
+                *QuizSubmission.score_options()).order_by(QuizSubmission.submitted_at.desc()).all()
         except Exception as e:
             current_app.logger.error(f"Error retrieving submissions for quiz {quiz_id}: {str(e)}")
             return []
     
     @staticmethod
-    def delete_quiz(quiz_id: int) -> Tuple[bool, str]:
+    def delete_quiz(quiz_id: int, purge: bool = True) -> Tuple[bool, str]:
         """Delete a quiz
         
+        The quiz is only marked as deleted, which hides it at once; its
+        submissions and questions are purged afterwards in the background.
+        
         Args:
             quiz_id: The ID of the quiz
+            purge: Queue the background purge
             
         Returns:
             Tuple containing (success, message)
         """
         try:
-            quiz = Quiz.query.get(quiz_id)
+            quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first()
             if not quiz:
                 return False, "Quiz not found"
             
-            # Delete related announcements
-            Announcement.query.filter_by(quiz_id=quiz_id).delete()
+            quiz.deleted_at = datetime.utcnow()
             
-            # Delete related submissions
-            submissions = QuizSubmission.query.filter_by(quiz_id=quiz_id).all()
-            for submission in submissions:
-                StudentSubmission.query.filter_by(quiz_submission_id=submission.id).delete()
-            
-            QuizSubmission.query.filter_by(quiz_id=quiz_id).delete()
-            
-            # Delete related questions
-            Question.query.filter_by(quiz_id=quiz_id).delete()
-            
-            # Delete the quiz
-            db.session.delete(quiz)
+            # Announcements go right away so students stop seeing the quiz
+            db.session.execute(delete(Announcement).where(Announcement.quiz_id == quiz_id)
+                               .execution_options(synchronize_session=False))
             db.session.commit()
-            
-            return True, "Quiz deleted successfully!"
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error deleting quiz {quiz_id}: {str(e)}")
-            return False, f"An error occurred while deleting the quiz: {str(e)}"
\ No newline at end of file
+            return False, f"An error occurred while deleting the quiz: {str(e)}"
+        
+        if purge:
+            _purge_executor.submit(QuizService._run_purge, current_app._get_current_object(), quiz_id)
+        return True, "Quiz deleted successfully!"
+    
+    @staticmethod
+    def _run_purge(app, quiz_id: int) -> None:
+        with app.app_context():
+            try:
+                QuizService.purge_quiz(quiz_id)
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Error purging deleted quiz {quiz_id}: {str(e)}")
+            finally:
+                db.session.remove()
+    
+    @staticmethod
+    def _delete_in_chunks(model, ids_query, chunk_size: int, pause: float) -> int:
+        removed = 0
+        while True:
+            ids = db.session.scalars(ids_query.limit(chunk_size)).all()
+            if not ids:
+                return removed
+            db.session.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+            db.session.commit()
+            removed += len(ids)
+            if pause:
+                time.sleep(pause)
+    
+    @staticmethod
+    def purge_quiz(quiz_id: int, chunk_size: int = PURGE_CHUNK_SIZE, pause: float = PURGE_PAUSE_SECONDS) -> int:
+        """Remove a deleted quiz and everything that belongs to it
+        
+        Rows are deleted chunk_size at a time, each chunk in its own short
+        transaction, so other writers are never blocked for long.
+        
+        Args:
+            quiz_id: The ID of the quiz; quizzes not marked as deleted are left alone
+            chunk_size: Rows deleted per transaction
+            pause: Seconds to wait between transactions
+            
+        Returns:
+            Number of rows removed
+        """
+        quiz = db.session.get(Quiz, quiz_id)
+        if not quiz or quiz.deleted_at is None:
+            return 0
+        db.session.rollback()
+        
+        question_ids = select(Question.id).where(Question.quiz_id == quiz_id)
+        submission_ids = select(QuizSubmission.id).where(QuizSubmission.quiz_id == quiz_id)
+        answer_ids = select(StudentSubmission.id).where(
+            StudentSubmission.question_id.in_(question_ids) |
+            StudentSubmission.quiz_submission_id.in_(submission_ids))
+        
+        removed = 0
+        for model, ids_query in ((StudentSubmission, answer_ids), (QuizSubmission, submission_ids),
+                                 (Question, question_ids),
+                                 (Announcement, select(Announcement.id).where(Announcement.quiz_id == quiz_id))):
+            removed += QuizService._delete_in_chunks(model, ids_query, chunk_size, pause)
+        
+        db.session.execute(delete(Quiz).where(Quiz.id == quiz_id).execution_options(synchronize_session=False))
+        db.session.commit()
+        return removed + 1
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""Benchmark: setting up the accounts of a roster import
+
+    python benchmarks/bench_account_setup.py --rows 5000 --sample 100
+
+Imports --rows new students with activation codes, and measures hashing
+the default password serially and in the process pool on --sample
+accounts, projecting the time for --rows.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+from flask import Flask
+from models import db, User, Subject
+from roster_import import import_roster, hash_passwords, HASH_WORKERS, DEFAULT_PASSWORD
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--sample', type=int, default=100, help='Accounts hashed to project the password setup')
+    parser.add_argument('--workers', type=int, default=HASH_WORKERS)
+    args = parser.parse_args()
+
+    for name, workers in (('serial hash', 1), (f'pool of {args.workers}', args.workers)):
+        start = time.perf_counter()
+        hash_passwords([DEFAULT_PASSWORD] * args.sample, workers=workers)
+        per_account = (time.perf_counter() - start) / args.sample
+        print(f"password, {name:12} {per_account * 1000:6.1f} ms/account, "
+              f"{per_account * args.rows:7.1f} s projected for {args.rows} rows")
+
+    roster = pd.DataFrame({
+        'Full Name': [f'Student {i}' for i in range(args.rows)],
+        'Course and Year': 'BSCS 1',
+        'Student Email': [f'student.{i}@spist.edu' for i in range(args.rows)],
+        'Subject Code': 'CS101',
+    })
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config.update({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'bench.db'),
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            teacher = User(username='teacher', email='teacher@example.com', role='teacher', password_hash='x')
+            db.session.add(teacher)
+            db.session.commit()
+            subject = Subject(name='Programming', subject_code='CS101', teacher_id=teacher.id)
+            db.session.add(subject)
+            db.session.commit()
+
+            start = time.perf_counter()
+            result = import_roster(roster, subject, account_setup='activation')
+            elapsed = time.perf_counter() - start
+            print(f"activation codes           {elapsed:7.2f} s for {args.rows} rows ({result.created} accounts)")
+
+
+if __name__ == '__main__':
+    main()
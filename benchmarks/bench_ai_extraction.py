@@ -0,0 +1,52 @@
+"""Benchmark: chunked AI question extraction, one call at a time vs. concurrent calls
+
+Runs against the local completion stub, whose latency grows with the
+length of the document text like a real completion does.
+
+    python benchmarks/bench_ai_extraction.py --questions 600 --concurrency 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai_stub import start_completion_stub
+from synthetic_documents import generate_question_lines
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=600)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--latency-per-kchar', type=float, default=0.05)
+    args = parser.parse_args()
+
+    server, api_base = start_completion_stub(latency=args.latency, latency_per_kchar=args.latency_per_kchar)
+    os.environ['OPENAI_API_KEY'] = 'bench'
+    os.environ['OPENAI_API_BASE'] = api_base
+    from document_processor import DocumentProcessor
+
+    text = '\n'.join(generate_question_lines(args.questions))
+    processor = DocumentProcessor(use_cache=False)
+    chunks = processor._split_text_for_ai(text)
+
+    timings = {}
+    for concurrency in (1, args.concurrency):
+        processor.AI_MAX_CONCURRENCY = concurrency
+        start = time.perf_counter()
+        questions, error = processor._extract_questions_with_ai(text)
+        timings[concurrency] = time.perf_counter() - start
+        assert error is None and len(questions) == args.questions
+    server.shutdown()
+
+    print(f"{args.questions} questions, {len(text)} characters, {len(chunks)} chunks")
+    print(f"one call at a time:  {timings[1]:.2f}s")
+    print(f"{args.concurrency} concurrent calls: {timings[args.concurrency]:.2f}s "
+          f"({timings[1] / timings[args.concurrency]:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
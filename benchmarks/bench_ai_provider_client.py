@@ -0,0 +1,46 @@
+"""Benchmark: one blocking requests.post per essay vs. the pooled concurrent provider client
+
+    python benchmarks/bench_ai_provider_client.py --essays 100 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import time
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_provider_client import ProviderClient, get_provider
+from ai_provider_stub import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--essays', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    texts = [f'Essay {i}: ' + 'the quick brown fox jumps over the lazy dog. ' * 40 for i in range(args.essays)]
+    provider = get_provider('gptzero', base_url)
+
+    start = time.perf_counter()
+    for text in texts:
+        requests.post(provider.url, headers=provider.build_headers('bench'), json=provider.build_payload(text))
+    sequential = time.perf_counter() - start
+
+    client = ProviderClient(provider, 'bench', max_concurrency=args.concurrency)
+    start = time.perf_counter()
+    client.detect_many(texts)
+    pooled = time.perf_counter() - start
+    client.close()
+    server.shutdown()
+
+    print(f"{args.essays} essays, {args.latency * 1000:.0f} ms provider latency")
+    print(f"  sequential requests.post : {sequential:7.2f} s")
+    print(f"  pooled, {args.concurrency} concurrent    : {pooled:7.2f} s  ({sequential / pooled:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
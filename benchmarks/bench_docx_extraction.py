@@ -0,0 +1,96 @@
+"""Benchmark: python-docx object model vs. streaming DOCX text extraction
+
+    python benchmarks/bench_docx_extraction.py --repeat 300
+
+The questionnaire_*.docx samples in the repository root are plain text
+saved with a .docx extension, so their text is written into real .docx
+files, repeated --repeat times with an answer-key table after each copy.
+Each extractor runs in a fresh process so its peak memory can be measured.
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_documents import write_text_docx
+
+
+def legacy_extract_text(file_path):
+    """The python-docx extraction as it was before streaming, kept as the baseline"""
+    import docx
+    doc = docx.Document(file_path)
+    paragraphs = [para.text for para in doc.paragraphs]
+    table_text = []
+    for table in doc.tables:
+        for row in table.rows:
+            table_text.append(' | '.join(cell.text for cell in row.cells))
+    return '\n'.join(paragraphs + table_text)
+
+
+def streaming_extract_text(file_path):
+    from document_processor import DocumentProcessor
+    return DocumentProcessor()._extract_text_from_docx(file_path)
+
+
+def measure(name, file_path):
+    """Run one extractor; returns (seconds, peak memory growth in MB, sorted lines)"""
+    extract = legacy_extract_text if name == 'python-docx' else streaming_extract_text
+    if name != 'python-docx':
+        import document_processor  # Import cost is not part of the measurement
+    else:
+        import docx
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    text = extract(file_path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    # The extractors order tables differently, so compare the lines as a multiset
+    return elapsed, peak / 1024, sorted(text.split('\n'))
+
+
+def build_document(path, repeat):
+    texts = []
+    for sample in sorted(glob.glob(os.path.join(ROOT, 'questionnaire_*.docx'))):
+        with open(sample, encoding='utf-8') as file:
+            texts.append(file.read().splitlines())
+    blocks = []
+    for copy in range(repeat):
+        for lines in texts:
+            blocks.extend(lines)
+        blocks.append([['Question', 'Answer']] + [[f'{copy}.{row}', 'B'] for row in range(1, 6)])
+    write_text_docx(path, blocks)
+    return len(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=300)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'questionnaires.docx')
+        blocks = build_document(path, args.repeat)
+        print(f"{blocks} blocks, {os.path.getsize(path) / 1024:.0f} KB")
+
+        results = {}
+        for name in ('python-docx', 'streaming'):
+            with context.Pool(1) as pool:
+                results[name] = pool.apply(measure, (name, path))
+
+    legacy_time, legacy_memory, legacy_lines = results['python-docx']
+    stream_time, stream_memory, stream_lines = results['streaming']
+    assert stream_lines == legacy_lines
+    print(f"python-docx: {legacy_time:.2f}s, +{legacy_memory:.0f} MB peak")
+    print(f"streaming:   {stream_time:.2f}s, +{stream_memory:.0f} MB peak ({legacy_time / stream_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
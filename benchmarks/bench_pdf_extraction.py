@@ -0,0 +1,43 @@
+"""Benchmark: sequential vs. process-pool PDF page extraction
+
+    python benchmarks/bench_pdf_extraction.py --pages 400 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_processor import DocumentProcessor
+from synthetic_documents import write_question_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'exam.pdf')
+        write_question_pdf(path, args.pages)
+        processor = DocumentProcessor(max_workers=args.workers)
+
+        start = time.perf_counter()
+        sequential = [text for _, _, text in processor._iter_pdf_pages(path, parallel=False)]
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel = [text for _, _, text in processor._iter_pdf_pages(path, parallel=True)]
+        parallel_time = time.perf_counter() - start
+
+    assert parallel == sequential
+    print(f"{args.pages} pages, {args.workers} workers")
+    print(f"sequential: {sequential_time:.2f}s")
+    print(f"parallel:   {parallel_time:.2f}s ({sequential_time / parallel_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""Benchmark: the previous two-regex line parser vs. the single-pass state-machine parser
+
+    python benchmarks/bench_question_parser.py --questions 10000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_processor import DocumentProcessor
+from synthetic_documents import generate_question_document
+
+
+class LegacyParser(DocumentProcessor):
+    """The regex parser as it was before the state machine, kept as the baseline"""
+
+    def _parse_text_for_questions(self, text: str) -> List[Dict[str, Any]]:
+        """Parse the extracted text to identify questions
+
+        Args:
+            text: The text to parse
+
+        Returns:
+            List[Dict]: A list of dictionaries containing question data
+        """
+        questions = []
+
+        # Split the text into lines
+        lines = text.split('\n')
+
+        # Initialize variables
+        current_question = None
+        current_options = []
+        question_number = 0
+
+        # Regular expressions for identifying questions and options
+        question_pattern = re.compile(r'^\s*(?:\d+\.?|[Qq]uestion\s*\d*:?|[Qq]:?)\s*(.+)$')
+        option_pattern = re.compile(r'^\s*([A-Za-z])\s*[.)]\s*(.+)$')
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            # Check if this line is a question
+            question_match = question_pattern.match(line)
+            if question_match:
+                # If we were processing a previous question, add it to the list
+                if current_question:
+                    self._add_question_to_list(questions, current_question, current_options)
+
+                # Start a new question
+                question_number += 1
+                current_question = question_match.group(1).strip()
+                current_options = []
+                continue
+
+            # Check if this line is an option
+            option_match = option_pattern.match(line)
+            if option_match and current_question:
+                option_text = option_match.group(2).strip()
+                current_options.append(option_text)
+                continue
+
+            # If we're in a question but this line isn't an option, it might be part of the question
+            if current_question:
+                # Check if this line indicates the correct answer
+                if line.lower().startswith(('answer:', 'correct:', 'correct answer:')):
+                    # Process the correct answer
+                    answer_text = line.split(':', 1)[1].strip()
+                    self._process_correct_answer(questions, current_question, current_options, answer_text)
+
+                    # Reset for the next question
+                    current_question = None
+                    current_options = []
+                    continue
+
+        # Add the last question if there is one
+        if current_question:
+            self._add_question_to_list(questions, current_question, current_options)
+
+        return questions
+
+    def _add_question_to_list(self, questions: List[Dict[str, Any]], question_text: str, options: List[str]) -> None:
+        """Add a question to the list of questions
+
+        Args:
+            questions: The list to add the question to
+            question_text: The text of the question
+            options: The list of options for the question
+        """
+        # Determine question type based on options
+        if len(options) >= 2:
+            # Check if it's a true/false question
+            if len(options) == 2 and (
+                (options[0].lower() in ['true', 't'] and options[1].lower() in ['false', 'f']) or
+                (options[0].lower() in ['false', 'f'] and options[1].lower() in ['true', 't'])
+            ):
+                question_type = 'true_false'
+                correct_answer = '0' if options[0].lower() in ['true', 't'] else '1'
+            else:
+                question_type = 'multiple_choice'
+                # Default to first option as correct (will be updated later if specified)
+                correct_answer = '0'
+        elif question_text.lower().endswith('true or false?') or question_text.lower().endswith('true or false.'):
+            # True/False without options
+            question_type = 'true_false'
+            correct_answer = 'true'  # Default to true
+        elif '___' in question_text or '...' in question_text or '_____' in question_text:
+            # Identification/Fill-in-the-blank
+            question_type = 'identification'
+            correct_answer = ''
+        else:
+            # Default to identification if no options
+            question_type = 'identification'
+            correct_answer = ''
+
+        # Create the question dictionary
+        question = {
+            'question_text': question_text,
+            'question_type': question_type,
+            'options': options if options and question_type == 'multiple_choice' else None,
+            'correct_answer': correct_answer,
+            'points': 1.0  # Default points
+        }
+
+        # Add word limit for essay questions
+        if question_type == 'essay':
+            question['word_limit'] = 500
+
+        questions.append(question)
+
+    def _process_correct_answer(self, questions: List[Dict[str, Any]], question_text: str,
+                               options: List[str], answer_text: str) -> None:
+        """Process the correct answer for a question
+
+        Args:
+            questions: The list of questions
+            question_text: The text of the question
+            options: The list of options for the question
+            answer_text: The text indicating the correct answer
+        """
+        # Create the question dictionary
+        question = {
+            'question_text': question_text,
+            'options': options if options else None,
+            'points': 1.0  # Default points
+        }
+
+        # Determine question type and correct answer based on options and answer text
+        # Check if it's a true/false question based on the question text
+        if question_text.lower().endswith('true or false') or question_text.lower().endswith('true/false') or \
+           'true or false:' in question_text.lower() or 'true/false:' in question_text.lower() or \
+           question_text.lower().strip().startswith('true or false:') or \
+           question_text.lower().strip().startswith('this') or question_text.lower().strip().startswith('that') or \
+           question_text.lower().strip().startswith('the following') or question_text.lower().strip().startswith('the statement'):
+            # True/False question
+            question['question_type'] = 'true_false'
+
+            # Normalize the answer
+            if answer_text.lower() in ['true', 't', '1', 'yes', 'y', 'this', 'that', 'correct', 'right']:
+                question['correct_answer'] = 'true'
+            else:
+                question['correct_answer'] = 'false'
+
+        elif options and len(options) >= 2:
+            if len(options) == 2 and (
+                (options[0].lower() in ['true', 't'] and options[1].lower() in ['false', 'f']) or
+                (options[0].lower() in ['false', 'f'] and options[1].lower() in ['true', 't'])
+            ):
+                # True/False question
+                question['question_type'] = 'true_false'
+
+                # Determine correct answer
+                if answer_text.lower() in ['true', 't', 'a', 'this', 'that', 'correct', 'right']:
+                    question['correct_answer'] = '0' if options[0].lower() in ['true', 't'] else '1'
+                else:
+                    question['correct_answer'] = '1' if options[0].lower() in ['true', 't'] else '0'
+            else:
+                # Multiple choice question
+                question['question_type'] = 'multiple_choice'
+
+                # Try to determine the correct answer from the answer text
+                answer_text = answer_text.strip().upper()
+                if answer_text in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+                    # Convert letter to index (A=0, B=1, etc.)
+                    index = ord(answer_text) - ord('A')
+                    if 0 <= index < len(options):
+                        question['correct_answer'] = str(index)
+                    else:
+                        question['correct_answer'] = '0'  # Default to first option
+                elif answer_text.isdigit():
+                    # Numeric answer
+                    index = int(answer_text) - 1
+                    if 0 <= index < len(options):
+                        question['correct_answer'] = str(index)
+                    else:
+                        question['correct_answer'] = '0'  # Default to first option
+                else:
+                    # Try to match the answer text with an option
+                    found_match = False
+                    for i, option in enumerate(options):
+                        if answer_text.lower() in option.lower():
+                            question['correct_answer'] = str(i)
+                            found_match = True
+                            break
+
+                    if not found_match:
+                        question['correct_answer'] = '0'  # Default to first option
+        elif answer_text.lower() in ['true', 'false']:
+            # True/False without options
+            question['question_type'] = 'true_false'
+            question['correct_answer'] = answer_text.lower()
+        else:
+            # Identification or essay question
+            # First check for explicit labels in the question text
+            if 'essay' in question_text.lower() or 'explain' in question_text.lower() or 'describe' in question_text.lower() or 'discuss' in question_text.lower():
+                # Explicitly labeled as essay
+                question['question_type'] = 'essay'
+                question['word_limit'] = 500
+            elif 'identification' in question_text.lower() or 'identify' in question_text.lower() or 'name' in question_text.lower() or 'what is' in question_text.lower():
+                # Explicitly labeled as identification
+                question['question_type'] = 'identification'
+            # If no explicit label, use heuristics
+            elif len(question_text) > 200 or '?' not in question_text:
+                # Likely an essay based on length
+                question['question_type'] = 'essay'
+                question['word_limit'] = 500
+            else:
+                # Default to identification
+                question['question_type'] = 'identification'
+
+            question['correct_answer'] = answer_text
+
+        questions.append(question)
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    text = generate_question_document(args.questions)
+    legacy_time, expected = best_of(args.repeat, LegacyParser(use_cache=False)._parse_text_for_questions, text)
+    new_time, questions = best_of(args.repeat, DocumentProcessor(use_cache=False)._parse_text_for_questions, text)
+
+    assert questions == expected and len(questions) == args.questions
+    print(f"{args.questions} questions, {len(text)} characters")
+    print(f"two-regex parser:   {legacy_time * 1000:.1f} ms")
+    print(f"single-pass parser: {new_time * 1000:.1f} ms ({legacy_time / new_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
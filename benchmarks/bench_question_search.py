@@ -0,0 +1,113 @@
+"""Benchmark: question bank search over 100,000 questions
+
+    python benchmarks/bench_question_search.py --questions 100000 --teachers 20
+
+Fills a temporary SQLite database through the insert triggers (so the
+index is built the same way as in production) and times ranked searches
+for one teacher against a LIKE scan of the same bank.
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = ('photosynthesis cell organelle mitochondria chloroplast energy war treaty empire '
+         'revolution capital france equation derivative integral velocity force mass '
+         'molecule atom reaction enzyme protein history economy market supply demand').split()
+QUERIES = ['photosynthesis', 'chloro', 'cell energy', 'capital france', 'war', 'equation deriv']
+
+
+def vocabulary(size=5000):
+    """Subject words spread through a larger filler vocabulary with Zipf-like frequencies"""
+    words = [f'word{i}' for i in range(size)]
+    for rank, word in enumerate(WORDS):
+        words[10 + rank * 37] = word
+    return words, list(itertools.accumulate(1 / (rank + 1) for rank in range(size)))
+
+
+def fill(questions, teachers, seed=0):
+    from app.models import db, User, Subject, Quiz, Question
+    rng = random.Random(seed)
+    users = [User(username=f'teacher{i}', email=f'teacher{i}@example.com', role='teacher', password_hash='x')
+             for i in range(teachers)]
+    db.session.add_all(users)
+    db.session.flush()
+    quizzes = []
+    for user in users:
+        subject = Subject(name=f'Subject {user.id}', subject_code=f'S{user.id}', teacher_id=user.id)
+        db.session.add(subject)
+        db.session.flush()
+        quizzes.append([Quiz(title=f'Quiz {user.id}.{i}', user_id=user.id, subject_id=subject.id) for i in range(20)])
+        db.session.add_all(quizzes[-1])
+    db.session.flush()
+
+    words, weights = vocabulary()
+    rows = []
+    for i in range(questions):
+        owner = i % teachers
+        rows.append({
+            'question_text': ' '.join(rng.choices(words, cum_weights=weights, k=12)) + '?',
+            'question_type': rng.choice(['multiple_choice', 'identification', 'essay']),
+            'options': rng.choices(words, cum_weights=weights, k=4),
+            'correct_answer': '0',
+            'points': 1.0,
+            'order_index': i,
+            'user_id': users[owner].id,
+            'quiz_id': rng.choice(quizzes[owner]).id
+        })
+    db.session.execute(Question.__table__.insert(), rows)
+    db.session.commit()
+    return users[0], quizzes[0][0]
+
+
+def timed(function, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=100000)
+    parser.add_argument('--teachers', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        from app import create_app
+        from app.question.services import QuestionService
+        app = create_app('testing')
+        with app.app_context():
+            start = time.perf_counter()
+            teacher, quiz = fill(args.questions, args.teachers)
+            print(f"{args.questions} questions indexed in {time.perf_counter() - start:.1f}s")
+
+            for query in QUERIES:
+                fts_ms, (page, total) = timed(lambda: QuestionService.search_questions(teacher.id, query))
+                filtered_ms, _ = timed(lambda: QuestionService.search_questions(
+                    teacher.id, query, question_type='essay', subject_id=quiz.subject_id, page=3))
+                print(f"{query!r:18} {total:6} matches  fts {fts_ms:6.1f} ms  filtered {filtered_ms:6.1f} ms")
+
+            from app.models import db
+            from sqlalchemy import text
+            db.session.execute(text('DROP TRIGGER question_fts_insert'))
+            db.session.execute(text('DROP TRIGGER question_fts_update'))
+            db.session.execute(text('DROP TRIGGER question_fts_delete'))
+            db.session.execute(text('DROP TABLE question_fts'))
+            db.session.commit()
+            like_ms, (_, total) = timed(lambda: QuestionService.search_questions(teacher.id, QUERIES[0]))
+            print(f"LIKE fallback for {QUERIES[0]!r}: {total} matches in {like_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: cloning an exam into several sections, ORM copy vs. INSERT ... SELECT
+
+    python benchmarks/bench_quiz_clone.py --questions 200 --sections 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask
+from models import db, User, Subject, Quiz, Question, Announcement
+from question_service import QuestionService
+from quiz_service import QuizService
+
+
+def orm_clone(quiz, subject_ids, user_id):
+    """Copy the quiz object by object, as a view would without the service"""
+    for subject_id in subject_ids:
+        subject = db.session.get(Subject, subject_id)
+        copy = Quiz(title=quiz.title, description=quiz.description, quiz_type=quiz.quiz_type,
+                    duration=quiz.duration, start_time=quiz.start_time, user_id=user_id, subject_id=subject_id)
+        db.session.add(copy)
+        db.session.flush()
+        for question in Question.query.filter_by(quiz_id=quiz.id).order_by(Question.order_index):
+            db.session.add(Question(
+                question_text=question.question_text, question_type=question.question_type,
+                word_limit=question.word_limit, options=question.options,
+                correct_answer=question.correct_answer, points=question.points,
+                order_index=question.order_index, user_id=user_id, quiz_id=copy.id
+            ))
+        db.session.add(Announcement(
+            title=f'New {quiz.quiz_type.capitalize()} Available',
+            content=f'A new {quiz.quiz_type} "{quiz.title}" has been created for {subject.name}.',
+            user_id=user_id, subject_id=subject_id, quiz_id=copy.id, announcement_type='quiz_created'
+        ))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=200)
+    parser.add_argument('--sections', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config.update({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'bench.db'),
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            teacher = User(username='teacher', email='teacher@example.com', role='teacher', password_hash='x')
+            db.session.add(teacher)
+            db.session.commit()
+            sections = [Subject(name=f'Section {i}', subject_code=f'SEC{i}', teacher_id=teacher.id)
+                        for i in range(args.sections + 1)]
+            db.session.add_all(sections)
+            db.session.commit()
+            exam = Quiz(title='Final exam', quiz_type='exam', user_id=teacher.id, subject_id=sections[0].id)
+            db.session.add(exam)
+            db.session.commit()
+            QuestionService.add_questions(exam, [{
+                'question_text': f'Question {i}: which option is right?',
+                'question_type': 'multiple_choice',
+                'options': ['first', 'second', 'third', 'fourth'],
+                'correct_answer': str(i % 4),
+                'points': 1
+            } for i in range(args.questions)], teacher.id)
+            targets = [section.id for section in sections[1:]]
+
+            for name, clone in (('ORM copy', orm_clone), ('INSERT ... SELECT', QuizService.clone_quiz)):
+                times = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    clone(exam, targets, teacher.id)
+                    times.append(time.perf_counter() - start)
+                    db.session.expire_all()
+                best = min(times) * 1000
+                print(f"{name:18} {args.questions} questions x {args.sections} sections: {best:7.1f} ms")
+
+            copies = Quiz.query.count() - 1
+            assert Question.query.count() == args.questions * (copies + 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -22,21 +22,13 @@ class DocumentImport:
         
         Args:
             file: The uploaded file object
-            upload_dir: The directory to save the file to (optional)
+            upload_dir: The upload store directory (optional, defaults to the shared store)
             use_ai: Whether to use AI to extract questions
             
         Returns:
             Tuple[List[Dict], Optional[str]]: A tuple containing the list of extracted questions
                 and an optional error message
         """
-        if not upload_dir:
-            # Use default upload directory if none provided
-            upload_dir = os.path.join('uploads', 'documents')
-            
-            # Ensure the upload directory exists
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir, exist_ok=True)
-        
         try:
             # Save the uploaded file
             file_path = self.processor.save_uploaded_file(file, upload_dir)
@@ -6,11 +6,14 @@ with improved error handling and validation.
 import os
 import re
 import json
-import docx
+import zipfile
 import PyPDF2
 import tempfile
-from werkzeug.utils import secure_filename
-from typing import List, Dict, Tuple, Optional, Any
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from parse_cache import ParseCache, file_digest, get_parse_cache
+from upload_store import UploadStore, get_upload_store
+from typing import List, Dict, Tuple, Optional, Any, Callable, Iterator
 
 # Check which OpenAI library version is being used
 try:
@@ -21,55 +24,143 @@ except ImportError:
     import openai
     USING_NEW_OPENAI = False
 
+# WordprocessingML tags read by the streaming DOCX extractor
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_P, _W_T, _W_TBL, _W_TR, _W_TC = _W + 'p', _W + 't', _W + 'tbl', _W + 'tr', _W + 'tc'
+_W_GRID_SPAN, _W_V_MERGE, _W_VAL = _W + 'gridSpan', _W + 'vMerge', _W + 'val'
+_W_RUN_CHARACTERS = {_W + 'tab': '\t', _W + 'ptab': '\t', _W + 'br': '\n', _W + 'cr': '\n', _W + 'noBreakHyphen': '-'}
+
+def _extract_pdf_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) of a PDF
+    
+    Runs in a worker process, so it opens the file itself rather than
+    sharing a reader with the parent.
+    """
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[index].extract_text() or '' for index in range(start, end)]
+
 class DocumentProcessor:
     """Class to handle processing document files and extracting questions"""
     
-    def __init__(self):
-        """Initialize the document processor"""
-        # Get OpenAI API key from environment variable
+    # PDFs with at least this many pages are extracted in a process pool
+    PARALLEL_PAGE_THRESHOLD = int(os.environ.get('PDF_PARALLEL_PAGE_THRESHOLD', 40))
+    # Smallest number of pages handed to a worker at a time; each chunk
+    # re-opens the file, so chunks are otherwise sized to ~2 per worker
+    MIN_PAGES_PER_CHUNK = int(os.environ.get('PDF_MIN_PAGES_PER_CHUNK', 10))
+    
+    SUPPORTED_EXTENSIONS = ('.docx', '.pdf')
+    
+    # Bump whenever parsing output changes, so cached results are not reused
+    PARSER_VERSION = '3'
+    
+    # AI extraction: prompt budget per chunk (estimated tokens), the rough
+    # characters per token used to estimate it, and concurrent API calls
+    AI_CHUNK_TOKENS = int(os.environ.get('AI_EXTRACT_CHUNK_TOKENS', 3000))
+    AI_CHARS_PER_TOKEN = 4
+    AI_MAX_CONCURRENCY = int(os.environ.get('AI_EXTRACT_MAX_CONCURRENCY', 4))
+    
+    # Lines that start a question; documents are only split for AI extraction here
+    QUESTION_START_PATTERN = re.compile(r'^\s*(?:\d+\s*[.)]|[Qq]uestion\s*\d*\s*[:.)]|[Qq]\s*\d*\s*[:.)])\s*\S')
+    
+    # Answer words that mark a true/false question as true, with and without options
+    TRUE_ANSWERS = frozenset(['true', 't', '1', 'yes', 'y', 'this', 'that', 'correct', 'right'])
+    TRUE_OPTION_ANSWERS = frozenset(['true', 't', 'a', 'this', 'that', 'correct', 'right'])
+    # Question text prefixes and markers of a true/false statement
+    TRUE_FALSE_PREFIXES = ('true or false:', 'this', 'that', 'the following', 'the statement')
+    TRUE_FALSE_SUFFIXES = ('true or false', 'true/false')
+    ESSAY_WORDS = ('essay', 'explain', 'describe', 'discuss')
+    IDENTIFICATION_WORDS = ('identification', 'identify', 'name', 'what is')
+    
+    def __init__(self, max_workers: Optional[int] = None, cache: Optional[ParseCache] = None,
+                 use_cache: bool = True):
+        """Initialize the document processor
+        
+        Args:
+            max_workers: Worker processes for parallel PDF extraction
+                (defaults to the number of CPUs)
+            cache: Parse cache to use (defaults to the shared cache)
+            use_cache: Set to False to always parse the document
+        """
+        self.max_workers = max_workers or int(os.environ.get('PDF_EXTRACT_WORKERS', 0)) or os.cpu_count() or 1
+        self.cache = (cache or get_parse_cache()) if use_cache else None
+        self.last_cache_hit = False
+        self._parse_mode = 'regex'
+        
+        # Get OpenAI API key (and optional API base URL, e.g. a local stub) from environment variables
         self.api_key = os.environ.get('OPENAI_API_KEY')
+        self.api_base = os.environ.get('OPENAI_API_BASE')
+        self._ai_partial_fallback = False
         
         # Initialize OpenAI client if API key is available
         if self.api_key:
             if USING_NEW_OPENAI:
-                self.client = OpenAI(api_key=self.api_key)
+                self.client = OpenAI(api_key=self.api_key, base_url=self.api_base)
             else:
                 openai.api_key = self.api_key
     
-    def save_uploaded_file(self, file, upload_dir: str) -> str:
-        """Save the uploaded file to the specified directory
+    def save_uploaded_file(self, file, upload_dir: Optional[str] = None) -> str:
+        """Save the uploaded file in the content-addressed upload store
         
         Args:
             file: The uploaded file object
-            upload_dir: The directory to save the file to
+            upload_dir: The store directory; defaults to the shared store (UPLOAD_STORE_DIR)
             
         Returns:
             str: The path to the saved file
-        """
-        # Create the upload directory if it doesn't exist
-        if not os.path.exists(upload_dir):
-            os.makedirs(upload_dir, exist_ok=True)
-        
-        # Secure the filename to prevent directory traversal attacks
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(upload_dir, filename)
         
-        # Save the file
-        file.save(file_path)
-        
-        return file_path
+        Raises:
+            UploadError: The file is too large, empty or not a .docx/.pdf file
+        """
+        store = UploadStore(upload_dir) if upload_dir else get_upload_store()
+        return store.save(file, allowed_extensions=self.SUPPORTED_EXTENSIONS).path
     
-    def process_file(self, file_path: str, use_ai: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    def process_file(self, file_path: str, use_ai: bool = False,
+                     progress_callback: Optional[Callable[[int, int, int], None]] = None,
+                     question_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """Process the file and extract questions
         
         Args:
             file_path: The path to the file to process
             use_ai: Whether to use AI to extract questions
+            progress_callback: Optional callable (page, total_pages, questions_so_far)
+                called after each PDF page is parsed
+            question_callback: Optional callable receiving each question as soon as
+                it is parsed (PDFs without AI only); the returned list still holds
+                every question, in the same order
             
         Returns:
             Tuple[List[Dict], Optional[str]]: A tuple containing the list of extracted questions
                 and an optional error message
         """
+        self.last_cache_hit = False
+        if not self.cache or not os.path.exists(file_path):
+            return self._process_file(file_path, use_ai, progress_callback, question_callback)
+        
+        # Identical uploads reuse the earlier parse result
+        mode = 'ai' if use_ai and self.api_key else 'regex'
+        key = ParseCache.make_key(file_digest(file_path), self.PARSER_VERSION, mode)
+        questions = self.cache.get(key)
+        if questions is not None:
+            print(f"Using cached parse result for {file_path} ({len(questions)} questions)")
+            self.last_cache_hit = True
+            return questions, None
+        
+        questions, error = self._process_file(file_path, use_ai, progress_callback, question_callback)
+        
+        # Results of a failed AI call (regex fallback) are not cached as AI results
+        if not error and questions and self._parse_mode == mode:
+            try:
+                self.cache.set(key, questions)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Could not cache parse result: {str(e)}")
+        return questions, error
+    
+    def _process_file(self, file_path: str, use_ai: bool = False,
+                      progress_callback: Optional[Callable[[int, int, int], None]] = None,
+                      question_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Extract questions from the file without consulting the parse cache"""
+        self._parse_mode = 'regex'
         try:
             # Print debug information
             print(f"Processing file: {file_path}")
@@ -85,6 +176,14 @@ class DocumentProcessor:
             ext = ext.lower()
             print(f"File extension: {ext}")
             
+            # Without AI, documents are parsed as they are extracted
+            if ext == '.pdf' and not (use_ai and self.api_key):
+                print("Streaming PDF file")
+                return self._process_streaming(self.iter_pdf_questions(file_path, progress_callback), question_callback)
+            if ext == '.docx' and not (use_ai and self.api_key):
+                print("Streaming DOCX file")
+                return self._process_streaming(self.iter_docx_questions(file_path), question_callback)
+            
             # Extract text based on file type
             if ext == '.docx':
                 print("Processing DOCX file")
@@ -113,6 +212,8 @@ class DocumentProcessor:
                         # Continue with regex parsing below
                     else:
                         print(f"AI successfully extracted {len(questions)} questions")
+                        # Partly regex-parsed results are not cached as AI results
+                        self._parse_mode = 'ai_partial' if self._ai_partial_fallback else 'ai'
                         return questions, None
                 except Exception as e:
                     print(f"AI extraction failed: {str(e)}. Falling back to regex parsing.")
@@ -128,6 +229,151 @@ class DocumentProcessor:
         
         return questions, None
     
+    def _process_streaming(self, question_iter: Iterator[Dict[str, Any]],
+                           question_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Collect the questions of iter_pdf_questions or iter_docx_questions
+        
+        Args:
+            question_iter: The question iterator of the document
+            question_callback: Optional callable receiving each question as it is parsed
+            
+        Returns:
+            Tuple[List[Dict], Optional[str]]: The extracted questions and an optional error message
+        """
+        questions = []
+        try:
+            for question in question_iter:
+                questions.append(question)
+                if question_callback:
+                    question_callback(question)
+        except Exception as e:
+            print(f"Error extracting text from document: {str(e)}")
+            return [], "Failed to extract text from the document"
+        
+        if not questions and not self._last_stream_chars:
+            print("Failed to extract text from the document")
+            return [], "Failed to extract text from the document"
+        
+        print(f"Successfully streamed {self._last_stream_chars} characters of text")
+        return questions, None
+    
+    def iter_pdf_questions(self, file_path: str,
+                           progress_callback: Optional[Callable[[int, int, int], None]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield questions from a PDF as soon as they are complete
+        
+        Pages are extracted one at a time and fed to a QuestionStreamParser,
+        so only the current page's text is held in memory. A question that
+        continues on the next page is carried over by the parser.
+        
+        Args:
+            file_path: The path to the .pdf file
+            progress_callback: Optional callable (page, total_pages, questions_so_far)
+            
+        Yields:
+            Dict: Question data, in document order
+        """
+        parser = QuestionStreamParser(self)
+        self._last_stream_chars = 0
+        emitted = 0
+        
+        for page_number, total_pages, page_text in self._iter_pdf_pages(file_path):
+            self._last_stream_chars += len(page_text)
+            for question in parser.feed(page_text + '\n'):
+                emitted += 1
+                yield question
+            if progress_callback:
+                progress_callback(page_number, total_pages, emitted)
+        
+        for question in parser.close():
+            yield question
+    
+    def _iter_pdf_pages(self, file_path: str, parallel: Optional[bool] = None) -> Iterator[Tuple[int, int, str]]:
+        """Yield (page_number, total_pages, text) for each page of a PDF, in page order
+        
+        Args:
+            file_path: The path to the .pdf file
+            parallel: Force parallel (True) or sequential (False) extraction;
+                by default PDFs above PARALLEL_PAGE_THRESHOLD pages use a process pool
+        """
+        with open(file_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            total_pages = len(reader.pages)
+            if parallel is None:
+                parallel = total_pages >= self.PARALLEL_PAGE_THRESHOLD and self.max_workers > 1
+            if not parallel:
+                for index in range(total_pages):
+                    yield index + 1, total_pages, reader.pages[index].extract_text() or ''
+                return
+        
+        yield from self._iter_pdf_pages_parallel(file_path, total_pages)
+    
+    def _iter_pdf_pages_parallel(self, file_path: str, total_pages: int) -> Iterator[Tuple[int, int, str]]:
+        """Extract page chunks in a process pool and yield the pages in order
+        
+        Chunks finish in any order; executor.map hands them back in submission
+        order, so pages are yielded as soon as every earlier chunk is done.
+        """
+        chunk_size = max(self.MIN_PAGES_PER_CHUNK, -(-total_pages // (self.max_workers * 2)))
+        starts = list(range(0, total_pages, chunk_size))
+        ends = [min(start + chunk_size, total_pages) for start in starts]
+        workers = min(self.max_workers, len(starts))
+        print(f"Extracting {total_pages} PDF pages with {workers} worker processes")
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = executor.map(_extract_pdf_page_range, [file_path] * len(starts), starts, ends)
+            for start, texts in zip(starts, chunks):
+                for offset, text in enumerate(texts):
+                    yield start + offset + 1, total_pages, text
+    
+    def iter_docx_questions(self, file_path: str, lines_per_feed: int = 200) -> Iterator[Dict[str, Any]]:
+        """Yield questions from a .docx file as its paragraphs and table rows are read
+        
+        Args:
+            file_path: The path to the .docx file
+            lines_per_feed: Lines handed to the parser at a time
+            
+        Yields:
+            Dict: Question data, in document order
+        """
+        parser = QuestionStreamParser(self)
+        self._last_stream_chars = 0
+        lines = []
+        
+        for line in self._iter_docx_lines(file_path):
+            self._last_stream_chars += len(line)
+            lines.append(line)
+            if len(lines) >= lines_per_feed:
+                yield from parser.feed('\n'.join(lines) + '\n')
+                lines = []
+        
+        yield from parser.feed('\n'.join(lines))
+        yield from parser.close()
+    
+    def _iter_docx_lines(self, file_path: str, chunk_size: int = 65536) -> Iterator[str]:
+        """Yield the body paragraphs and table rows of a .docx file in document order
+        
+        word/document.xml is streamed from the zip through the XML parser in
+        chunks; no element tree is built, so memory stays flat however long
+        the document is. Table rows come out as their cell texts joined by
+        ' | ' (see _DocxTextTarget).
+        
+        Args:
+            file_path: The path to the .docx file
+            chunk_size: Bytes of XML parsed at a time
+        """
+        with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as document:
+            target = _DocxTextTarget()
+            parser = ElementTree.XMLParser(target=target)
+            while True:
+                chunk = document.read(chunk_size)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+                yield from target.lines
+                target.lines.clear()
+            parser.close()
+            yield from target.lines
+    
     def _extract_text_from_docx(self, file_path: str) -> str:
         """Extract text from a .docx file
         
@@ -138,23 +384,7 @@ class DocumentProcessor:
             str: The extracted text
         """
         try:
-            # Open the document
-            doc = docx.Document(file_path)
-            
-            # Extract text from paragraphs
-            paragraphs = [para.text for para in doc.paragraphs]
-            
-            # Extract text from tables
-            table_text = []
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = [cell.text for cell in row.cells]
-                    table_text.append(' | '.join(row_text))
-            
-            # Combine all text
-            all_text = '\n'.join(paragraphs + table_text)
-            
-            return all_text
+            return '\n'.join(self._iter_docx_lines(file_path))
         except Exception as e:
             print(f"Error extracting text from DOCX: {str(e)}")
             return ""
@@ -169,20 +399,8 @@ class DocumentProcessor:
             str: The extracted text
         """
         try:
-            # Open the PDF file
-            with open(file_path, 'rb') as file:
-                # Create a PDF reader object
-                reader = PyPDF2.PdfReader(file)
-                
-                # Extract text from each page
-                text = []
-                for page in reader.pages:
-                    text.append(page.extract_text())
-                
-                # Combine all text
-                all_text = '\n'.join(text)
-                
-                return all_text
+            # Extract text from each page and combine it
+            return '\n'.join(text for _, _, text in self._iter_pdf_pages(file_path))
         except Exception as e:
             print(f"Error extracting text from PDF: {str(e)}")
             return ""
@@ -196,67 +414,17 @@ class DocumentProcessor:
         Returns:
             List[Dict]: A list of dictionaries containing question data
         """
-        questions = []
-        
-        # Split the text into lines
-        lines = text.split('\n')
-        
-        # Initialize variables
-        current_question = None
-        current_options = []
-        question_number = 0
-        
-        # Regular expressions for identifying questions and options
-        question_pattern = re.compile(r'^\s*(?:\d+\.?|[Qq]uestion\s*\d*:?|[Qq]:?)\s*(.+)$')
-        option_pattern = re.compile(r'^\s*([A-Za-z])\s*[.)]\s*(.+)$')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Check if this line is a question
-            question_match = question_pattern.match(line)
-            if question_match:
-                # If we were processing a previous question, add it to the list
-                if current_question:
-                    self._add_question_to_list(questions, current_question, current_options)
-                
-                # Start a new question
-                question_number += 1
-                current_question = question_match.group(1).strip()
-                current_options = []
-                continue
-            
-            # Check if this line is an option
-            option_match = option_pattern.match(line)
-            if option_match and current_question:
-                option_text = option_match.group(2).strip()
-                current_options.append(option_text)
-                continue
-            
-            # If we're in a question but this line isn't an option, it might be part of the question
-            if current_question:
-                # Check if this line indicates the correct answer
-                if line.lower().startswith(('answer:', 'correct:', 'correct answer:')):
-                    # Process the correct answer
-                    answer_text = line.split(':', 1)[1].strip()
-                    self._process_correct_answer(questions, current_question, current_options, answer_text)
-                    
-                    # Reset for the next question
-                    current_question = None
-                    current_options = []
-                    continue
-                    
-        # Add the last question if there is one
-        if current_question:
-            self._add_question_to_list(questions, current_question, current_options)
-            
-        return questions
+        parser = QuestionStreamParser(self)
+        return parser.feed(text) + parser.close()
         
     def _extract_questions_with_ai(self, text: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         """Use AI to extract questions from text content
         
+        Long documents are split at question boundaries into chunks that fit
+        the prompt budget, and the chunks are sent concurrently. A chunk whose
+        call fails is parsed with regex instead; an error is only returned if
+        every chunk failed.
+        
         Args:
             text: The text content to extract questions from
             
@@ -264,6 +432,98 @@ class DocumentProcessor:
             Tuple[List[Dict], Optional[str]]: A tuple containing the list of extracted questions
                 and an optional error message
         """
+        self._ai_partial_fallback = False
+        chunks = self._split_text_for_ai(text)
+        if len(chunks) == 1:
+            return self._extract_chunk_with_ai(chunks[0])
+        
+        workers = min(self.AI_MAX_CONCURRENCY, len(chunks))
+        print(f"Extracting questions from {len(chunks)} chunks with {workers} concurrent AI calls")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(self._extract_chunk_with_ai, chunks))
+        
+        questions = self._merge_question_lists([chunk_questions for chunk_questions, _ in results])
+        errors = [error for _, error in results if error]
+        if len(errors) == len(results):
+            return questions, errors[0]
+        if errors:
+            print(f"AI extraction failed for {len(errors)} of {len(results)} chunks; those were parsed with regex")
+            self._ai_partial_fallback = True
+        return questions, None
+    
+    def _split_text_for_ai(self, text: str) -> List[str]:
+        """Split text into chunks within AI_CHUNK_TOKENS, cutting only where a question starts
+        
+        A single question longer than the budget becomes a chunk of its own.
+        """
+        budget = self.AI_CHUNK_TOKENS * self.AI_CHARS_PER_TOKEN
+        
+        # Group lines into blocks that each begin with a question
+        blocks = []
+        current = []
+        for line in text.split('\n'):
+            if current and self.QUESTION_START_PATTERN.match(line):
+                blocks.append('\n'.join(current))
+                current = []
+            current.append(line)
+        blocks.append('\n'.join(current))
+        
+        chunks = []
+        chunk = []
+        size = 0
+        for block in blocks:
+            if chunk and size + len(block) + 1 > budget:
+                chunks.append('\n'.join(chunk))
+                chunk = []
+                size = 0
+            chunk.append(block)
+            size += len(block) + 1
+        chunks.append('\n'.join(chunk))
+        return chunks
+    
+    def _merge_question_lists(self, question_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Concatenate per-chunk results in order, dropping repeated questions"""
+        merged = []
+        seen = set()
+        for questions in question_lists:
+            for question in questions:
+                key = (
+                    ' '.join(str(question.get('question_text', '')).lower().split()),
+                    question.get('question_type')
+                )
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(question)
+        return merged
+    
+    def _complete(self, prompt: str) -> str:
+        """Send one extraction prompt to the chat completion API and return the reply text"""
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant that extracts quiz questions from documents."},
+            {"role": "user", "content": prompt}
+        ]
+        if USING_NEW_OPENAI:
+            response = self.client.chat.completions.create(
+                model="gpt-3.5-turbo-16k",
+                messages=messages,
+                temperature=0.3,
+                max_tokens=4000
+            )
+            return response.choices[0].message.content
+        
+        options = {'api_base': self.api_base} if self.api_base else {}
+        response = openai.ChatCompletion.create(
+            model="gpt-3.5-turbo-16k",
+            messages=messages,
+            temperature=0.3,
+            max_tokens=4000,
+            **options
+        )
+        return response.choices[0].message['content']
+    
+    def _extract_chunk_with_ai(self, text: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Use AI to extract the questions of one chunk, falling back to regex on failure"""
         try:
             # Prepare the prompt for the AI
             prompt = f"""Extract questions from the following document text. For each question, determine:
@@ -281,28 +541,7 @@ Here's the document text:
 """
             
             # Call the OpenAI API
-            if USING_NEW_OPENAI:
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo-16k",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that extracts quiz questions from documents."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=4000
-                )
-                result = response.choices[0].message.content
-            else:
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo-16k",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that extracts quiz questions from documents."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=4000
-                )
-                result = response.choices[0].message['content']
+            result = self._complete(prompt)
             
             # Extract the JSON part from the response
             json_match = re.search(r'\[\s*\{.+\}\s*\]', result, re.DOTALL)
@@ -374,6 +613,18 @@ Here's the document text:
             questions = self._parse_text_for_questions(text)
             return questions, error_msg
     
+    @staticmethod
+    def _true_false_options(options: List[str]) -> Optional[bool]:
+        """Return whether the first of two True/False options is 'true', or None if they are not True/False"""
+        if len(options) != 2:
+            return None
+        first, second = options[0].lower(), options[1].lower()
+        if first in ('true', 't') and second in ('false', 'f'):
+            return True
+        if first in ('false', 'f') and second in ('true', 't'):
+            return False
+        return None
+    
     def _add_question_to_list(self, questions: List[Dict[str, Any]], question_text: str, options: List[str]) -> None:
         """Add a question to the list of questions
         
@@ -383,45 +634,30 @@ Here's the document text:
             options: The list of options for the question
         """
         # Determine question type based on options
-        if len(options) >= 2:
-            # Check if it's a true/false question
-            if len(options) == 2 and (
-                (options[0].lower() in ['true', 't'] and options[1].lower() in ['false', 'f']) or
-                (options[0].lower() in ['false', 'f'] and options[1].lower() in ['true', 't'])
-            ):
-                question_type = 'true_false'
-                correct_answer = '0' if options[0].lower() in ['true', 't'] else '1'
-            else:
-                question_type = 'multiple_choice'
-                # Default to first option as correct (will be updated later if specified)
-                correct_answer = '0'
-        elif question_text.lower().endswith('true or false?') or question_text.lower().endswith('true or false.'):
+        true_first = self._true_false_options(options)
+        if true_first is not None:
+            question_type = 'true_false'
+            correct_answer = '0' if true_first else '1'
+        elif len(options) >= 2:
+            question_type = 'multiple_choice'
+            # Default to first option as correct (will be updated later if specified)
+            correct_answer = '0'
+        elif question_text.lower().endswith(('true or false?', 'true or false.')):
             # True/False without options
             question_type = 'true_false'
             correct_answer = 'true'  # Default to true
-        elif '___' in question_text or '...' in question_text or '_____' in question_text:
-            # Identification/Fill-in-the-blank
-            question_type = 'identification'
-            correct_answer = ''
         else:
-            # Default to identification if no options
+            # Identification/fill-in-the-blank, or no options at all
             question_type = 'identification'
             correct_answer = ''
         
-        # Create the question dictionary
-        question = {
+        questions.append({
             'question_text': question_text,
             'question_type': question_type,
             'options': options if options and question_type == 'multiple_choice' else None,
             'correct_answer': correct_answer,
             'points': 1.0  # Default points
-        }
-        
-        # Add word limit for essay questions
-        if question_type == 'essay':
-            question['word_limit'] = 500
-        
-        questions.append(question)
+        })
     
     def _process_correct_answer(self, questions: List[Dict[str, Any]], question_text: str, 
                                options: List[str], answer_text: str) -> None:
@@ -439,90 +675,227 @@ Here's the document text:
             'options': options if options else None,
             'points': 1.0  # Default points
         }
+        text = question_text.lower()
+        answer = answer_text.lower()
         
         # Determine question type and correct answer based on options and answer text
         # Check if it's a true/false question based on the question text
-        if question_text.lower().endswith('true or false') or question_text.lower().endswith('true/false') or \
-           'true or false:' in question_text.lower() or 'true/false:' in question_text.lower() or \
-           question_text.lower().strip().startswith('true or false:') or \
-           question_text.lower().strip().startswith('this') or question_text.lower().strip().startswith('that') or \
-           question_text.lower().strip().startswith('the following') or question_text.lower().strip().startswith('the statement'):
+        if text.endswith(self.TRUE_FALSE_SUFFIXES) or text.startswith(self.TRUE_FALSE_PREFIXES) or \
+           'true or false:' in text or 'true/false:' in text:
             # True/False question
             question['question_type'] = 'true_false'
-            
-            # Normalize the answer
-            if answer_text.lower() in ['true', 't', '1', 'yes', 'y', 'this', 'that', 'correct', 'right']:
-                question['correct_answer'] = 'true'
-            else:
-                question['correct_answer'] = 'false'
-                
+            question['correct_answer'] = 'true' if answer in self.TRUE_ANSWERS else 'false'
+        
         elif options and len(options) >= 2:
-            if len(options) == 2 and (
-                (options[0].lower() in ['true', 't'] and options[1].lower() in ['false', 'f']) or
-                (options[0].lower() in ['false', 'f'] and options[1].lower() in ['true', 't'])
-            ):
+            true_first = self._true_false_options(options)
+            if true_first is not None:
                 # True/False question
                 question['question_type'] = 'true_false'
-                
-                # Determine correct answer
-                if answer_text.lower() in ['true', 't', 'a', 'this', 'that', 'correct', 'right']:
-                    question['correct_answer'] = '0' if options[0].lower() in ['true', 't'] else '1'
-                else:
-                    question['correct_answer'] = '1' if options[0].lower() in ['true', 't'] else '0'
+                answered_true = answer in self.TRUE_OPTION_ANSWERS
+                question['correct_answer'] = '0' if answered_true == true_first else '1'
             else:
                 # Multiple choice question
                 question['question_type'] = 'multiple_choice'
-                
-                # Try to determine the correct answer from the answer text
-                answer_text = answer_text.strip().upper()
-                if answer_text in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
-                    # Convert letter to index (A=0, B=1, etc.)
-                    index = ord(answer_text) - ord('A')
-                    if 0 <= index < len(options):
-                        question['correct_answer'] = str(index)
-                    else:
-                        question['correct_answer'] = '0'  # Default to first option
-                elif answer_text.isdigit():
-                    # Numeric answer
-                    index = int(answer_text) - 1
-                    if 0 <= index < len(options):
-                        question['correct_answer'] = str(index)
-                    else:
-                        question['correct_answer'] = '0'  # Default to first option
-                else:
-                    # Try to match the answer text with an option
-                    found_match = False
-                    for i, option in enumerate(options):
-                        if answer_text.lower() in option.lower():
-                            question['correct_answer'] = str(i)
-                            found_match = True
-                            break
-                    
-                    if not found_match:
-                        question['correct_answer'] = '0'  # Default to first option
-        elif answer_text.lower() in ['true', 'false']:
+                question['correct_answer'] = self._option_index(options, answer_text.strip().upper())
+        
+        elif answer in ('true', 'false'):
             # True/False without options
             question['question_type'] = 'true_false'
-            question['correct_answer'] = answer_text.lower()
+            question['correct_answer'] = answer
+        
         else:
             # Identification or essay question
             # First check for explicit labels in the question text
-            if 'essay' in question_text.lower() or 'explain' in question_text.lower() or 'describe' in question_text.lower() or 'discuss' in question_text.lower():
-                # Explicitly labeled as essay
+            if any(word in text for word in self.ESSAY_WORDS):
                 question['question_type'] = 'essay'
-                question['word_limit'] = 500
-            elif 'identification' in question_text.lower() or 'identify' in question_text.lower() or 'name' in question_text.lower() or 'what is' in question_text.lower():
-                # Explicitly labeled as identification
+            elif any(word in text for word in self.IDENTIFICATION_WORDS):
                 question['question_type'] = 'identification'
-            # If no explicit label, use heuristics
+            # If no explicit label, use heuristics: long or not a question is likely an essay
             elif len(question_text) > 200 or '?' not in question_text:
-                # Likely an essay based on length
                 question['question_type'] = 'essay'
-                question['word_limit'] = 500
             else:
-                # Default to identification
                 question['question_type'] = 'identification'
             
+            if question['question_type'] == 'essay':
+                question['word_limit'] = 500
             question['correct_answer'] = answer_text
         
-        questions.append(question)
\ No newline at end of file
+        questions.append(question)
+    
+    @staticmethod
+    def _option_index(options: List[str], answer: str) -> str:
+        """Index of the option named by a letter, a 1-based number or part of its text (default '0')"""
+        if len(answer) == 1 and 'A' <= answer <= 'Z':
+            # Convert letter to index (A=0, B=1, etc.)
+            index = ord(answer) - ord('A')
+        elif answer.isdigit():
+            index = int(answer) - 1
+        else:
+            # Try to match the answer text with an option
+            answer = answer.lower()
+            return next((str(i) for i, option in enumerate(options) if answer in option.lower()), '0')
+        return str(index) if 0 <= index < len(options) else '0'
+
+
+class _DocxTextTarget:
+    """XML parser target collecting the lines of a WordprocessingML body
+    
+    Each top-level paragraph becomes a line with its runs' text, tabs and
+    line breaks. Each row of a top-level table becomes one line of its cell
+    texts joined by ' | '. As python-docx reports them, a cell spanning
+    several columns is repeated, a vertically merged cell repeats the text
+    of the cell above, and nested tables are skipped. Paragraphs in text
+    boxes are part of the paragraph that anchors them.
+    """
+    
+    def __init__(self):
+        self.lines = []  # Finished lines, taken by the reader after every chunk
+        self._paragraph_depth = 0
+        self._table_depth = 0
+        self._in_text = False
+        self._parts = []
+        self._cell = []
+        self._row = []
+        self._previous_row = []
+        self._span = 1
+        self._merged = False
+    
+    def start(self, tag, attrib):
+        if tag == _W_T:
+            self._in_text = self._paragraph_depth > 0
+        elif tag == _W_P:
+            self._paragraph_depth += 1
+            if self._paragraph_depth == 1:
+                self._parts = []
+        elif tag in _W_RUN_CHARACTERS:
+            if self._paragraph_depth:
+                self._parts.append(_W_RUN_CHARACTERS[tag])
+        elif self._table_depth == 1 and tag == _W_TC:
+            self._cell = []
+            self._span = 1
+            self._merged = False
+        elif self._table_depth == 1 and tag == _W_TR:
+            self._row = []
+        elif tag == _W_TBL:
+            self._table_depth += 1
+            if self._table_depth == 1:
+                self._previous_row = []
+        elif self._table_depth == 1 and tag == _W_GRID_SPAN:
+            self._span = int(attrib.get(_W_VAL, 1))
+        elif self._table_depth == 1 and tag == _W_V_MERGE:
+            self._merged = attrib.get(_W_VAL, 'continue') == 'continue'
+    
+    def data(self, text):
+        if self._in_text:
+            self._parts.append(text)
+    
+    def end(self, tag):
+        if tag == _W_T:
+            self._in_text = False
+        elif tag == _W_P:
+            self._paragraph_depth -= 1
+            if self._paragraph_depth == 0:
+                text = ''.join(self._parts)
+                if self._table_depth == 0:
+                    self.lines.append(text)
+                elif self._table_depth == 1:
+                    self._cell.append(text)
+        elif self._table_depth == 1 and tag == _W_TC:
+            text = '\n'.join(self._cell)
+            if self._merged and len(self._previous_row) > len(self._row):
+                text = self._previous_row[len(self._row)]
+            self._row.extend([text] * self._span)
+        elif self._table_depth == 1 and tag == _W_TR:
+            self.lines.append(' | '.join(self._row))
+            self._previous_row = self._row
+        elif tag == _W_TBL:
+            self._table_depth -= 1
+    
+    def close(self):
+        return None
+
+
+class QuestionStreamParser:
+    """Incremental single-pass parser for question documents
+
+    A whole chunk of text is scanned with one multiline regular expression
+    that classifies each line once as a question, an option or an answer
+    (other lines are skipped by the scan itself), and the matches drive a
+    small state machine: no question / collecting options. Text can be fed
+    in arbitrary chunks (e.g. one PDF page at a time). Each call to feed()
+    returns the questions completed by that chunk; the question being parsed
+    and any unfinished line are carried over to the next call, so questions
+    that span a page boundary are not split.
+    """
+    
+    # One pattern for all line kinds, tried in order: question, option, answer.
+    # [^\S\n] is whitespace within a line, so a match never runs into the next one
+    LINE_PATTERN = re.compile(
+        r'^[^\S\n]*(?:'
+        r'(?:\d+\.?|[Qq]uestion[^\S\n]*\d*:?|[Qq]:?)[^\S\n]*(?P<question>.*\S)'
+        r'|[A-Za-z][^\S\n]*[.)][^\S\n]*(?P<option>.*\S)'
+        r'|(?ai:answer|correct answer|correct):(?P<answer>.*)'
+        r')[^\S\n]*$',
+        re.MULTILINE
+    )
+    
+    def __init__(self, processor: 'DocumentProcessor'):
+        self.processor = processor
+        self.current_question = None
+        self.current_options = []
+        self.question_number = 0
+        self._partial_line = ''
+    
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Parse a chunk of text and return the questions it completed"""
+        data = self._partial_line + text
+        end = data.rfind('\n')
+        if end < 0:
+            self._partial_line = data
+            return []
+        self._partial_line = data[end + 1:]
+        return self._parse(data, end)
+    
+    def close(self) -> List[Dict[str, Any]]:
+        """Finish parsing and return any remaining question"""
+        data, self._partial_line = self._partial_line, ''
+        completed = self._parse(data, len(data))
+        
+        # Add the last question if there is one
+        if self.current_question is not None:
+            self.processor._add_question_to_list(completed, self.current_question, self.current_options)
+            self.current_question = None
+            self.current_options = []
+        return completed
+    
+    def _parse(self, data: str, end: int) -> List[Dict[str, Any]]:
+        """Run the state machine over the complete lines in data[:end]"""
+        completed = []
+        question = self.current_question
+        options = self.current_options
+        add_question = self.processor._add_question_to_list
+        add_answered = self.processor._process_correct_answer
+        
+        for match in self.LINE_PATTERN.finditer(data, 0, end):
+            kind = match.lastgroup
+            if kind == 'question':
+                # A new question completes the previous one
+                if question is not None:
+                    add_question(completed, question, options)
+                self.question_number += 1
+                question = match.group('question').strip()
+                options = []
+            elif question is None:
+                # Options and answers outside a question are ignored
+                continue
+            elif kind == 'option':
+                options.append(match.group('option').strip())
+            else:
+                # The answer completes the question
+                add_answered(completed, question, options, match.group('answer').strip())
+                question = None
+                options = []
+        
+        self.current_question = question
+        self.current_options = options
+        return completed
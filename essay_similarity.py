@@ -0,0 +1,278 @@
+import re
+import random
+import struct
+import hashlib
+import zlib
+from itertools import combinations
+from models import db, Question, StudentSubmission, EssaySignature, EssayLSHBucket
+
+# Words per shingle; 5-word shingles ignore common short phrases but still
+# catch copied sentences with a few words changed
+SHINGLE_SIZE = 5
+
+# 32 bands of 4 rows puts the LSH threshold at roughly (1/32) ** (1/4) ~ 0.42,
+# so pairs with Jaccard similarity above ~0.5 are almost always candidates
+NUM_PERMUTATIONS = 128
+NUM_BANDS = 32
+
+# Pairs at or above this exact Jaccard similarity are reported
+SIMILARITY_THRESHOLD = 0.5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingle(text, size=SHINGLE_SIZE):
+    """Return the set of hashed word shingles of a text"""
+    words = re.findall(r'\w+', (text or '').lower())
+    if not words:
+        return set()
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))}
+    return {
+        zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def jaccard(a, b):
+    """Exact Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """Compute MinHash signatures with a fixed family of universal hash functions
+
+    The same seed must be used for every signature that is compared, so the
+    defaults are shared by the whole application.
+    """
+
+    def __init__(self, num_perm=NUM_PERMUTATIONS, seed=1):
+        self.num_perm = num_perm
+        rng = random.Random(seed)
+        self._params = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingles):
+        """Return the MinHash signature (a list of ints) of a shingle set"""
+        if not shingles:
+            return [_MAX_HASH] * self.num_perm
+        shingles = list(shingles)
+        return [
+            min([(a * x + b) % _MERSENNE_PRIME for x in shingles]) & _MAX_HASH
+            for a, b in self._params
+        ]
+
+
+def band_keys(signature, num_bands=NUM_BANDS):
+    """Split a signature into bands and return one bucket key per band"""
+    rows = len(signature) // num_bands
+    keys = []
+    for band in range(num_bands):
+        values = signature[band * rows:(band + 1) * rows]
+        digest = hashlib.blake2b(struct.pack(f'>{rows}I', *values), digest_size=8).hexdigest()
+        keys.append(f'{band}:{digest}')
+    return keys
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimate Jaccard similarity from two signatures"""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class LSHIndex:
+    """In-memory LSH index over MinHash signatures
+
+    Only keys that share at least one band bucket are compared, which keeps
+    candidate generation close to linear in the number of essays.
+    """
+
+    def __init__(self, num_bands=NUM_BANDS):
+        self.num_bands = num_bands
+        self._buckets = {}
+
+    def add(self, key, signature):
+        """Index a signature and return the keys already sharing a bucket with it"""
+        candidates = set()
+        for bucket_key in band_keys(signature, self.num_bands):
+            members = self._buckets.setdefault(bucket_key, [])
+            candidates.update(members)
+            members.append(key)
+        candidates.discard(key)
+        return candidates
+
+    def candidate_pairs(self):
+        """Return every pair of keys that share at least one bucket"""
+        pairs = set()
+        for members in self._buckets.values():
+            if len(members) > 1:
+                pairs.update(tuple(sorted(pair)) for pair in combinations(members, 2))
+        return pairs
+
+
+_default_hasher = None
+
+
+def get_minhasher():
+    """Return the shared MinHasher, creating it on first use"""
+    global _default_hasher
+    if _default_hasher is None:
+        _default_hasher = MinHasher()
+    return _default_hasher
+
+
+class EssaySimilarityService:
+    """Detect near-duplicate essay answers within a quiz using stored MinHash signatures"""
+
+    @staticmethod
+    def index_submission(submission, commit=True):
+        """Store the signature of an essay answer and return its near-duplicates
+
+        Only essays answering the same question are compared. Candidates come
+        from the LSH bucket table and are verified with exact Jaccard
+        similarity, so the cost does not grow with the number of pairs.
+
+        Returns:
+            List of dicts describing matching submissions, most similar first
+        """
+        shingles = shingle(submission.submitted_answer)
+        signature = get_minhasher().signature(shingles)
+        keys = band_keys(signature)
+
+        # An answer re-submitted by the same student replaces the old signature
+        stale = EssaySignature.query.filter_by(
+            question_id=submission.question_id,
+            student_id=submission.student_id
+        ).all()
+        for old in stale:
+            db.session.delete(old)
+        db.session.flush()
+
+        candidate_ids = [
+            row.signature_id for row in db.session.query(EssayLSHBucket.signature_id).filter(
+                EssayLSHBucket.question_id == submission.question_id,
+                EssayLSHBucket.bucket_key.in_(keys)
+            ).distinct()
+        ]
+
+        essay_signature = EssaySignature(
+            submission_id=submission.id,
+            question_id=submission.question_id,
+            student_id=submission.student_id,
+            signature=signature,
+            shingle_count=len(shingles)
+        )
+        essay_signature.buckets = [
+            EssayLSHBucket(question_id=submission.question_id, bucket_key=key) for key in keys
+        ]
+        db.session.add(essay_signature)
+
+        matches = EssaySimilarityService._verify_candidates(submission, shingles, candidate_ids)
+
+        if commit:
+            db.session.commit()
+        return matches
+
+    @staticmethod
+    def _verify_candidates(submission, shingles, candidate_ids):
+        """Compute exact Jaccard similarity against candidate signatures only"""
+        if not candidate_ids:
+            return []
+
+        rows = db.session.query(EssaySignature, StudentSubmission).join(
+            StudentSubmission, StudentSubmission.id == EssaySignature.submission_id
+        ).filter(EssaySignature.id.in_(candidate_ids)).all()
+
+        matches = []
+        for essay_signature, other in rows:
+            if other.student_id == submission.student_id:
+                continue
+            similarity = jaccard(shingles, shingle(other.submitted_answer))
+            if similarity >= SIMILARITY_THRESHOLD:
+                matches.append({
+                    'submission_id': other.id,
+                    'student_id': other.student_id,
+                    'question_id': other.question_id,
+                    'similarity': round(similarity, 3)
+                })
+        matches.sort(key=lambda match: match['similarity'], reverse=True)
+        return matches
+
+    @staticmethod
+    def index_quiz(quiz_id):
+        """Index any essay answers of a quiz that have no signature yet"""
+        indexed = db.session.query(EssaySignature.submission_id)
+        pending = StudentSubmission.query.join(
+            Question, Question.id == StudentSubmission.question_id
+        ).filter(
+            Question.quiz_id == quiz_id,
+            Question.question_type == 'essay',
+            StudentSubmission.submitted_answer != 'Missing',
+            ~StudentSubmission.id.in_(indexed)
+        ).all()
+
+        for submission in pending:
+            EssaySimilarityService.index_submission(submission, commit=False)
+        db.session.commit()
+        return len(pending)
+
+    @staticmethod
+    def find_similar_pairs(quiz_id):
+        """Return all near-duplicate essay pairs of a quiz
+
+        Signatures missing for older submissions are computed first; pairs
+        are then generated from shared LSH buckets and verified exactly.
+        """
+        EssaySimilarityService.index_quiz(quiz_id)
+
+        question_ids = [q.id for q in Question.query.filter_by(quiz_id=quiz_id, question_type='essay')]
+        if not question_ids:
+            return []
+
+        rows = db.session.query(
+            EssayLSHBucket.question_id, EssayLSHBucket.bucket_key, EssaySignature.submission_id
+        ).join(
+            EssaySignature, EssaySignature.id == EssayLSHBucket.signature_id
+        ).filter(EssayLSHBucket.question_id.in_(question_ids)).all()
+
+        buckets = {}
+        for question_id, bucket_key, submission_id in rows:
+            buckets.setdefault((question_id, bucket_key), []).append(submission_id)
+
+        candidate_pairs = set()
+        for members in buckets.values():
+            if len(members) > 1:
+                candidate_pairs.update(tuple(sorted(pair)) for pair in combinations(members, 2))
+        if not candidate_pairs:
+            return []
+
+        submission_ids = {sid for pair in candidate_pairs for sid in pair}
+        submissions = {
+            s.id: s for s in StudentSubmission.query.filter(StudentSubmission.id.in_(submission_ids))
+        }
+        shingle_cache = {}
+
+        pairs = []
+        for first_id, second_id in candidate_pairs:
+            first, second = submissions.get(first_id), submissions.get(second_id)
+            if not first or not second or first.student_id == second.student_id:
+                continue
+            for s in (first, second):
+                if s.id not in shingle_cache:
+                    shingle_cache[s.id] = shingle(s.submitted_answer)
+            similarity = jaccard(shingle_cache[first_id], shingle_cache[second_id])
+            if similarity >= SIMILARITY_THRESHOLD:
+                pairs.append({
+                    'question_id': first.question_id,
+                    'submission_ids': [first_id, second_id],
+                    'student_ids': [first.student_id, second.student_id],
+                    'similarity': round(similarity, 3)
+                })
+        pairs.sort(key=lambda pair: pair['similarity'], reverse=True)
+        return pairs
@@ -4,16 +4,19 @@ This module provides a separate workflow for importing questions from document f
 It includes dedicated routes and handlers for the document import process.
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify
 from flask_login import login_required, current_user
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed, FileRequired
 from wtforms import StringField, TextAreaField, SelectField, IntegerField, BooleanField
 from wtforms.validators import DataRequired, Length, Optional, NumberRange
-from models import db, Quiz, Question, Subject
+from models import db, Quiz, Question, Subject, ImportJob
 import os
 from werkzeug.utils import secure_filename
 from document_processor import DocumentProcessor
+from upload_store import UploadError
+from import_jobs import start_import_job
+from question_service import QuestionService
 
 # Create blueprint for document import functionality
 import_document_bp = Blueprint('import_document', __name__)
@@ -48,6 +51,14 @@ def import_document():
     
     if form.validate_on_submit():
         try:
+            # Save and check the upload first, so a rejected file leaves no empty quiz behind
+            processor = DocumentProcessor()
+            try:
+                file_path = processor.save_uploaded_file(form.document_file.data)
+            except UploadError as e:
+                flash(f'Error importing document: {str(e)}')
+                return render_template('import_document/import.html', form=form)
+            
             # Create the quiz
             quiz = Quiz(
                 title=form.title.data,
@@ -60,87 +71,18 @@ def import_document():
             db.session.add(quiz)
             db.session.commit()
             
-            # Create announcement for the new quiz
-            from models import Announcement
-            subject = Subject.query.get(form.subject_id.data)
-            announcement = Announcement(
-                title=f'New {quiz.quiz_type.capitalize()} Available',
-                content=f'A new {quiz.quiz_type} "{quiz.title}" has been created for {subject.name}.',
-                user_id=current_user.id,
-                subject_id=subject.id,
-                quiz_id=quiz.id,
-                announcement_type='quiz_created'
-            )
-            db.session.add(announcement)
-            db.session.commit()
-            
-            # Process the document file
-            if not form.document_file.data:
-                flash('Please upload a document file.')
-                return render_template('import_document/import.html', form=form)
-            
-            # Create upload directory
-            upload_dir = os.path.join('uploads', 'documents')
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir, exist_ok=True)
-            
-            # Initialize document processor
-            processor = DocumentProcessor()
-            
-            # Save the uploaded file
-            file = form.document_file.data
-            file_path = processor.save_uploaded_file(file, upload_dir)
-            
-            # Process the file to extract questions
-            print(f"Processing document with AI: {form.use_ai.data}")
-            questions_data, error = processor.process_file(file_path, use_ai=form.use_ai.data)
-            
-            # Log the result for debugging
-            print(f"Document processing result: {len(questions_data)} questions extracted, error: {error}")
-            
-            if error:
-                flash(f'Warning: {error} - Proceeding with extracted questions.')
-                if not questions_data:
-                    flash('No questions could be extracted from the document.')
-                    db.session.delete(quiz)
-                    db.session.commit()
-                    return render_template('import_document/import.html', form=form)
-            
-            if not questions_data:
-                flash('No questions were found in the document.')
-                db.session.delete(quiz)
-                db.session.commit()
-                return render_template('import_document/import.html', form=form)
-            
-            # Save the extracted questions
-            for index, q_data in enumerate(questions_data):
-                question = Question(
-                    quiz_id=quiz.id,
-                    question_text=q_data.get('question_text', 'No question text'),
-                    question_type=q_data.get('question_type', 'essay'),
-                    options=q_data.get('options'),
-                    correct_answer=q_data.get('correct_answer', ''),
-                    points=float(q_data.get('points', 1.0)),
-                    order_index=index,
-                    user_id=current_user.id
-                )
-                
-                if q_data.get('question_type') == 'essay' and 'word_limit' in q_data:
-                    question.word_limit = q_data.get('word_limit')
-                    
-                db.session.add(question)
-            
-            db.session.commit()
-            flash(f'Successfully imported {len(questions_data)} questions from the document.')
+            # Extract the questions in the background; the review page polls the job.
+            # The quiz is announced by the job once its questions are in.
+            print(f"Queueing document import with AI: {form.use_ai.data}")
+            job = start_import_job(quiz, file_path, form.use_ai.data, current_user.id)
             
             # Store quiz info in session for the review page
             session['imported_quiz'] = {
                 'quiz_id': quiz.id,
-                'question_count': len(questions_data)
+                'job_id': job.id
             }
             session.modified = True
             
-            # Redirect to the review page
             return redirect(url_for('import_document.review_questions', quiz_id=quiz.id))
             
         except Exception as e:
@@ -158,20 +100,94 @@ def review_questions(quiz_id):
         return redirect(url_for('dashboard'))
     
     # Get the quiz
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     if quiz.user_id != current_user.id:
         flash('You do not have permission to view this quiz.')
         return redirect(url_for('dashboard'))
     
     # Get all questions for this quiz
-    questions = Question.query.filter_by(quiz_id=quiz_id).all()
+    questions = Question.query.filter_by(quiz_id=quiz_id).order_by(Question.order_index).all()
+    job = ImportJob.query.filter_by(quiz_id=quiz_id).order_by(ImportJob.created_at.desc()).first()
     
-    # Check if we have questions
-    if not questions:
+    # Check if we have questions (or are still extracting them)
+    if not questions and not (job and job.is_active):
         flash('No questions were found for this quiz.')
         return redirect(url_for('dashboard'))
     
-    return render_template('import_document/review.html', quiz=quiz, questions=questions)
+    # Questions that repeat ones already in the teacher's bank
+    duplicates = {}
+    if job and not job.is_active:
+        duplicates = QuestionService.find_duplicates(quiz, job.merged_question_ids or [])
+    
+    return render_template('import_document/review.html', quiz=quiz, questions=questions, job=job,
+                           duplicates=duplicates)
+
+@import_document_bp.route('/review/<int:quiz_id>/duplicates', methods=['POST'])
+@login_required
+def resolve_duplicates(quiz_id):
+    """Merge or skip imported questions that are already in the question bank"""
+    if current_user.role != 'teacher':
+        flash('Only teachers can review imported questions.')
+        return redirect(url_for('dashboard'))
+    
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
+    if quiz.user_id != current_user.id:
+        flash('You do not have permission to modify this quiz.')
+        return redirect(url_for('dashboard'))
+    
+    job = ImportJob.query.filter_by(quiz_id=quiz_id).order_by(ImportJob.created_at.desc()).first()
+    if not job or job.is_active:
+        flash('Duplicates can be resolved once the import has finished.')
+        return redirect(url_for('import_document.review_questions', quiz_id=quiz_id))
+    
+    action = request.form.get('action')
+    question_id = request.form.get('question_id', type=int)
+    merged_ids = job.merged_question_ids or []
+    success, message, resolved_ids = QuestionService.resolve_duplicates(
+        quiz,
+        action,
+        [question_id] if question_id else None,
+        merged_ids
+    )
+    if success and action == 'merge':
+        # Merged questions stay in the quiz and are not reported again
+        job.merged_question_ids = merged_ids + resolved_ids
+        db.session.commit()
+    flash(message)
+    
+    # Skipping every question leaves nothing to review
+    if success and Question.query.filter_by(quiz_id=quiz_id).count() == 0:
+        db.session.delete(quiz)
+        db.session.commit()
+        flash('Quiz deleted as it had no questions.')
+        return redirect(url_for('dashboard'))
+    
+    return redirect(url_for('import_document.review_questions', quiz_id=quiz_id))
+
+@import_document_bp.route('/jobs/<job_id>', methods=['GET'])
+@login_required
+def import_job_status(job_id):
+    """Progress of a background import, with the questions saved after index `after`"""
+    job = ImportJob.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        return jsonify({'error': 'You do not have permission to view this import.'}), 403
+    
+    after = request.args.get('after', 0, type=int)
+    questions = []
+    if job.quiz_id:
+        questions = Question.query.filter(
+            Question.quiz_id == job.quiz_id,
+            Question.order_index >= after
+        ).order_by(Question.order_index).all()
+    
+    result = job.to_dict()
+    result['questions'] = [{
+        'id': question.id,
+        'order_index': question.order_index,
+        'question_text': question.question_text,
+        'question_type': question.question_type
+    } for question in questions]
+    return jsonify(result)
 
 @import_document_bp.route('/update_question/<int:question_id>', methods=['POST'])
 @login_required
@@ -183,7 +199,7 @@ def update_question(question_id):
     
     # Get the question
     question = Question.query.get_or_404(question_id)
-    quiz = Quiz.query.get_or_404(question.quiz_id)
+    quiz = Quiz.query.filter_by(id=question.quiz_id, deleted_at=None).first_or_404()
     
     if quiz.user_id != current_user.id:
         flash('You do not have permission to modify this question.')
@@ -234,7 +250,7 @@ def delete_question(question_id):
     
     # Get the question
     question = Question.query.get_or_404(question_id)
-    quiz = Quiz.query.get_or_404(question.quiz_id)
+    quiz = Quiz.query.filter_by(id=question.quiz_id, deleted_at=None).first_or_404()
     
     if quiz.user_id != current_user.id:
         flash('You do not have permission to delete this question.')
@@ -273,7 +289,7 @@ def add_question(quiz_id):
         return redirect(url_for('dashboard'))
     
     # Get the quiz
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     if quiz.user_id != current_user.id:
         flash('You do not have permission to modify this quiz.')
         return redirect(url_for('dashboard'))
@@ -325,23 +341,17 @@ def add_question(quiz_id):
             # Set default points if not provided
             points = form.points.data or 1
             
-            question = Question(
-                question_text=form.question_text.data,
-                question_type=form.question_type.data,
-                options=options,
-                correct_answer=correct_answer,
-                points=points,
-                order_index=question_count,
-                user_id=current_user.id,
-                quiz_id=quiz_id
-            )
-            
-            # Set word_limit if it's an essay question
-            if form.question_type.data == 'essay' and word_limit:
-                question.word_limit = word_limit
-                
-            db.session.add(question)
-            db.session.commit()
+            success, message, _ = QuestionService.add_questions(quiz, [{
+                'question_text': form.question_text.data,
+                'question_type': form.question_type.data,
+                'options': options,
+                'correct_answer': correct_answer,
+                'points': points,
+                'word_limit': word_limit if form.question_type.data == 'essay' and word_limit else None
+            }], current_user.id, start_index=question_count)
+            if not success:
+                flash(message)
+                return render_template('import_document/add_question.html', form=form, quiz=quiz)
             
             flash('Question added successfully!')
             return redirect(url_for('import_document.review_questions', quiz_id=quiz_id))
@@ -361,7 +371,7 @@ def finish_import(quiz_id):
         return redirect(url_for('dashboard'))
     
     # Get the quiz
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     if quiz.user_id != current_user.id:
         flash('You do not have permission to modify this quiz.')
         return redirect(url_for('dashboard'))
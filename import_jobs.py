@@ -0,0 +1,229 @@
+"""Background document import jobs
+
+Uploading a document creates the quiz and an ImportJob row and returns at
+once; the questions are extracted in a worker thread and saved to the
+quiz as they are parsed, while the review page polls the job for progress.
+Questions the teacher already has are counted as they are saved, so the
+review page can offer to merge or skip them. Questions that cannot be saved
+even with the import defaults are skipped and listed in the job's warning.
+A job whose quiz is deleted while it runs stops before saving more
+questions; the purge removes the rest. Jobs whose worker process exited
+before they finished are failed by fail_interrupted_jobs, like a job that
+failed while it ran.
+"""
+import os
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from models import db, ImportJob, Quiz, Question, Subject, Announcement
+from document_processor import DocumentProcessor
+from question_service import QuestionService
+from job_workers import current_worker, worker_alive
+
+IMPORT_JOB_WORKERS = int(os.environ.get('IMPORT_JOB_WORKERS', 2))
+
+_executor = ThreadPoolExecutor(max_workers=IMPORT_JOB_WORKERS, thread_name_prefix='import-job')
+_futures = {}
+_futures_lock = threading.Lock()
+
+
+class QuizDeletedError(Exception):
+    """Raised when the quiz of a running job was deleted"""
+
+
+def _check_quiz(quiz_id):
+    row = db.session.execute(select(Quiz.deleted_at).where(Quiz.id == quiz_id)).first()
+    if row is None or row.deleted_at is not None:
+        raise QuizDeletedError('The quiz was deleted during the import.')
+
+
+def start_import_job(quiz, file_path, use_ai, user_id, announce=True):
+    """Queue extraction of a saved upload into a quiz
+    
+    Args:
+        quiz: The (already committed) quiz the questions belong to
+        file_path: Path of the saved upload
+        use_ai: Whether to use AI to extract questions
+        user_id: The teacher importing the document
+        announce: Whether to announce the quiz once questions were imported
+    
+    Returns:
+        ImportJob: The queued job; its id is used to poll progress
+    """
+    job = ImportJob(
+        id=uuid.uuid4().hex,
+        quiz_id=quiz.id,
+        user_id=user_id,
+        file_path=file_path,
+        use_ai=bool(use_ai),
+        worker=current_worker()
+    )
+    db.session.add(job)
+    db.session.commit()
+    
+    app = current_app._get_current_object()
+    future = _executor.submit(run_import_job, app, job.id, announce)
+    with _futures_lock:
+        _futures[job.id] = future
+    future.add_done_callback(lambda _: _forget(job.id))
+    return job
+
+
+def _forget(job_id):
+    with _futures_lock:
+        _futures.pop(job_id, None)
+
+
+def wait_for_job(job_id, timeout=None):
+    """Block until a job started in this process has finished"""
+    with _futures_lock:
+        future = _futures.get(job_id)
+    if future:
+        future.result(timeout)
+
+
+def _fail_job(job, error):
+    """Mark a job as failed and remove the half-created quiz with the questions saved so far"""
+    if job.quiz_id is not None:
+        Question.query.filter_by(quiz_id=job.quiz_id).delete()
+        quiz = db.session.get(Quiz, job.quiz_id)
+        job.quiz_id = None
+        if quiz:
+            db.session.delete(quiz)
+    job.status = 'failed'
+    job.error = error
+    job.question_count = 0
+    job.duplicate_count = 0
+    job.finished_at = datetime.utcnow()
+
+
+def fail_interrupted_jobs(app):
+    """Fail the jobs whose worker process exited before they finished
+    
+    Called at startup. Jobs still running in another live worker are left
+    alone; the quizzes of the others are removed as for any failed job.
+    """
+    with app.app_context():
+        jobs = ImportJob.query.filter(ImportJob.status.in_(('queued', 'running'))).all()
+        jobs = [job for job in jobs if not worker_alive(job.worker)]
+        for job in jobs:
+            _fail_job(job, 'The import was interrupted by a restart; upload the document again')
+        db.session.commit()
+    return len(jobs)
+
+
+def run_import_job(app, job_id, announce=True):
+    """Extract the questions of a job and save them to its quiz
+    
+    Questions parsed so far are committed after every PDF page, so the
+    review page can show them before the whole document is done. On
+    failure the half-created quiz is removed.
+    """
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        if not job or not job.is_active:
+            return
+        quiz = db.session.get(Quiz, job.quiz_id)
+        if not quiz or quiz.deleted_at is not None:
+            job.status = 'failed'
+            job.error = 'The quiz was deleted before the import started.'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            return
+        job.status = 'running'
+        db.session.commit()
+        
+        pending = []
+        consumed = 0
+        saved = 0
+        duplicates = 0
+        skipped = []
+        known = QuestionService.bank_fingerprints(job.user_id, exclude_quiz_id=quiz.id)
+        
+        def save_pending():
+            # One INSERT for everything parsed since the last save
+            nonlocal consumed, saved, duplicates
+            if pending:
+                _check_quiz(quiz.id)
+                _, _, created = QuestionService.add_questions(
+                    quiz, pending, job.user_id, start_index=saved,
+                    normalize=True, skip_invalid=True, commit=False
+                )
+                for position, q_data in enumerate(pending, consumed + 1):
+                    _, problem = QuestionService.validate(QuestionService.normalize(q_data))
+                    if problem:
+                        skipped.append(f'Question {position}: {problem}')
+                for question in created:
+                    if question.fingerprint in known:
+                        duplicates += 1
+                    known.add(question.fingerprint)
+                consumed += len(pending)
+                saved += len(created)
+                pending.clear()
+            job.question_count = saved
+            job.duplicate_count = duplicates
+        
+        def on_page(page, total_pages, question_count):
+            save_pending()
+            job.pages_done = page
+            job.total_pages = total_pages
+            db.session.commit()
+        
+        try:
+            processor = DocumentProcessor()
+            questions, error = processor.process_file(
+                job.file_path,
+                use_ai=job.use_ai,
+                progress_callback=on_page,
+                question_callback=pending.append
+            )
+            if processor.last_cache_hit:
+                print(f"Import job {job_id}: reused the cached parse result")
+            
+            # Questions not streamed page by page are saved now
+            pending[:] = questions[consumed:]
+            save_pending()
+            
+            if not saved:
+                raise ValueError(error or 'No questions were found in the document.')
+            
+            if announce:
+                subject = db.session.get(Subject, quiz.subject_id)
+                db.session.add(Announcement(
+                    title=f'New {quiz.quiz_type.capitalize()} Available',
+                    content=f'A new {quiz.quiz_type} "{quiz.title}" has been created for {subject.name}.',
+                    user_id=job.user_id,
+                    subject_id=subject.id,
+                    quiz_id=quiz.id,
+                    announcement_type='quiz_created'
+                ))
+            
+            if skipped:
+                warning = f'Skipped {len(skipped)} question(s) that could not be saved: ' + '; '.join(skipped)
+                error = f'{error}; {warning}' if error else warning
+            
+            job.status = 'completed'
+            job.error = error  # A warning, e.g. AI extraction fell back to regex
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+        
+        except QuizDeletedError as e:
+            print(f"Import job {job_id} stopped: {str(e)}")
+            db.session.rollback()
+            # The quiz and the questions saved so far are left to the purge
+            job = db.session.get(ImportJob, job_id)
+            if job:
+                job.status = 'failed'
+                job.error = str(e)
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+        
+        except Exception as e:
+            print(f"Import job {job_id} failed: {str(e)}")
+            db.session.rollback()
+            job = db.session.get(ImportJob, job_id)
+            _fail_job(job, str(e))
+            db.session.commit()
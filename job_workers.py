@@ -0,0 +1,37 @@
+"""Which process runs a background job
+
+Import jobs run in worker threads of the process that accepted the upload.
+Each job records that process as "<host>:<pid>:<start time>", so a process
+starting up can tell the jobs of a worker that crashed or was restarted from
+the jobs another worker of the same server is still running. The start time
+keeps a reused pid from passing for the process that owned the job.
+"""
+import os
+import socket
+import psutil
+
+
+def current_worker():
+    """The owner string for jobs started by this process"""
+    pid = os.getpid()
+    return f'{socket.gethostname()}:{pid}:{psutil.Process(pid).create_time():.0f}'
+
+
+def worker_alive(worker):
+    """Whether the process recorded as a job's owner is still running
+
+    Jobs without an owner were started before owners were recorded and are
+    treated as orphaned. Jobs owned by another host are assumed to be alive,
+    since that host's processes cannot be checked from here.
+    """
+    if not worker:
+        return False
+    host, pid, started = worker.rsplit(':', 2)
+    if host != socket.gethostname():
+        return True
+    try:
+        return f'{psutil.Process(int(pid)).create_time():.0f}' == started
+    except (psutil.NoSuchProcess, psutil.ZombieProcess, ValueError):
+        return False
+    except psutil.AccessDenied:
+        return True
@@ -0,0 +1,65 @@
+"""Migration script to add question fingerprints for duplicate detection on import"""
+import os
+import sys
+from flask import Flask
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import db, Question
+
+app = Flask(__name__)
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'users.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+
+BATCH_SIZE = 1000
+
+
+def column_names(table):
+    return [row[1] for row in db.session.execute(text(f"PRAGMA table_info({table})"))]
+
+
+def add_question_fingerprint():
+    """Add question.fingerprint with its per-teacher index and fill it for existing questions"""
+    with app.app_context():
+        try:
+            if 'fingerprint' not in column_names('question'):
+                db.session.execute(text("""ALTER TABLE question ADD COLUMN fingerprint VARCHAR(40)"""))
+                print("Successfully added 'fingerprint' column to question table.")
+            else:
+                print("Column 'fingerprint' already exists.")
+            db.session.execute(text(
+                """CREATE INDEX IF NOT EXISTS ix_question_user_fingerprint ON question (user_id, fingerprint)"""
+            ))
+            
+            import_job_columns = column_names('import_job')
+            if import_job_columns and 'duplicate_count' not in import_job_columns:
+                db.session.execute(text("""ALTER TABLE import_job ADD COLUMN duplicate_count INTEGER NOT NULL DEFAULT 0"""))
+                print("Successfully added 'duplicate_count' column to import_job table.")
+            if import_job_columns and 'merged_question_ids' not in import_job_columns:
+                db.session.execute(text("""ALTER TABLE import_job ADD COLUMN merged_question_ids JSON"""))
+                print("Successfully added 'merged_question_ids' column to import_job table.")
+            db.session.commit()
+            
+            # Backfill in batches; ids are read first since updated rows drop out of the filter
+            ids = db.session.scalars(db.select(Question.id).where(Question.fingerprint.is_(None))).all()
+            for start in range(0, len(ids), BATCH_SIZE):
+                rows = db.session.execute(
+                    db.select(Question.id, Question.question_text, Question.options)
+                    .where(Question.id.in_(ids[start:start + BATCH_SIZE]))
+                ).all()
+                db.session.execute(db.update(Question), [
+                    {'id': row.id, 'fingerprint': Question.make_fingerprint(row.question_text, row.options)}
+                    for row in rows
+                ])
+                db.session.commit()
+            print(f"Filled in fingerprints for {len(ids)} question(s).")
+            print("Migration completed successfully.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error: {str(e)}")
+
+
+if __name__ == '__main__':
+    add_question_fingerprint()
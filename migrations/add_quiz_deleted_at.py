@@ -0,0 +1,36 @@
+"""Migration script to add quiz.deleted_at for soft-deleting quizzes"""
+import os
+import sys
+from flask import Flask
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import db
+
+app = Flask(__name__)
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'users.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+
+
+def add_quiz_deleted_at():
+    """Add the nullable quiz.deleted_at column and its index; existing quizzes stay visible"""
+    with app.app_context():
+        try:
+            columns = [row[1] for row in db.session.execute(text("PRAGMA table_info(quiz)"))]
+            if 'deleted_at' not in columns:
+                db.session.execute(text("""ALTER TABLE quiz ADD COLUMN deleted_at DATETIME"""))
+                print("Successfully added 'deleted_at' column to quiz table.")
+            else:
+                print("Column 'deleted_at' already exists.")
+            db.session.execute(text("""CREATE INDEX IF NOT EXISTS ix_quiz_deleted_at ON quiz (deleted_at)"""))
+            db.session.commit()
+            print("Migration completed successfully.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error: {str(e)}")
+
+
+if __name__ == '__main__':
+    add_quiz_deleted_at()
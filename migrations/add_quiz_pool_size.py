@@ -0,0 +1,35 @@
+"""Migration script to add quiz.pool_size for per-student question pools"""
+import os
+import sys
+from flask import Flask
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import db
+
+app = Flask(__name__)
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'users.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+
+
+def add_quiz_pool_size():
+    """Add the nullable quiz.pool_size column; existing quizzes keep using all their questions"""
+    with app.app_context():
+        try:
+            columns = [row[1] for row in db.session.execute(text("PRAGMA table_info(quiz)"))]
+            if 'pool_size' not in columns:
+                db.session.execute(text("""ALTER TABLE quiz ADD COLUMN pool_size INTEGER"""))
+                db.session.commit()
+                print("Successfully added 'pool_size' column to quiz table.")
+            else:
+                print("Column 'pool_size' already exists.")
+            print("Migration completed successfully.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error: {str(e)}")
+
+
+if __name__ == '__main__':
+    add_quiz_pool_size()
@@ -0,0 +1,35 @@
+"""Migration script to add quiz_submission.question_ids, the questions drawn when an attempt started"""
+import os
+import sys
+from flask import Flask
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import db
+
+app = Flask(__name__)
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'users.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+
+
+def add_quiz_submission_question_ids():
+    """Add the nullable quiz_submission.question_ids column; existing attempts are drawn again until stored"""
+    with app.app_context():
+        try:
+            columns = [row[1] for row in db.session.execute(text("PRAGMA table_info(quiz_submission)"))]
+            if 'question_ids' not in columns:
+                db.session.execute(text("""ALTER TABLE quiz_submission ADD COLUMN question_ids JSON"""))
+                db.session.commit()
+                print("Successfully added 'question_ids' column to quiz_submission table.")
+            else:
+                print("Column 'question_ids' already exists.")
+            print("Migration completed successfully.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error: {str(e)}")
+
+
+if __name__ == '__main__':
+    add_quiz_submission_question_ids()
@@ -0,0 +1,37 @@
+"""Migration script to add roster_import_job.worker, the process that runs a background roster import"""
+import os
+import sys
+from flask import Flask
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import db
+
+app = Flask(__name__)
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'users.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+
+
+def add_roster_import_job_worker():
+    """Add the nullable roster_import_job.worker column; jobs without one count as interrupted"""
+    with app.app_context():
+        try:
+            columns = [row[1] for row in db.session.execute(text("PRAGMA table_info(roster_import_job)"))]
+            if not columns:
+                print("Table 'roster_import_job' does not exist yet; it is created with the column.")
+            elif 'worker' not in columns:
+                db.session.execute(text("""ALTER TABLE roster_import_job ADD COLUMN worker VARCHAR(100)"""))
+                db.session.commit()
+                print("Successfully added 'worker' column to roster_import_job table.")
+            else:
+                print("Column 'worker' already exists.")
+            print("Migration completed successfully.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error: {str(e)}")
+
+
+if __name__ == '__main__':
+    add_roster_import_job_worker()
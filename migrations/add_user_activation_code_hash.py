@@ -0,0 +1,35 @@
+"""Migration script to add user.activation_code_hash for accounts created by roster imports"""
+import os
+import sys
+from flask import Flask
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import db
+
+app = Flask(__name__)
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'users.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+
+
+def add_user_activation_code_hash():
+    """Add the nullable user.activation_code_hash column; existing accounts keep their passwords"""
+    with app.app_context():
+        try:
+            columns = [row[1] for row in db.session.execute(text("PRAGMA table_info(user)"))]
+            if 'activation_code_hash' not in columns:
+                db.session.execute(text("""ALTER TABLE user ADD COLUMN activation_code_hash VARCHAR(64)"""))
+                db.session.commit()
+                print("Successfully added 'activation_code_hash' column to user table.")
+            else:
+                print("Column 'activation_code_hash' already exists.")
+            print("Migration completed successfully.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error: {str(e)}")
+
+
+if __name__ == '__main__':
+    add_user_activation_code_hash()
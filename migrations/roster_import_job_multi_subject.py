@@ -0,0 +1,43 @@
+"""Migration script to let roster import jobs cover all of a teacher's subjects
+
+roster_import_job.subject_id becomes nullable and subject_codes is added.
+SQLite cannot drop a NOT NULL constraint in place, and the table only holds
+the progress of recent imports, so it is recreated empty.
+"""
+import os
+import sys
+from flask import Flask
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models import db, RosterImportJob
+
+app = Flask(__name__)
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'users.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+
+
+def roster_import_job_multi_subject():
+    """Recreate roster_import_job with the new schema unless it already has it"""
+    with app.app_context():
+        try:
+            columns = {row[1]: row for row in db.session.execute(text("PRAGMA table_info(roster_import_job)"))}
+            if 'subject_codes' in columns:
+                print("Table 'roster_import_job' is already up to date.")
+            else:
+                if columns:
+                    db.session.execute(text("DROP TABLE roster_import_job"))
+                    db.session.commit()
+                    print("Dropped the old 'roster_import_job' table.")
+                RosterImportJob.__table__.create(db.engine)
+                print("Successfully created 'roster_import_job' table.")
+            print("Migration completed successfully.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error: {str(e)}")
+
+
+if __name__ == '__main__':
+    roster_import_job_multi_subject()
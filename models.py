@@ -2,8 +2,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 import hashlib
+import hmac
 from datetime import datetime
 import json
+from sqlalchemy import event
 
 db = SQLAlchemy()
 
@@ -16,7 +18,9 @@ class Subject(db.Model):
     
     teacher = db.relationship('User', backref='subjects_taught', foreign_keys=[teacher_id])
     enrolled_students = db.relationship('User', secondary='student_subjects', backref='enrolled_subjects', overlaps="student_enrollments,subject_enrollments")
-    quizzes = db.relationship('Quiz', backref='subject', lazy=True)
+    # Deleted quizzes are hidden here while they wait to be purged
+    quizzes = db.relationship('Quiz', lazy=True, viewonly=True,
+                              primaryjoin='and_(Subject.id == Quiz.subject_id, Quiz.deleted_at.is_(None))')
 
 class StudentSubject(db.Model):
     __tablename__ = 'student_subjects'
@@ -34,6 +38,8 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
     role = db.Column(db.String(20), nullable=False, default='student')
+    # SHA-256 of the one-time code of an imported account that has no password yet
+    activation_code_hash = db.Column(db.String(64), nullable=True)
     questions = db.relationship('Question', backref='author', lazy=True)
     submissions = db.relationship('StudentSubmission', backref='student', lazy=True)
     announcements = db.relationship('Announcement', backref='creator', lazy=True)
@@ -43,6 +49,8 @@ class User(UserMixin, db.Model):
         self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
 
     def check_password(self, password):
+        if not self.password_hash:
+            return False  # Not activated yet
         # For existing passwords that might be using scrypt, we need to handle the error
         try:
             return check_password_hash(self.password_hash, password)
@@ -53,6 +61,25 @@ class User(UserMixin, db.Model):
             # Re-raise other errors
             raise
 
+    @staticmethod
+    def hash_activation_code(code):
+        # The codes are random, so a fast hash is enough
+        return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+    @property
+    def needs_activation(self):
+        return not self.password_hash and self.activation_code_hash is not None
+
+    def check_activation_code(self, code):
+        # Codes are issued in lower case; accept them however they are typed
+        return self.needs_activation and hmac.compare_digest(
+            self.activation_code_hash, self.hash_activation_code(code.strip().lower()))
+
+    def activate(self, password):
+        """Set the first password of an imported account and retire its activation code"""
+        self.set_password(password)
+        self.activation_code_hash = None
+
     def __repr__(self):
         return f'<User {self.username}>'
 
@@ -64,9 +91,12 @@ class Quiz(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+    subject = db.relationship('Subject', foreign_keys=[subject_id])
     questions = db.relationship('Question', backref='quiz', lazy=True, order_by='Question.order_index')
     duration = db.Column(db.Integer, nullable=True)  # Duration in minutes
     start_time = db.Column(db.DateTime, nullable=True)  # When the quiz becomes available
+    pool_size = db.Column(db.Integer, nullable=True)  # Questions drawn per student; all when empty
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)  # Set on delete; quiz_purge removes the rows later
     
     def __repr__(self):
         return f'<Quiz {self.title}>'
@@ -83,8 +113,27 @@ class Question(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=True)
+    fingerprint = db.Column(db.String(40), nullable=True)  # Hash of normalized text and options, see make_fingerprint
     submissions = db.relationship('StudentSubmission', backref='question_obj', lazy=True, cascade='all, delete-orphan')
 
+    # Duplicate detection looks fingerprints up within one teacher's question bank
+    __table_args__ = (db.Index('ix_question_user_fingerprint', 'user_id', 'fingerprint'),)
+
+    @staticmethod
+    def make_fingerprint(question_text, options=None):
+        """Hash of the lowercased question text plus its sorted options
+        
+        Questions that differ only in case, spacing or option order get the
+        same fingerprint.
+        """
+        def normalize(value):
+            return ' '.join(str(value).lower().split())
+        
+        parts = [normalize(question_text or '')]
+        if isinstance(options, list):
+            parts.extend(sorted(normalize(option) for option in options if option))
+        return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
 
     def validate_answer(self, submitted_answer):
         """Validate a submitted answer against the correct answer
@@ -150,6 +199,12 @@ class Question(db.Model):
     def __repr__(self):
         return f'<Question {self.question_text[:20]}...>'
 
+@event.listens_for(Question, 'before_insert')
+@event.listens_for(Question, 'before_update')
+def _set_question_fingerprint(mapper, connection, question):
+    """Keep the fingerprint in sync when a question is added or edited"""
+    question.fingerprint = Question.make_fingerprint(question.question_text, question.options)
+
 
 
 class QuizSubmission(db.Model):
@@ -164,11 +219,35 @@ class QuizSubmission(db.Model):
     visible_to_students = db.Column(db.Boolean, nullable=False, default=False)
     show_answers = db.Column(db.Boolean, nullable=False, default=False)  # Control whether students can see correct answers
     feedback = db.Column(db.Text, nullable=True)
+    question_ids = db.Column(db.JSON, nullable=True)  # Questions drawn when the attempt started
     
     student = db.relationship('User', backref='quiz_submissions')
     quiz = db.relationship('Quiz', backref='submissions')
     question_submissions = db.relationship('StudentSubmission', backref='quiz_submission', lazy=True, cascade='all, delete-orphan')
 
+    @property
+    def questions(self):
+        """The questions this student was given (all of them unless the quiz draws from a pool)"""
+        if self.question_submissions:
+            return sorted((submission.question for submission in self.question_submissions),
+                          key=lambda question: question.order_index)
+        if self.question_ids is not None:
+            question_ids = set(self.question_ids)
+            return [question for question in self.quiz.questions if question.id in question_ids]
+        from quiz_shuffle import sample_questions
+        return sample_questions(self.quiz, self.student_id)
+
+    @property
+    def max_score(self):
+        """Points available on the questions this student was given"""
+        return sum(question.points for question in self.questions)
+
+    @property
+    def percentage(self):
+        """total_score as a percentage of max_score, comparable across pool samples"""
+        max_score = self.max_score
+        return round(self.total_score / max_score * 100, 1) if max_score else 0.0
+
 class Announcement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -205,4 +284,139 @@ class StudentSubmission(db.Model):
     question = db.relationship('Question', backref=db.backref('student_submissions', overlaps='submissions,question_obj'), foreign_keys=[question_id])
 
     def __repr__(self):
-        return f'<StudentSubmission {self.student_id}-{self.question_id}>'
\ No newline at end of file
+        return f'<StudentSubmission {self.student_id}-{self.question_id}>'
+
+class EssaySignature(db.Model):
+    """MinHash signature of an essay answer, stored so new submissions are checked incrementally"""
+    id = db.Column(db.Integer, primary_key=True)
+    submission_id = db.Column(db.Integer, db.ForeignKey('student_submission.id'), unique=True, nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False, index=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    signature = db.Column(db.JSON, nullable=False)  # List of MinHash values
+    shingle_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    buckets = db.relationship('EssayLSHBucket', backref='essay_signature', lazy=True, cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f'<EssaySignature {self.submission_id}>'
+
+class EssayLSHBucket(db.Model):
+    """LSH band bucket of an essay signature; essays sharing a bucket are candidate duplicates"""
+    id = db.Column(db.Integer, primary_key=True)
+    signature_id = db.Column(db.Integer, db.ForeignKey('essay_signature.id'), nullable=False, index=True)
+    question_id = db.Column(db.Integer, nullable=False)
+    bucket_key = db.Column(db.String(40), nullable=False)  # '<band>:<hash of band values>'
+
+    __table_args__ = (db.Index('ix_essay_lsh_bucket_lookup', 'question_id', 'bucket_key'),)
+
+class StylometricProfile(db.Model):
+    """Running statistics of a student's essay style, updated with Welford's algorithm"""
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), unique=True, nullable=False)
+    essay_count = db.Column(db.Integer, nullable=False, default=0)
+    # Running mean and sum of squared deviations (M2) for each feature
+    sentence_length_mean = db.Column(db.Float, nullable=False, default=0.0)
+    sentence_length_m2 = db.Column(db.Float, nullable=False, default=0.0)
+    lexical_diversity_mean = db.Column(db.Float, nullable=False, default=0.0)
+    lexical_diversity_m2 = db.Column(db.Float, nullable=False, default=0.0)
+    phrase_rate_mean = db.Column(db.Float, nullable=False, default=0.0)
+    phrase_rate_m2 = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    student = db.relationship('User', backref=db.backref('stylometric_profile', uselist=False))
+
+    def __repr__(self):
+        return f'<StylometricProfile {self.student_id} ({self.essay_count} essays)>'
+
+class StylometricSample(db.Model):
+    """Style features of one graded essay; marks the essay as folded into the profile"""
+    id = db.Column(db.Integer, primary_key=True)
+    submission_id = db.Column(db.Integer, db.ForeignKey('student_submission.id'), unique=True, nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    sentence_length = db.Column(db.Float, nullable=False)
+    lexical_diversity = db.Column(db.Float, nullable=False)
+    phrase_rate = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ImportJob(db.Model):
+    """Background extraction of questions from an uploaded document into a quiz"""
+    id = db.Column(db.String(32), primary_key=True)  # Job id handed to the browser for polling
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=True, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    use_ai = db.Column(db.Boolean, nullable=False, default=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    pages_done = db.Column(db.Integer, nullable=False, default=0)
+    total_pages = db.Column(db.Integer, nullable=True)
+    question_count = db.Column(db.Integer, nullable=False, default=0)
+    duplicate_count = db.Column(db.Integer, nullable=False, default=0)  # Questions already in the teacher's bank
+    merged_question_ids = db.Column(db.JSON, nullable=True)  # Duplicates the teacher chose to keep
+    worker = db.Column(db.String(100), nullable=True)  # Process running the job, see job_workers
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'quiz_id': self.quiz_id,
+            'status': self.status,
+            'pages_done': self.pages_done,
+            'total_pages': self.total_pages,
+            'question_count': self.question_count,
+            'duplicate_count': self.duplicate_count,
+            'error': self.error
+        }
+
+class RosterImportJob(db.Model):
+    """Background import of a student roster CSV, streamed and committed chunk by chunk"""
+    id = db.Column(db.String(32), primary_key=True)  # Job id handed to the browser for polling
+    # None for an import into all of the teacher's subjects at once
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=True, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    file_path = db.Column(db.String(500), nullable=False)
+    account_setup = db.Column(db.String(20), nullable=False, default='activation')  # activation, password
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    bytes_done = db.Column(db.Integer, nullable=False, default=0)  # Progress through the file
+    total_bytes = db.Column(db.Integer, nullable=True)
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    matched_count = db.Column(db.Integer, nullable=False, default=0)  # Rows for the subject(s)
+    subject_codes = db.Column(db.JSON, nullable=True)  # Codes of the subjects that had rows
+    enrolled_count = db.Column(db.Integer, nullable=False, default=0)
+    already_enrolled_count = db.Column(db.Integer, nullable=False, default=0)
+    created_count = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    error_report_path = db.Column(db.String(500), nullable=True)  # CSV of the rejected rows
+    activation_report_path = db.Column(db.String(500), nullable=True)  # CSV of the new accounts' codes
+    worker = db.Column(db.String(100), nullable=True)  # Process running the job, see job_workers
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'subject_id': self.subject_id,
+            'status': self.status,
+            'bytes_done': self.bytes_done,
+            'total_bytes': self.total_bytes,
+            'rows_done': self.rows_done,
+            'matched_count': self.matched_count,
+            'subject_codes': self.subject_codes or [],
+            'enrolled_count': self.enrolled_count,
+            'already_enrolled_count': self.already_enrolled_count,
+            'created_count': self.created_count,
+            'error_count': self.error_count,
+            'has_error_report': bool(self.error_count and self.error_report_path),
+            'has_activation_report': bool(self.created_count and self.activation_report_path),
+            'error': self.error
+        }
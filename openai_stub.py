@@ -0,0 +1,126 @@
+"""Local stub of the OpenAI chat completion API for offline tests and benchmarks
+
+It answers question-extraction prompts with the questions the regex parser
+finds in the document text, as a JSON array. Run it and point the document
+processor at it:
+
+    python openai_stub.py --port 8766 --latency 0.5
+    OPENAI_API_BASE=http://127.0.0.1:8766/v1 OPENAI_API_KEY=test ...
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DOCUMENT_MARKER = "Here's the document text:"
+
+
+class CompletionStubState:
+    """Behaviour of the stub server, adjustable while it is running"""
+
+    def __init__(self, latency=0.0, latency_per_kchar=0.0, fail_marker=None):
+        self.latency = latency
+        self.latency_per_kchar = latency_per_kchar
+        # Prompts containing this text are answered with a 500 error
+        self.fail_marker = fail_marker
+        self.request_count = 0
+        self.max_in_flight = 0
+        self.prompt_sizes = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def enter(self, prompt):
+        with self._lock:
+            self.request_count += 1
+            self.prompt_sizes.append(len(prompt))
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+
+
+def _extract(document):
+    from document_processor import DocumentProcessor
+    return DocumentProcessor(use_cache=False)._parse_text_for_questions(document)
+
+
+class CompletionStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        state = self.server.state
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            return self._send(404, {'error': {'message': 'not found'}})
+
+        prompt = body.get('messages', [{}])[-1].get('content', '')
+        document = prompt.split(DOCUMENT_MARKER, 1)[-1].strip()
+        state.enter(prompt)
+        try:
+            time.sleep(state.latency + state.latency_per_kchar * len(document) / 1000)
+            if state.fail_marker and state.fail_marker in document:
+                return self._send(500, {'error': {'message': 'stub failure', 'type': 'server_error'}})
+
+            content = json.dumps(_extract(document))
+            return self._send(200, {
+                'id': f'chatcmpl-stub-{state.request_count}',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4,
+                          'total_tokens': (len(prompt) + len(content)) // 4}
+            })
+        finally:
+            state.leave()
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_completion_stub(host='127.0.0.1', port=0, **state_options):
+    """Start the stub server in a background thread
+
+    Returns:
+        (server, api_base); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), CompletionStubHandler)
+    server.daemon_threads = True
+    server.state = CompletionStubState(**state_options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_address[1]}/v1'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stub OpenAI chat completion server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response')
+    parser.add_argument('--latency-per-kchar', type=float, default=0.0,
+                        help='Extra seconds per 1000 characters of document text')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), CompletionStubHandler)
+    server.state = CompletionStubState(latency=args.latency, latency_per_kchar=args.latency_per_kchar)
+    print(f"Stub OpenAI API listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,132 @@
+"""Parse cache for uploaded documents
+
+Extracted question lists are stored as JSON files named after the SHA-256
+of the uploaded bytes, the parser version and the parse mode, so uploading
+the same questionnaire again skips text extraction and any OpenAI call.
+The directory is kept under a size limit by evicting the least recently
+used entries (file mtimes are refreshed on every hit).
+"""
+import os
+import json
+import hashlib
+import tempfile
+from typing import List, Dict, Optional, Any
+
+CACHE_DIR = os.environ.get(
+    'PARSE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'parse_cache')
+)
+CACHE_MAX_BYTES = int(os.environ.get('PARSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Size-bounded LRU cache of parsed documents on disk"""
+    
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+    
+    @staticmethod
+    def make_key(digest: str, parser_version: str, mode: str) -> str:
+        """Cache key for a document digest parsed by a given parser version and mode"""
+        return f"{digest}-{mode}-v{parser_version}"
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached questions for a key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                questions = json.load(file)
+        except (OSError, ValueError):
+            return None
+        
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return questions
+    
+    def set(self, key: str, questions: List[Dict[str, Any]]) -> None:
+        """Store questions for a key, then evict old entries if over the size limit"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(questions, file)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+    
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries
+    
+    def size(self) -> int:
+        """Total size of the cached entries in bytes"""
+        return sum(size for _, size, _ in self._entries())
+    
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits in max_bytes
+        
+        Returns:
+            int: The number of entries removed
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+            except OSError:
+                pass
+            total -= size
+        return removed
+    
+    def clear(self) -> None:
+        for _, _, name in self._entries():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+_default_cache = None
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """Shared cache in PARSE_CACHE_DIR; None if caching is disabled (empty PARSE_CACHE_DIR)"""
+    global _default_cache
+    if not CACHE_DIR:
+        return None
+    if _default_cache is None:
+        _default_cache = ParseCache()
+    return _default_cache
@@ -0,0 +1,124 @@
+import re
+from collections import Counter
+
+
+class PhraseMatchResult:
+    """Occurrences found by a single PhraseMatcher scan"""
+
+    def __init__(self, matches):
+        # Each match is a (phrase, category, start, end) tuple in text order
+        self.matches = matches
+        self.counts = Counter(m[0] for m in matches)
+        self.category_counts = Counter(m[1] for m in matches)
+
+    @property
+    def total(self):
+        return len(self.matches)
+
+    def positions(self, phrase):
+        """Return the start offsets of every occurrence of a phrase"""
+        return [start for p, _, start, _ in self.matches if p == phrase]
+
+    def to_list(self):
+        """Serialize matches for JSON responses (e.g. highlighting in the UI)"""
+        return [
+            {'phrase': phrase, 'category': category, 'start': start, 'end': end}
+            for phrase, category, start, end in self.matches
+        ]
+
+
+class PhraseMatcher:
+    """Find every occurrence of many phrases in one pass over the text
+
+    The phrases are compiled into a single case-insensitive regex whose
+    alternation is factored as a prefix tree, so the cost of a scan grows with
+    the length of the text rather than with the number of phrases.
+    Phrases only match on whole words and any run of whitespace inside a
+    multi-word phrase is accepted (e.g. line breaks in "in\\nconclusion").
+    """
+
+    def __init__(self, phrases, version=None):
+        """Build the matcher
+
+        Args:
+            phrases: Either a list of phrases or a dict mapping a category
+                name (e.g. 'formal') to a list of phrases
+            version: Optional version label of the phrase list
+        """
+        if not isinstance(phrases, dict):
+            phrases = {'default': phrases}
+
+        self.version = version
+        self._categories = {}
+        for category, phrase_list in phrases.items():
+            for phrase in phrase_list:
+                normalized = self._normalize(phrase)
+                if normalized:
+                    self._categories.setdefault(normalized, category)
+
+        self.pattern = self._compile(self._categories.keys())
+
+    def __len__(self):
+        return len(self._categories)
+
+    def scan(self, text):
+        """Scan text once and return every phrase occurrence with its position"""
+        matches = []
+        if text and self.pattern is not None:
+            for match in self.pattern.finditer(text):
+                phrase = self._normalize(match.group(0))
+                matches.append((phrase, self._categories.get(phrase), match.start(), match.end()))
+        return PhraseMatchResult(matches)
+
+    @staticmethod
+    def _normalize(phrase):
+        return ' '.join(str(phrase).lower().split())
+
+    @classmethod
+    def _compile(cls, phrases):
+        trie = {}
+        for phrase in phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        if not trie:
+            return None
+        return re.compile(r'(?<!\w)' + cls._trie_to_regex(trie) + r'(?!\w)', re.IGNORECASE)
+
+    @classmethod
+    def _trie_to_regex(cls, node):
+        """Turn a character trie into a regex with shared prefixes factored out"""
+        branches = []
+        for char in sorted(key for key in node if key):
+            token = r'\s+' if char == ' ' else re.escape(char)
+            branches.append(token + cls._trie_to_regex(node[char]))
+
+        if not branches:
+            return ''
+
+        # A phrase may end here while longer ones continue; the greedy optional
+        # group prefers the longest phrase and backtracks to the shorter one.
+        if '' in node:
+            return '(?:' + '|'.join(branches) + ')?'
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+
+# version -> (phrase lists the matcher was built from, matcher)
+_matcher_cache = {}
+
+
+def get_phrase_matcher(version=None):
+    """Return the compiled matcher for a phrase list version, building it again when the lists change"""
+    from ai_detection_config import AIDetectionConfig
+
+    version, phrase_lists = AIDetectionConfig.get_phrase_lists(version)
+    cached = _matcher_cache.get(version)
+    if cached is not None and cached[0] == phrase_lists:
+        return cached[1]
+    matcher = PhraseMatcher(phrase_lists, version=version)
+    _matcher_cache[version] = (phrase_lists, matcher)
+    return matcher
@@ -0,0 +1,275 @@
+"""Bulk creation of quiz questions
+
+Every question of a batch is validated first, then the whole batch is
+written with a single INSERT statement in one transaction, instead of one
+flush and commit per question. Each question carries a fingerprint of its
+normalized content, so questions a teacher already has can be found with
+a set lookup instead of comparing texts.
+"""
+from typing import List, Dict, Set, Tuple, Optional, Any
+from sqlalchemy import insert, func, select, or_
+from models import db, Question
+
+QUESTION_TYPES = ('multiple_choice', 'identification', 'true_false', 'essay')
+MAX_TEXT_LENGTH = 500
+
+# Placeholder options for imported multiple choice questions that came without any
+DEFAULT_OPTIONS = ['Option 1', 'Option 2', 'Option 3', 'Option 4']
+
+# Fingerprints per IN (...) clause, below SQLite's bound parameter limit
+FINGERPRINT_BATCH_SIZE = 500
+
+# Ways to resolve an imported question that duplicates one in the bank
+DUPLICATE_ACTIONS = ('merge', 'skip')
+
+
+class QuestionService:
+    """Validate and insert many questions at once"""
+    
+    @staticmethod
+    def normalize(q_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in defaults for an extracted (imported) question dictionary
+        
+        Text longer than MAX_TEXT_LENGTH is cut off and points that are
+        missing or not positive become 1, so the question is kept.
+        """
+        question_type = q_data.get('question_type') or 'essay'
+        question_text = (q_data.get('question_text') or '').strip() or 'No question text'
+        try:
+            points = float(q_data.get('points', 1.0))
+        except (TypeError, ValueError):
+            points = 1.0
+        data = {
+            'question_text': question_text[:MAX_TEXT_LENGTH],
+            'question_type': question_type,
+            'points': points if points > 0 else 1.0,
+            'options': None,
+            'word_limit': None,
+            'correct_answer': q_data.get('correct_answer') or ''
+        }
+        
+        if question_type == 'multiple_choice':
+            options = q_data.get('options')
+            if not options or not isinstance(options, list) or len(options) < 2:
+                options = list(DEFAULT_OPTIONS)
+            data['options'] = options
+            correct_answer = q_data.get('correct_answer')
+            data['correct_answer'] = '0' if correct_answer is None else str(correct_answer)
+        elif question_type == 'true_false':
+            if data['correct_answer'] not in ['true', 'false']:
+                data['correct_answer'] = 'true'
+        elif question_type == 'essay':
+            data['word_limit'] = q_data.get('word_limit') or 500
+        
+        return data
+    
+    @staticmethod
+    def validate(q_data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Check one question dictionary and convert it to column values
+        
+        Returns:
+            Tuple of (column values, None) or (None, error message)
+        """
+        question_text = (q_data.get('question_text') or '').strip()
+        if not question_text:
+            return None, 'Question text is required'
+        if len(question_text) > MAX_TEXT_LENGTH:
+            return None, f'Question text must be at most {MAX_TEXT_LENGTH} characters'
+        
+        question_type = q_data.get('question_type')
+        if question_type not in QUESTION_TYPES:
+            return None, f'Unknown question type: {question_type}'
+        
+        try:
+            points = float(q_data.get('points') if q_data.get('points') is not None else 1.0)
+        except (TypeError, ValueError):
+            return None, 'Points must be a number'
+        if points <= 0:
+            return None, 'Points must be greater than zero'
+        
+        options = None
+        word_limit = None
+        correct_answer = q_data.get('correct_answer')
+        correct_answer = '' if correct_answer is None else str(correct_answer)
+        
+        if question_type == 'multiple_choice':
+            options = q_data.get('options')
+            if not isinstance(options, list) or len([o for o in options if o]) < 2:
+                return None, 'Multiple choice questions need at least 2 options'
+        elif question_type == 'true_false':
+            correct_answer = correct_answer.lower()
+            if correct_answer not in ('true', 'false'):
+                return None, 'True/false questions need a true or false answer'
+        elif question_type == 'essay':
+            word_limit = q_data.get('word_limit')
+            if word_limit is not None:
+                try:
+                    word_limit = int(word_limit)
+                except (TypeError, ValueError):
+                    return None, 'Word limit must be a whole number'
+        
+        return {
+            'question_text': question_text,
+            'question_type': question_type,
+            'points': points,
+            'options': options,
+            'word_limit': word_limit,
+            'correct_answer': correct_answer,
+            # Bulk inserts bypass the ORM insert event, so set it here
+            'fingerprint': Question.make_fingerprint(question_text, options)
+        }, None
+    
+    @staticmethod
+    def add_questions(quiz, questions_data: List[Dict[str, Any]], user_id: int,
+                      start_index: Optional[int] = None, normalize: bool = False,
+                      skip_invalid: bool = False, commit: bool = True) -> Tuple[bool, str, List[Question]]:
+        """Validate a list of questions and insert them into a quiz in one statement
+        
+        Args:
+            quiz: The quiz the questions belong to
+            questions_data: Question dictionaries (question_text, question_type,
+                points, options, correct_answer, word_limit)
+            user_id: The author of the questions
+            start_index: order_index of the first question; defaults to after
+                the quiz's last question
+            normalize: Fill in defaults first, as for extracted questions
+            skip_invalid: Insert the valid questions and skip the rest instead of
+                rejecting the whole list
+            commit: Whether to commit the transaction
+        
+        Returns:
+            Tuple containing (success, message, created questions)
+        """
+        rows = []
+        errors = []
+        for position, q_data in enumerate(questions_data, 1):
+            values, error = QuestionService.validate(QuestionService.normalize(q_data) if normalize else q_data)
+            if error:
+                errors.append(f'Question {position}: {error}')
+                continue
+            rows.append(values)
+        
+        if errors and not skip_invalid:
+            return False, '; '.join(errors), []
+        if not rows:
+            return False, '; '.join(errors) or 'No questions to add', []
+        
+        if start_index is None:
+            last_index = db.session.query(func.max(Question.order_index)).filter(Question.quiz_id == quiz.id).scalar()
+            start_index = 0 if last_index is None else last_index + 1
+        
+        for offset, values in enumerate(rows):
+            values['order_index'] = start_index + offset
+            values['quiz_id'] = quiz.id
+            values['user_id'] = user_id
+        
+        try:
+            questions = db.session.scalars(insert(Question).returning(Question), rows).all()
+            if commit:
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error adding questions: {str(e)}")
+            return False, f'An error occurred while adding the questions: {str(e)}', []
+        
+        message = f'{len(questions)} question(s) added successfully!'
+        if errors:
+            message += f' Skipped {len(errors)}: ' + '; '.join(errors)
+        return True, message, questions
+    
+    @staticmethod
+    def bank_fingerprints(user_id: int, exclude_quiz_id: Optional[int] = None) -> Set[str]:
+        """Fingerprints of all questions in a teacher's bank, read with one indexed query
+        
+        Args:
+            user_id: The teacher
+            exclude_quiz_id: Leave out the questions of this quiz (e.g. the one being imported)
+        """
+        query = select(Question.fingerprint).where(
+            Question.user_id == user_id,
+            Question.fingerprint.isnot(None)
+        )
+        if exclude_quiz_id is not None:
+            query = query.where(or_(Question.quiz_id.is_(None), Question.quiz_id != exclude_quiz_id))
+        return set(db.session.scalars(query))
+    
+    @staticmethod
+    def find_duplicates(quiz, ignore_ids=()) -> Dict[int, Question]:
+        """Map each question of a quiz that repeats an existing one to that original
+        
+        The original is the teacher's oldest question with the same
+        fingerprint in another quiz, or an earlier question of the same quiz.
+        
+        Args:
+            quiz: The quiz to check
+            ignore_ids: Questions already merged, which are no longer reported
+        """
+        questions = Question.query.filter_by(quiz_id=quiz.id).order_by(Question.order_index).all()
+        fingerprints = list({question.fingerprint for question in questions if question.fingerprint})
+        
+        originals = {}
+        for start in range(0, len(fingerprints), FINGERPRINT_BATCH_SIZE):
+            batch = fingerprints[start:start + FINGERPRINT_BATCH_SIZE]
+            bank = Question.query.filter(
+                Question.user_id == quiz.user_id,
+                Question.fingerprint.in_(batch),
+                or_(Question.quiz_id.is_(None), Question.quiz_id != quiz.id)
+            ).order_by(Question.id)
+            for question in bank:
+                originals.setdefault(question.fingerprint, question)
+        
+        duplicates = {}
+        for question in questions:
+            if not question.fingerprint:
+                continue
+            original = originals.setdefault(question.fingerprint, question)
+            if original is not question and question.id not in ignore_ids:
+                duplicates[question.id] = original
+        return duplicates
+    
+    @staticmethod
+    def resolve_duplicates(quiz, action: str, question_ids: Optional[List[int]] = None,
+                           ignore_ids=()) -> Tuple[bool, str, List[int]]:
+        """Merge or skip imported questions that duplicate existing ones
+        
+        Args:
+            quiz: The quiz being reviewed
+            action: 'merge' keeps the question but takes the answer, options,
+                points and word limit of the existing question; 'skip'
+                removes it from the quiz
+            question_ids: Only resolve these duplicates; defaults to all of them
+            ignore_ids: Questions already merged
+        
+        Returns:
+            Tuple containing (success, message, ids of the resolved questions)
+        """
+        if action not in DUPLICATE_ACTIONS:
+            return False, f'Unknown action: {action}', []
+        
+        duplicates = QuestionService.find_duplicates(quiz, ignore_ids)
+        if question_ids is not None:
+            wanted = set(question_ids)
+            duplicates = {question_id: original for question_id, original in duplicates.items() if question_id in wanted}
+        if not duplicates:
+            return False, 'No duplicate questions to resolve', []
+        
+        try:
+            for question in Question.query.filter(Question.id.in_(list(duplicates))):
+                original = duplicates[question.id]
+                if action == 'skip':
+                    db.session.delete(question)
+                    continue
+                question.question_text = original.question_text
+                question.question_type = original.question_type
+                question.options = list(original.options) if original.options else original.options
+                question.correct_answer = original.correct_answer
+                question.points = original.points
+                question.word_limit = original.word_limit
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error resolving duplicate questions: {str(e)}")
+            return False, f'An error occurred while resolving the duplicates: {str(e)}', []
+        
+        verb = 'Merged' if action == 'merge' else 'Skipped'
+        return True, f'{verb} {len(duplicates)} duplicate question(s).', list(duplicates)
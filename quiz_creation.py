@@ -8,7 +8,9 @@ from datetime import datetime
 from models import db, Quiz, Question, Subject
 from question_forms import get_question_form
 from document_processor import DocumentProcessor
-import os
+from upload_store import UploadError
+from import_jobs import start_import_job
+from question_service import QuestionService
 
 quiz_bp = Blueprint('quiz', __name__)
 
@@ -111,6 +113,15 @@ def create_quiz():
                     flash('Invalid date format. Please use YYYY-MM-DD HH:MM format.')
                     return render_template('quiz/setup.html', form=form)
             
+            # Save and check an imported document first, so a rejected file leaves no empty quiz behind
+            file_path = None
+            if form.creation_method.data == 'import' and form.document_file.data:
+                try:
+                    file_path = DocumentProcessor().save_uploaded_file(form.document_file.data)
+                except UploadError as e:
+                    flash(f'An error occurred while importing questions: {str(e)}')
+                    return render_template('quiz/setup.html', form=form)
+            
             # Create the quiz
             quiz = Quiz(
                 title=form.title.data,
@@ -125,9 +136,9 @@ def create_quiz():
             db.session.commit()
             
             # Check if we're importing questions from a document
-            if form.creation_method.data == 'import' and form.document_file.data:
+            if file_path:
                 # Process the document file
-                return process_imported_document(form, quiz)
+                return process_imported_document(file_path, quiz)
             else:
                 # Manual creation - validate question count
                 if not form.question_count.data or form.question_count.data < 1:
@@ -145,100 +156,18 @@ def create_quiz():
     
     return render_template('quiz/setup.html', form=form)
 
-def process_imported_document(form, quiz):
-    """Process an imported document file to extract questions"""
+def process_imported_document(file_path, quiz):
+    """Queue extraction of a saved document's questions and go to the review page"""
     try:
-        # Get the uploaded file
-        file = form.document_file.data
-        
-        # Create uploads directory if it doesn't exist
-        uploads_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
-        if not os.path.exists(uploads_dir):
-            os.makedirs(uploads_dir, exist_ok=True)
-        
-        # Initialize document processor
-        processor = DocumentProcessor()
-        
-        # Save the uploaded file
-        file_path = processor.save_uploaded_file(file, uploads_dir)
-        
-        # Process the file to extract questions
-        questions_data, error = processor.process_file(file_path)
-        
-        if error:
-            db.session.delete(quiz)
-            db.session.commit()
-            flash(f'Error processing document: {error}')
-            return redirect(url_for('quiz.create_quiz'))
-        
-        if not questions_data:
-            db.session.delete(quiz)
-            db.session.commit()
-            flash('No questions could be extracted from the document.')
-            return redirect(url_for('quiz.create_quiz'))
+        # Extract the questions in the background; the review page shows progress
+        job = start_import_job(quiz, file_path, False, current_user.id, announce=False)
+        session['imported_quiz'] = {
+            'quiz_id': quiz.id,
+            'job_id': job.id
+        }
+        session.modified = True
         
-        # Create questions from the extracted data
-        question_count = 0
-        for index, q_data in enumerate(questions_data):
-            try:
-                # Create a new question object
-                question = Question(
-                    question_text=q_data.get('question_text', 'No question text'),
-                    question_type=q_data.get('question_type', 'essay'),
-                    points=float(q_data.get('points', 1.0)),
-                    quiz_id=quiz.id,
-                    user_id=current_user.id,
-                    subject_id=quiz.subject_id,
-                    order_index=index
-                )
-                
-                # Set type-specific fields
-                if q_data.get('question_type') == 'multiple_choice':
-                    # Ensure options is a list
-                    options = q_data.get('options', [])
-                    if not options or not isinstance(options, list) or len(options) < 2:
-                        # Default options if none provided
-                        options = ['Option 1', 'Option 2', 'Option 3', 'Option 4']
-                    question.options = options
-                    
-                    # Ensure correct_answer is a string
-                    correct_answer = q_data.get('correct_answer', '0')
-                    if correct_answer is None:
-                        correct_answer = '0'
-                    question.correct_answer = str(correct_answer)
-                    
-                elif q_data.get('question_type') == 'true_false':
-                    correct_answer = q_data.get('correct_answer', 'true')
-                    if correct_answer not in ['true', 'false']:
-                        correct_answer = 'true'
-                    question.correct_answer = correct_answer
-                    
-                elif q_data.get('question_type') == 'identification':
-                    question.correct_answer = q_data.get('correct_answer', '')
-                    
-                elif q_data.get('question_type') == 'essay':
-                    question.word_limit = int(q_data.get('word_limit', 500))
-                    question.correct_answer = q_data.get('correct_answer', '')
-                
-                # Add to database
-                db.session.add(question)
-                question_count += 1
-            except Exception as e:
-                print(f"Error creating question: {str(e)}")
-                continue
-        
-        # Commit all questions
-        db.session.commit()
-        
-        # Check if any questions were created
-        if question_count == 0:
-            db.session.delete(quiz)
-            db.session.commit()
-            flash('No valid questions could be created from the document.')
-            return redirect(url_for('quiz.create_quiz'))
-        
-        flash(f'Successfully imported {question_count} questions into {quiz.quiz_type} "{quiz.title}"!')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('import_document.review_questions', quiz_id=quiz.id))
         
     except Exception as e:
         # Clean up on error
@@ -261,7 +190,7 @@ def add_question(quiz_id, question_num, total):
         return redirect(url_for('dashboard'))
     
     # Verify the quiz exists and belongs to the current user
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     if quiz.user_id != current_user.id:
         flash('You do not have permission to modify this quiz.')
         return redirect(url_for('dashboard'))
@@ -281,37 +210,38 @@ def add_question(quiz_id, question_num, total):
     # Handle form submission
     if form.validate_on_submit():
         try:
-            # Create the question
-            question = Question(
-                question_text=form.question_text.data,
-                question_type=form.question_type.data,
-                points=form.points.data,
-                user_id=current_user.id,
-                quiz_id=quiz_id,
-                subject_id=quiz.subject_id,
-                order_index=question_num - 1  # 0-indexed in database
-            )
+            # Collect the question
+            question_data = {
+                'question_text': form.question_text.data,
+                'question_type': form.question_type.data,
+                'points': form.points.data
+            }
             
             # Set question-type specific fields
             if form.question_type.data == 'multiple_choice':
-                question.options = [
+                question_data['options'] = [
                     form.option1.data,
                     form.option2.data,
                     form.option3.data,
                     form.option4.data
                 ]
-                question.correct_answer = form.correct_option.data
+                question_data['correct_answer'] = form.correct_option.data
             elif form.question_type.data == 'identification':
-                question.correct_answer = form.correct_answer.data
+                question_data['correct_answer'] = form.correct_answer.data
             elif form.question_type.data == 'true_false':
-                question.correct_answer = form.correct_answer.data
+                question_data['correct_answer'] = form.correct_answer.data
             elif form.question_type.data == 'essay':
-                question.word_limit = form.word_limit.data
-                question.correct_answer = form.correct_answer.data or ''
+                question_data['word_limit'] = form.word_limit.data
+                question_data['correct_answer'] = form.correct_answer.data or ''
             
             # Save the question
-            db.session.add(question)
-            db.session.commit()
+            success, message, _ = QuestionService.add_questions(
+                quiz, [question_data], current_user.id,
+                start_index=question_num - 1  # 0-indexed in database
+            )
+            if not success:
+                flash(message)
+                return render_template('quiz/add_question.html', form=form, quiz=quiz, question_num=question_num, total=total)
             
             # Check if we've added all questions
             if question_num >= total:
@@ -336,7 +266,7 @@ def cancel_quiz(quiz_id):
         flash('Only teachers can manage quizzes.')
         return redirect(url_for('dashboard'))
     
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     if quiz.user_id != current_user.id:
         flash('You do not have permission to delete this quiz.')
         return redirect(url_for('dashboard'))
@@ -124,17 +124,9 @@ def create_quiz():
                     # Import document processor
                     from document_import import import_questions
                     
-                    # Create upload directory
-                    import os
-                    upload_dir = os.path.join('uploads', 'documents')
-                    
-                    # Ensure the upload directory exists
-                    if not os.path.exists(upload_dir):
-                        os.makedirs(upload_dir, exist_ok=True)
-                    
                     # Process the document using the document_import module
                     print(f"Processing document with AI: {form.use_ai.data}")
-                    questions, error = import_questions(form.document_file.data, upload_dir, use_ai=form.use_ai.data)
+                    questions, error = import_questions(form.document_file.data, use_ai=form.use_ai.data)
                     
                     # Log the result for debugging
                     print(f"Document processing result: {len(questions)} questions extracted, error: {error}")
@@ -211,7 +203,7 @@ def add_question(quiz_id):
         flash('Only teachers can add questions.')
         return redirect(url_for('dashboard'))
     
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     if quiz.user_id != current_user.id:
         flash('You do not have permission to modify this quiz.')
         return redirect(url_for('dashboard'))
@@ -337,7 +329,7 @@ def review_imported_questions(quiz_id):
         # Print debug information
         print(f"Accessing review_imported_questions for quiz_id: {quiz_id}")
         
-        quiz = Quiz.query.get_or_404(quiz_id)
+        quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
         if quiz.user_id != current_user.id:
             flash('You do not have permission to view this quiz.')
             return redirect(url_for('dashboard'))
@@ -385,7 +377,7 @@ def update_imported_question(question_id):
         return redirect(url_for('dashboard'))
     
     question = Question.query.get_or_404(question_id)
-    quiz = Quiz.query.get_or_404(question.quiz_id)
+    quiz = Quiz.query.filter_by(id=question.quiz_id, deleted_at=None).first_or_404()
     
     if quiz.user_id != current_user.id:
         flash('You do not have permission to modify this question.')
@@ -435,7 +427,7 @@ def delete_imported_question(question_id):
     
     question = Question.query.get_or_404(question_id)
     quiz_id = question.quiz_id
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     
     if quiz.user_id != current_user.id:
         flash('You do not have permission to delete this question.')
@@ -468,7 +460,7 @@ def cancel_quiz(quiz_id):
         flash('Only teachers can cancel quizzes/exams.')
         return redirect(url_for('dashboard'))
     
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
     if quiz.user_id != current_user.id:
         flash('You do not have permission to cancel this quiz.')
         return redirect(url_for('dashboard'))
@@ -491,4 +483,45 @@ def cancel_quiz(quiz_id):
         db.session.rollback()
         flash(f'An error occurred while cancelling the quiz: {str(e)}')
     
-    return redirect(url_for('dashboard'))
\ No newline at end of file
+    return redirect(url_for('dashboard'))
+
+@quiz_bp.route('/clone/<int:quiz_id>', methods=['POST'])
+@login_required
+def clone_quiz(quiz_id):
+    if current_user.role != 'teacher':
+        flash('Only teachers can copy quizzes/exams.')
+        return redirect(url_for('dashboard'))
+    
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
+    if quiz.user_id != current_user.id:
+        flash('You do not have permission to copy this quiz.')
+        return redirect(url_for('dashboard'))
+    
+    from quiz_service import QuizService
+    success, message, clones = QuizService.clone_quiz(
+        quiz,
+        request.form.getlist('subject_ids', type=int),
+        current_user.id,
+        title=request.form.get('title')
+    )
+    flash(message)
+    if success and len(clones) == 1:
+        return redirect(url_for('view_quiz', quiz_id=clones[0].id))
+    return redirect(url_for('view_quiz', quiz_id=quiz.id))
+
+@quiz_bp.route('/pool/<int:quiz_id>', methods=['POST'])
+@login_required
+def set_pool_size(quiz_id):
+    if current_user.role != 'teacher':
+        flash('Only teachers can change quizzes/exams.')
+        return redirect(url_for('dashboard'))
+    
+    quiz = Quiz.query.filter_by(id=quiz_id, deleted_at=None).first_or_404()
+    if quiz.user_id != current_user.id:
+        flash('You do not have permission to modify this quiz.')
+        return redirect(url_for('dashboard'))
+    
+    from quiz_service import QuizService
+    success, message = QuizService.set_pool_size(quiz, request.form.get('pool_size', type=int))
+    flash(message)
+    return redirect(url_for('view_quiz', quiz_id=quiz.id))
@@ -0,0 +1,146 @@
+"""Background purge of deleted quizzes
+
+Deleting a quiz only marks it with deleted_at, which hides it at once. The
+answers, submissions and questions that belonged to it are then removed
+by a worker thread in chunks of QUIZ_PURGE_CHUNK_SIZE rows, each chunk in
+its own short transaction with a pause in between, so purging a heavily
+used quiz never holds the SQLite write lock long enough to stall students
+who are taking other quizzes. The quiz row itself is removed last; a purge
+interrupted by a restart is picked up again by resume_quiz_purges.
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from sqlalchemy import delete, select, or_
+from models import (db, Quiz, Question, QuizSubmission, StudentSubmission, Announcement, ImportJob,
+                    EssaySignature, EssayLSHBucket, StylometricSample)
+
+PURGE_CHUNK_SIZE = int(os.environ.get('QUIZ_PURGE_CHUNK_SIZE', 500))
+PURGE_PAUSE_SECONDS = float(os.environ.get('QUIZ_PURGE_PAUSE_SECONDS', 0.05))
+
+# One worker: purges run one after another instead of competing for the write lock
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quiz-purge')
+_futures = {}
+_futures_lock = threading.Lock()
+
+
+def start_quiz_purge(quiz_id, app=None):
+    """Queue the purge of a quiz that was marked as deleted
+
+    Queuing a quiz whose purge is already pending does nothing.
+    """
+    app = app or current_app._get_current_object()
+    with _futures_lock:
+        if quiz_id in _futures:
+            return
+        future = _executor.submit(run_quiz_purge, app, quiz_id)
+        _futures[quiz_id] = future
+    future.add_done_callback(lambda _: _forget(quiz_id))
+
+
+def _forget(quiz_id):
+    with _futures_lock:
+        _futures.pop(quiz_id, None)
+
+
+def wait_for_purge(quiz_id, timeout=None):
+    """Block until a purge started in this process has finished"""
+    with _futures_lock:
+        future = _futures.get(quiz_id)
+    if future:
+        future.result(timeout)
+
+
+def resume_quiz_purges(app):
+    """Queue every quiz that is marked as deleted but not purged yet, e.g. after a restart"""
+    with app.app_context():
+        quiz_ids = db.session.scalars(select(Quiz.id).where(Quiz.deleted_at.isnot(None))).all()
+    for quiz_id in quiz_ids:
+        start_quiz_purge(quiz_id, app)
+    return len(quiz_ids)
+
+
+def run_quiz_purge(app, quiz_id):
+    with app.app_context():
+        try:
+            removed = purge_quiz(quiz_id)
+            print(f"Purged deleted quiz {quiz_id}: {removed} row(s) removed")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Purge of deleted quiz {quiz_id} failed: {str(e)}")
+        finally:
+            db.session.remove()
+
+
+def _delete_in_chunks(id_query, delete_chunk, chunk_size, pause):
+    """Delete the rows selected by id_query, chunk_size ids per transaction"""
+    removed = 0
+    while True:
+        ids = db.session.scalars(id_query.limit(chunk_size)).all()
+        if not ids:
+            return removed
+        delete_chunk(ids)
+        db.session.commit()
+        removed += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def _delete_rows(model):
+    def delete_chunk(ids):
+        db.session.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+    return delete_chunk
+
+
+def _delete_answers(ids):
+    # Rows that point at the answers go first
+    signatures = select(EssaySignature.id).where(EssaySignature.submission_id.in_(ids))
+    for statement in (
+        delete(EssayLSHBucket).where(EssayLSHBucket.signature_id.in_(signatures)),
+        delete(EssaySignature).where(EssaySignature.submission_id.in_(ids)),
+        delete(StylometricSample).where(StylometricSample.submission_id.in_(ids)),
+        delete(StudentSubmission).where(StudentSubmission.id.in_(ids)),
+    ):
+        db.session.execute(statement.execution_options(synchronize_session=False))
+
+
+def purge_quiz(quiz_id, chunk_size=PURGE_CHUNK_SIZE, pause=PURGE_PAUSE_SECONDS):
+    """Remove a deleted quiz and everything that belongs to it in short transactions
+
+    Args:
+        quiz_id: The quiz to purge; quizzes that are not marked as deleted are left alone
+        chunk_size: Rows deleted per transaction
+        pause: Seconds to wait between transactions so other writers get the lock
+
+    Returns:
+        int: The number of rows removed
+    """
+    quiz = db.session.get(Quiz, quiz_id)
+    if not quiz or quiz.deleted_at is None:
+        return 0
+    db.session.rollback()  # Don't hold a read transaction open between chunks
+
+    question_ids = select(Question.id).where(Question.quiz_id == quiz_id)
+    submission_ids = select(QuizSubmission.id).where(QuizSubmission.quiz_id == quiz_id)
+    answers = select(StudentSubmission.id).where(or_(
+        StudentSubmission.question_id.in_(question_ids),
+        StudentSubmission.quiz_submission_id.in_(submission_ids)
+    ))
+
+    removed = _delete_in_chunks(answers, _delete_answers, chunk_size, pause)
+    removed += _delete_in_chunks(submission_ids, _delete_rows(QuizSubmission), chunk_size, pause)
+    removed += _delete_in_chunks(question_ids, _delete_rows(Question), chunk_size, pause)
+    removed += _delete_in_chunks(select(Announcement.id).where(Announcement.quiz_id == quiz_id),
+                                 _delete_rows(Announcement), chunk_size, pause)
+    removed += _delete_in_chunks(select(ImportJob.id).where(ImportJob.quiz_id == quiz_id),
+                                 _delete_rows(ImportJob), chunk_size, pause)
+
+    # Questions saved after the question pass, e.g. by an import job that was already running,
+    # go in the same transaction as the quiz so none are left without it
+    late = db.session.execute(delete(Question).where(Question.quiz_id == quiz_id)
+                              .execution_options(synchronize_session=False))
+    db.session.execute(delete(Quiz).where(Quiz.id == quiz_id).execution_options(synchronize_session=False))
+    db.session.commit()
+    return removed + late.rowcount + 1
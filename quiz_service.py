@@ -0,0 +1,206 @@
+"""Operations on whole quizzes: copying, deleting, question pools and item analysis
+
+A quiz is cloned into one or more subjects with set-based statements: one
+INSERT ... SELECT creates the copies of the quiz, one INSERT ... SELECT
+copies every question into all of them, and the announcements are
+inserted together, all in a single transaction. No question row is loaded
+into Python, so the cost barely grows with the size of the quiz.
+
+Deleting a quiz only marks it as deleted; quiz_purge removes its rows in
+the background in short transactions.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert, select, literal, delete
+from sqlalchemy.orm import aliased
+from models import db, Quiz, Question, Subject, Announcement, QuizSubmission, StudentSubmission
+
+# Question columns copied as they are; the rest are set for the copy
+COPIED_QUESTION_COLUMNS = ('question_text', 'question_type', 'word_limit', 'options',
+                           'correct_answer', 'points', 'order_index', 'fingerprint')
+
+
+class QuizService:
+    """Operations on whole quizzes"""
+    
+    @staticmethod
+    def clone_quiz(quiz, subject_ids: Iterable[int], user_id: int, title: Optional[str] = None,
+                   announce: bool = True, commit: bool = True) -> Tuple[bool, str, List[Quiz]]:
+        """Copy a quiz and all of its questions into each of the given subjects
+        
+        Args:
+            quiz: The quiz to copy
+            subject_ids: The subjects (sections) to copy it into; each must
+                belong to user_id
+            user_id: The teacher who owns the copies
+            title: Title of the copies; defaults to the original title
+            announce: Post a 'quiz_created' announcement in each subject
+            commit: Whether to commit the transaction
+        
+        Returns:
+            Tuple containing (success, message, the new quizzes)
+        """
+        subject_ids = sorted({int(subject_id) for subject_id in subject_ids})
+        if not subject_ids:
+            return False, 'Select at least one subject to copy the quiz to', []
+        title = (title or '').strip() or quiz.title
+        if len(title) > 100:
+            return False, 'The title must be at most 100 characters', []
+        
+        subjects = {subject.id: subject for subject in Subject.query.filter(
+            Subject.id.in_(subject_ids), Subject.teacher_id == user_id)}
+        missing = [subject_id for subject_id in subject_ids if subject_id not in subjects]
+        if missing:
+            return False, f'Subject(s) not found: {", ".join(map(str, missing))}', []
+        
+        now = datetime.utcnow()
+        try:
+            # One copy of the quiz row per target subject
+            copies = select(
+                literal(title, Quiz.title.type), Quiz.description, Quiz.quiz_type,
+                literal(now, Quiz.created_at.type), literal(user_id, Quiz.user_id.type),
+                Subject.id, Quiz.duration, Quiz.start_time, Quiz.pool_size
+            ).select_from(Quiz).join(Subject, Subject.id.in_(subject_ids)).where(Quiz.id == quiz.id)
+            created = db.session.execute(
+                insert(Quiz).from_select(
+                    ['title', 'description', 'quiz_type', 'created_at', 'user_id',
+                     'subject_id', 'duration', 'start_time', 'pool_size'], copies
+                ).returning(Quiz.id, Quiz.subject_id)
+            ).all()
+            new_ids = [quiz_id for quiz_id, _ in created]
+            
+            # Every question into every copy
+            target = aliased(Quiz)
+            questions = select(
+                *[getattr(Question, column) for column in COPIED_QUESTION_COLUMNS],
+                literal(now, Question.created_at.type), literal(user_id, Question.user_id.type), target.id
+            ).select_from(Question).join(target, target.id.in_(new_ids)).where(Question.quiz_id == quiz.id)
+            db.session.execute(insert(Question).from_select(
+                [*COPIED_QUESTION_COLUMNS, 'created_at', 'user_id', 'quiz_id'], questions))
+            
+            if announce:
+                db.session.execute(insert(Announcement), [{
+                    'title': f'New {quiz.quiz_type.capitalize()} Available',
+                    'content': f'A new {quiz.quiz_type} "{title}" has been created for {subjects[subject_id].name}.',
+                    'created_at': now,
+                    'user_id': user_id,
+                    'subject_id': subject_id,
+                    'quiz_id': quiz_id,
+                    'announcement_type': 'quiz_created'
+                } for quiz_id, subject_id in created])
+            
+            if commit:
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error cloning quiz {quiz.id}: {str(e)}")
+            return False, f'An error occurred while copying the {quiz.quiz_type}: {str(e)}', []
+        
+        clones = Quiz.query.filter(Quiz.id.in_(new_ids)).order_by(Quiz.id).all()
+        names = ', '.join(subjects[clone.subject_id].name for clone in clones)
+        return True, f'{quiz.quiz_type.capitalize()} copied to {names}.', clones
+    
+    @staticmethod
+    def set_pool_size(quiz, pool_size: Optional[int]) -> Tuple[bool, str]:
+        """Draw pool_size questions per student from the quiz, or all of them if None
+        
+        The pool cannot change once a student has started the quiz, since
+        their questions were already drawn from it.
+        """
+        if pool_size is not None and pool_size < 1:
+            return False, 'The number of questions per student must be at least 1'
+        if QuizSubmission.query.filter_by(quiz_id=quiz.id).first():
+            return False, f'The question pool cannot be changed after students have started the {quiz.quiz_type}'
+        
+        quiz.pool_size = pool_size
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error updating the question pool of quiz {quiz.id}: {str(e)}")
+            return False, f'An error occurred while updating the question pool: {str(e)}'
+        
+        total = len(quiz.questions)
+        if pool_size is None or pool_size >= total:
+            return True, f'Every student will answer all {total} questions.'
+        return True, f'Each student will answer {pool_size} of the {total} questions.'
+    
+    @staticmethod
+    def delete_quiz(quiz, purge: bool = True) -> Tuple[bool, str]:
+        """Mark a quiz as deleted and queue the purge of its rows
+        
+        The quiz disappears from its subject and can no longer be opened or
+        taken as soon as this returns; its announcements are removed with it.
+        
+        Args:
+            quiz: The quiz to delete
+            purge: Queue the background purge; without it the rows stay
+                until resume_quiz_purges runs
+        
+        Returns:
+            Tuple containing (success, message)
+        """
+        from quiz_purge import start_quiz_purge
+        
+        try:
+            quiz.deleted_at = datetime.utcnow()
+            db.session.execute(delete(Announcement).where(Announcement.quiz_id == quiz.id)
+                               .execution_options(synchronize_session=False))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error deleting quiz {quiz.id}: {str(e)}")
+            return False, f'An error occurred while deleting the {quiz.quiz_type}: {str(e)}'
+        
+        if purge:
+            start_quiz_purge(quiz.id)
+        return True, f'Quiz "{quiz.title}" deleted successfully!'
+    
+    @staticmethod
+    def item_analysis(quiz) -> Dict[int, Dict[str, Any]]:
+        """Per-question statistics over the submitted attempts of a quiz
+        
+        Only students who were given a question count towards it, so pooled
+        questions are not penalized for the students who never saw them.
+        Scores are compared as a fraction of each student's own max_score.
+        
+        Returns:
+            {question_id: {'presented', 'answered', 'correct', 'difficulty',
+            'discrimination'}} where difficulty is the share of students who
+            got the question right, and discrimination is the mean score of
+            those students minus the mean score of the others (None while
+            either group is empty).
+        """
+        rows = db.session.execute(
+            select(StudentSubmission.question_id, StudentSubmission.quiz_submission_id,
+                   StudentSubmission.is_correct, StudentSubmission.submitted_answer,
+                   Question.points, QuizSubmission.total_score)
+            .join(QuizSubmission, QuizSubmission.id == StudentSubmission.quiz_submission_id)
+            .join(Question, Question.id == StudentSubmission.question_id)
+            .where(QuizSubmission.quiz_id == quiz.id, QuizSubmission.submitted_at.isnot(None))
+        ).all()
+        
+        max_scores = {}
+        for row in rows:
+            max_scores[row.quiz_submission_id] = max_scores.get(row.quiz_submission_id, 0.0) + row.points
+        
+        groups = {}
+        for row in rows:
+            max_score = max_scores[row.quiz_submission_id]
+            score = row.total_score / max_score if max_score else 0.0
+            item = groups.setdefault(row.question_id, {'answered': 0, 'right': [], 'wrong': []})
+            item['answered'] += row.submitted_answer != 'Missing'
+            item['right' if row.is_correct else 'wrong'].append(score)
+        
+        analysis = {}
+        for question_id, item in groups.items():
+            right, wrong = item['right'], item['wrong']
+            presented = len(right) + len(wrong)
+            analysis[question_id] = {
+                'presented': presented,
+                'answered': item['answered'],
+                'correct': len(right),
+                'difficulty': len(right) / presented,
+                'discrimination': (sum(right) / len(right) - sum(wrong) / len(wrong)) if right and wrong else None
+            }
+        return analysis
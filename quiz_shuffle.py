@@ -0,0 +1,116 @@
+"""Per-student question sample and order
+
+Every student sees the questions of a quiz, and the options of each
+multiple choice question, in their own order. The order is derived from
+(quiz_id, student_id) each time it is needed, so nothing is stored per
+student: take_quiz renders the permutation and submit_quiz maps the
+chosen positions back to canonical option indexes, which is what is saved
+and graded.
+
+A quiz with a pool_size draws that many of its questions for each student
+the same way, stratified by question type. The draw is stored on the
+QuizSubmission when the attempt starts, so questions added to or removed
+from the quiz afterwards do not change an attempt's questions or max score.
+
+Items are sorted by a keyed hash instead of shuffled with `random`, so the
+order does not depend on the Python version or on any global state.
+"""
+import hashlib
+import re
+from typing import Dict, List, Optional, Sequence
+
+# Options such as "All of the above" only make sense where they were written
+PINNED_OPTION = re.compile(r'^\s*(all|none|both|neither)\b.*\babove\b', re.IGNORECASE)
+
+
+def _sort_key(*parts) -> bytes:
+    return hashlib.blake2b(':'.join(map(str, parts)).encode('utf-8'), digest_size=8).digest()
+
+
+def sample_questions(quiz, student_id: int) -> List:
+    """The questions of a quiz drawn for this student, in canonical order
+
+    When quiz.pool_size is set and smaller than the number of questions,
+    pool_size questions are drawn with each question type getting its
+    proportional share (largest remainder), otherwise all questions are
+    returned.
+    """
+    questions = list(quiz.questions)
+    pool_size = quiz.pool_size
+    if not pool_size or pool_size >= len(questions):
+        return questions
+
+    strata = {}
+    for question in questions:
+        strata.setdefault(question.question_type, []).append(question)
+    quotas = {kind: pool_size * len(members) / len(questions) for kind, members in strata.items()}
+    counts = {kind: int(quota) for kind, quota in quotas.items()}
+    remainder = pool_size - sum(counts.values())
+    for kind in sorted(strata, key=lambda kind: (counts[kind] - quotas[kind], kind))[:remainder]:
+        counts[kind] += 1
+
+    drawn = set()
+    for kind, members in strata.items():
+        members = sorted(members, key=lambda question: _sort_key(quiz.id, student_id, 'pool', question.id))
+        drawn.update(question.id for question in members[:counts[kind]])
+    return [question for question in questions if question.id in drawn]
+
+
+def drawn_questions(quiz, submission) -> List:
+    """The questions of a student's attempt, fixed when it started
+
+    The first call draws them with sample_questions and stores their ids in
+    submission.question_ids; the caller commits. Questions deleted since
+    are left out, questions added since are not part of the attempt.
+    """
+    if submission.question_ids is None:
+        submission.question_ids = [question.id for question in sample_questions(quiz, submission.student_id)]
+    question_ids = set(submission.question_ids)
+    return [question for question in quiz.questions if question.id in question_ids]
+
+
+def question_order(quiz_id: int, student_id: int, questions: Sequence) -> List:
+    """The quiz questions in the order this student sees them"""
+    return sorted(questions, key=lambda question: _sort_key(quiz_id, student_id, question.id))
+
+
+def option_order(quiz_id: int, student_id: int, question) -> List[int]:
+    """Canonical option indexes in the order this student sees them
+
+    Position i of the result holds the index in question.options of the
+    option shown i-th. Pinned options keep their position.
+    """
+    options = question.options or []
+    pinned = {index for index, option in enumerate(options) if PINNED_OPTION.match(str(option))}
+    shuffled = iter(sorted(
+        (index for index in range(len(options)) if index not in pinned),
+        key=lambda index: _sort_key(quiz_id, student_id, question.id, index)
+    ))
+    return [index if index in pinned else next(shuffled) for index in range(len(options))]
+
+
+def option_orders(quiz_id: int, student_id: int, questions: Sequence) -> Dict[int, List[int]]:
+    """option_order for every multiple choice question, keyed by question id"""
+    return {
+        question.id: option_order(quiz_id, student_id, question)
+        for question in questions
+        if question.question_type == 'multiple_choice' and question.options
+    }
+
+
+def canonical_answer(quiz_id: int, student_id: int, question, answer: Optional[str]) -> Optional[str]:
+    """Map the option position a student chose back to the canonical option index
+
+    Answers to other question types, and values that are not a valid
+    position, are returned unchanged.
+    """
+    if question.question_type != 'multiple_choice' or not question.options or answer is None:
+        return answer
+    try:
+        position = int(answer)
+    except ValueError:
+        return answer
+    order = option_order(quiz_id, student_id, question)
+    if not 0 <= position < len(order):
+        return answer
+    return str(order[position])
@@ -0,0 +1,386 @@
+"""Bulk import of student rosters from registrar CSV files
+
+The rows are cleaned and validated with vectorized pandas string
+operations. The students that already have an account and the existing
+enrollments of the subject are then read with a few IN (...) queries,
+and the new accounts and enrollments are written with one bulk INSERT
+each, all in a single transaction. The number of statements no longer
+grows with the number of rows.
+
+New accounts are set up in one of two ways. With 'activation' (the
+default) they get no password hash at all, only the SHA-256 of a random
+one-time code; the student logs in with the code and chooses a password,
+so the expensive hash is computed once, at first login. With 'password'
+they get the default password, hashed in a process pool.
+
+A registrar file usually covers many subjects. Passing several subjects
+imports each row into the subject its Subject Code names, so one pass over
+the file enrolls the students of all of a teacher's subjects; rows for
+subjects the teacher does not own are left out.
+
+Large files are streamed with import_roster_file: ROSTER_CHUNK_SIZE rows
+are read, imported and committed at a time, so memory stays flat and a
+bad row late in the file does not undo the rows before it. Rejected rows
+and activation codes are written to CSV reports as the chunks go by.
+Lines with more fields than the header are kept as rows, flagged in
+MALFORMED_COLUMN, and rejected as malformed, so they are reported too and
+the row numbers of the lines after them stay right.
+"""
+import csv
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Union
+import pandas as pd
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+from models import db, User, Subject, StudentSubject
+
+REQUIRED_COLUMNS = ['Full Name', 'Course and Year', 'Student Email', 'Subject Code']
+EMAIL_PATTERN = r'^[^@\s]+@spist\.edu$'
+DEFAULT_PASSWORD = 'changeme'
+ACCOUNT_SETUPS = ('activation', 'password')
+
+# Processes used to hash the default password of new accounts
+HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+
+# Values per IN (...) clause, below SQLite's bound parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+# Rows read, imported and committed at a time by import_roster_file
+ROSTER_CHUNK_SIZE = int(os.environ.get('ROSTER_CHUNK_SIZE', 5000))
+
+ERROR_REPORT_COLUMNS = ['row', 'full_name', 'email', 'reason']
+ACTIVATION_REPORT_COLUMNS = ['full_name', 'email', 'username', 'activation_code']
+
+# Extra column read after the header's; set on lines with more fields than the header
+MALFORMED_COLUMN = '_malformed'
+
+
+class RosterImportError(ValueError):
+    """Raised when a roster file cannot be imported at all"""
+
+
+class RosterImportResult:
+    """Counts and rejected rows of one roster import"""
+
+    def __init__(self):
+        self.rows = 0  # Rows read from the file
+        self.matched = 0  # Rows for the subject(s) being imported
+        self.subjects = set()  # Codes of the subjects that had rows
+        self.enrolled = 0
+        self.already_enrolled = 0
+        self.created = 0  # New student accounts
+        self.errors = []  # {'row', 'full_name', 'email', 'reason'} per rejected row
+        self.activation_codes = []  # {'full_name', 'email', 'username', 'activation_code'} per new account
+        self.error_count = 0  # Rejected rows, including those not kept in errors
+
+    def add_error(self, row: int, full_name: str, email: str, reason: str) -> None:
+        self.errors.append({'row': row, 'full_name': full_name, 'email': email, 'reason': reason})
+        self.error_count += 1
+
+    def add(self, other: 'RosterImportResult') -> None:
+        """Add the counts of another (chunk's) result; its rows and codes are not kept"""
+        self.rows += other.rows
+        self.matched += other.matched
+        self.subjects |= other.subjects
+        self.enrolled += other.enrolled
+        self.already_enrolled += other.already_enrolled
+        self.created += other.created
+        self.error_count += other.error_count
+
+
+def _header(source) -> List[str]:
+    """Column names of a CSV path or file object, without moving the file object"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            line = f.readline()
+    else:
+        position = source.tell()
+        line = source.readline()
+        source.seek(position)
+    if isinstance(line, bytes):
+        line = line.decode('utf-8-sig', errors='replace')
+    names = []
+    seen = {}
+    for name in next(csv.reader([line]), []):
+        # Repeated names get a suffix, as pandas does
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(f'{name}.{count}' if count else name)
+    return names
+
+
+def _read_csv(source, **options):
+    dtype = {column: str for column in REQUIRED_COLUMNS}
+    dtype[MALFORMED_COLUMN] = str
+    names = _header(source)
+    width = len(names)
+
+    def keep_bad_line(fields):
+        # Two or more extra fields; the joined extras are never empty
+        return fields[:width] + [','.join(fields[width:])]
+
+    try:
+        return pd.read_csv(source, header=None, skiprows=1, names=names + [MALFORMED_COLUMN],
+                           on_bad_lines=keep_bad_line, engine='python', delimiter=',', dtype=dtype, **options)
+    except TypeError:
+        # For older pandas versions
+        return pd.read_csv(source, error_bad_lines=False, delimiter=',', dtype=dtype, **options)
+
+
+def _check_columns(df: pd.DataFrame) -> None:
+    if not all(column in df.columns for column in REQUIRED_COLUMNS):
+        raise RosterImportError('CSV file must contain columns: Full Name, Course and Year, Student Email, Subject Code')
+
+
+def check_roster_columns(file_path: str) -> None:
+    """Read only the header of a roster CSV
+
+    Raises:
+        RosterImportError: A required column is missing
+    """
+    _check_columns(_read_csv(file_path, nrows=0))
+
+
+def read_roster(file_path: str) -> pd.DataFrame:
+    """Read a whole roster CSV; malformed lines are flagged in MALFORMED_COLUMN
+
+    Raises:
+        RosterImportError: A required column is missing
+    """
+    df = _read_csv(file_path)
+    _check_columns(df)
+    return df
+
+
+def iter_roster(source, chunksize: int = ROSTER_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Read a roster CSV chunksize rows at a time; the index keeps counting across chunks
+
+    Raises:
+        RosterImportError: A required column is missing
+    """
+    with _read_csv(source, chunksize=chunksize) as reader:
+        for chunk in reader:
+            _check_columns(chunk)
+            yield chunk
+
+
+def clean_roster(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip the required columns, lower-case the emails and flag invalid ones
+
+    Returns:
+        DataFrame with the required columns, a 'username' column and a
+        boolean 'valid_email' column; the index is kept
+    """
+    df = df[REQUIRED_COLUMNS].fillna('').astype(str).apply(lambda column: column.str.strip())
+    df['Student Email'] = df['Student Email'].str.lower()
+    df['valid_email'] = df['Student Email'].str.match(EMAIL_PATTERN)
+    df['username'] = df['Student Email'].str.split('@').str[0]
+    return df
+
+
+def _lookup(column, values: List) -> List:
+    """Rows of column's entity whose column is one of values, LOOKUP_BATCH_SIZE per query"""
+    model = column.class_
+    rows = []
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        batch = values[start:start + LOOKUP_BATCH_SIZE]
+        rows.extend(db.session.execute(select(model.id, model.email, model.username)
+                                       .where(column.in_(batch))).all())
+    return rows
+
+
+def teacher_subjects(teacher_id: int) -> List[Subject]:
+    """All subjects of a teacher, read with one query, for importing a file that covers them all"""
+    return Subject.query.filter_by(teacher_id=teacher_id).all()
+
+
+def _subject_ids(subjects) -> Dict[str, int]:
+    """{subject code: subject id} of a subject, several subjects, or such a mapping itself"""
+    if isinstance(subjects, dict):
+        return subjects
+    if isinstance(subjects, Subject):
+        subjects = [subjects]
+    return {str(subject.subject_code).strip(): subject.id for subject in subjects}
+
+
+def _hash_password(password: str) -> str:
+    # Same method as User.set_password
+    return generate_password_hash(password, method='pbkdf2:sha256')
+
+
+def hash_passwords(passwords: List[str], hash_password: Callable[[str], str] = _hash_password,
+                   workers: int = HASH_WORKERS) -> List[str]:
+    """Hash many passwords, spread over `workers` processes
+
+    hash_password must be a module-level function so it can be sent to the
+    worker processes.
+    """
+    if workers <= 1 or len(passwords) < 2 * workers:
+        return [hash_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(hash_password, passwords, chunksize=max(len(passwords) // (4 * workers), 1)))
+
+
+def new_activation_code() -> str:
+    """A one-time code that is easy to type: 10 characters from an unambiguous alphabet"""
+    alphabet = 'abcdefghjkmnpqrstuvwxyz23456789'
+    return ''.join(secrets.choice(alphabet) for _ in range(10))
+
+
+def _new_accounts(new_students: pd.DataFrame, result: RosterImportResult, account_setup: str,
+                  password: str, hash_password: Callable[[str], str], workers: int) -> List[Dict]:
+    accounts = [{'username': username, 'email': email, 'role': 'student'}
+                for email, username in zip(new_students['Student Email'], new_students['username'])]
+    if account_setup == 'activation':
+        for account, full_name in zip(accounts, new_students['Full Name']):
+            code = new_activation_code()
+            account['activation_code_hash'] = User.hash_activation_code(code)
+            result.activation_codes.append({'full_name': full_name, 'email': account['email'],
+                                            'username': account['username'], 'activation_code': code})
+    else:
+        hashes = hash_passwords([password] * len(accounts), hash_password, workers)
+        for account, password_hash in zip(accounts, hashes):
+            account['password_hash'] = password_hash
+    return accounts
+
+
+def import_roster(df: pd.DataFrame, subjects: Union[Subject, Iterable[Subject], Dict[str, int]], account_setup: str = 'activation',
+                  password: str = DEFAULT_PASSWORD, hash_password: Callable[[str], str] = _hash_password,
+                  workers: int = HASH_WORKERS, commit: bool = True) -> RosterImportResult:
+    """Create accounts for new students and enroll the roster's students in their subjects
+
+    Only rows whose Subject Code matches one of the subjects are imported,
+    each into that subject. Students listed more than once for a subject
+    are enrolled once.
+
+    Args:
+        df: The roster as read by read_roster
+        subjects: The subject to enroll the students in, several subjects, or
+            {subject code: subject id}
+        account_setup: 'activation' to give new accounts a one-time activation
+            code instead of a password, or 'password' for the default password
+        password: Password of the new accounts with 'password'; students should change it
+        hash_password: Turns a password into the stored password hash; it is
+            called once per new account with 'password'
+        workers: Processes hashing the passwords with 'password'
+        commit: Whether to commit the transaction
+
+    Returns:
+        RosterImportResult: What was imported and which rows were rejected
+    """
+    if account_setup not in ACCOUNT_SETUPS:
+        raise ValueError(f"Unknown account setup: {account_setup}")
+    result = RosterImportResult()
+    result.rows = len(df)
+    subject_ids = _subject_ids(subjects)
+    roster = clean_roster(df)
+
+    # A line with extra fields cannot be trusted to name its subject, so it is reported whatever it says
+    if MALFORMED_COLUMN in df:
+        malformed = df[MALFORMED_COLUMN].notna()
+        for row, full_name, email in roster.loc[malformed, ['Full Name', 'Student Email']].itertuples():
+            result.add_error(row + 1, full_name, email, 'Malformed CSV line')
+        roster = roster[~malformed]
+
+    roster = roster[roster['Subject Code'].isin(subject_ids.keys())]
+    result.matched = len(roster)
+    if roster.empty:
+        return result
+    roster = roster.assign(subject_id=roster['Subject Code'].map(subject_ids))
+    result.subjects = set(roster['Subject Code'].unique())
+
+    for row, full_name, email in roster.loc[~roster['valid_email'], ['Full Name', 'Student Email']].itertuples():
+        result.add_error(row + 1, full_name, email, 'Invalid email format')
+    roster = roster[roster['valid_email']]
+
+    # A student listed twice for a subject counts as already enrolled the second time
+    duplicates = roster.duplicated(['Student Email', 'subject_id'])
+    result.already_enrolled += int(duplicates.sum())
+    roster = roster[~duplicates]
+
+    emails = roster['Student Email'].unique().tolist()
+    user_ids = {email: user_id for user_id, email, _ in _lookup(User.email, emails)}
+
+    new_students = roster[~roster['Student Email'].isin(user_ids.keys())]
+    taken = {username for _, _, username in _lookup(User.username, new_students['username'].unique().tolist())}
+    clashes = new_students['username'].isin(taken)
+    for row, full_name, email in new_students.loc[clashes, ['Full Name', 'Student Email']].itertuples():
+        result.add_error(row + 1, full_name, email, 'Username already taken')
+    # One account per student, however many of the subjects list them
+    new_students = new_students[~clashes].drop_duplicates('Student Email')
+
+    try:
+        if not new_students.empty:
+            accounts = _new_accounts(new_students, result, account_setup, password, hash_password, workers)
+            created = db.session.execute(insert(User).returning(User.id, User.email), accounts).all()
+            user_ids.update((email, user_id) for user_id, email in created)
+            result.created = len(created)
+
+        enrolled = {tuple(row) for row in db.session.execute(
+            select(StudentSubject.student_id, StudentSubject.subject_id)
+            .where(StudentSubject.subject_id.in_(roster['subject_id'].unique().tolist())))}
+        roster = roster.assign(student_id=roster['Student Email'].map(user_ids))
+        roster = roster.dropna(subset=['student_id']).astype({'student_id': int})  # Rejected rows have no id
+        already = pd.MultiIndex.from_frame(roster[['student_id', 'subject_id']]).isin(enrolled)
+        result.already_enrolled += int(already.sum())
+        enrollments = [{'student_id': student_id, 'subject_id': subject_id,
+                        'enrollment_status': 'approved'}  # Auto-approve since it's from master list
+                       for student_id, subject_id in zip(roster.loc[~already, 'student_id'].tolist(),
+                                                         roster.loc[~already, 'subject_id'].tolist())]
+        if enrollments:
+            db.session.execute(insert(StudentSubject), enrollments)
+        result.enrolled = len(enrollments)
+
+        if commit:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
+
+
+def import_roster_file(file_path: str, subjects, error_report: Optional[IO[str]] = None,
+                       activation_report: Optional[IO[str]] = None, chunksize: int = ROSTER_CHUNK_SIZE,
+                       progress_callback: Optional[Callable[[int, int, RosterImportResult], None]] = None,
+                       **options) -> RosterImportResult:
+    """Stream a roster CSV through import_roster, committing every chunk
+
+    Args:
+        file_path: The roster CSV
+        subjects: The subject to enroll the students in, or several subjects
+        error_report: Text file the rejected rows are written to as CSV
+        activation_report: Text file the activation codes of new accounts are written to as CSV
+        chunksize: Rows imported per transaction
+        progress_callback: Called after every chunk with (bytes read, file
+            size, the totals so far)
+        **options: Passed on to import_roster, e.g. account_setup
+
+    Returns:
+        RosterImportResult: The totals of all chunks, without their rows
+
+    Raises:
+        RosterImportError: A required column is missing; nothing was imported
+    """
+    totals = RosterImportResult()
+    errors = csv.DictWriter(error_report, fieldnames=ERROR_REPORT_COLUMNS) if error_report else None
+    codes = csv.DictWriter(activation_report, fieldnames=ACTIVATION_REPORT_COLUMNS) if activation_report else None
+    for writer in (errors, codes):
+        if writer:
+            writer.writeheader()
+
+    # Read once; the subjects expire with every chunk's commit
+    subject_ids = _subject_ids(subjects)
+    total_bytes = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        for chunk in iter_roster(f, chunksize):
+            result = import_roster(chunk, subject_ids, commit=True, **options)
+            totals.add(result)
+            if errors:
+                errors.writerows(result.errors)
+            if codes:
+                codes.writerows(result.activation_codes)
+            if progress_callback:
+                progress_callback(f.tell(), total_bytes, totals)
+    return totals
@@ -0,0 +1,158 @@
+"""Background roster import jobs
+
+Uploading a roster creates a RosterImportJob and returns at once; the file
+is streamed through import_roster_file in a worker thread, one committed
+chunk at a time, while the import page polls the job for progress. The
+rejected rows and the activation codes of new accounts are written to CSV
+reports next to the uploads, so the janitor expires them with the upload.
+A job without a subject imports a registrar file into all of the
+teacher's subjects in the same single pass.
+A failure part-way through keeps the chunks that were already imported;
+jobs whose worker process exited before they finished are marked as failed
+by fail_interrupted_imports.
+"""
+import os
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from models import db, RosterImportJob, Subject
+from roster_import import import_roster_file, teacher_subjects
+from upload_store import get_upload_store
+from job_workers import current_worker, worker_alive
+
+ROSTER_JOB_WORKERS = int(os.environ.get('ROSTER_JOB_WORKERS', 1))
+
+_executor = ThreadPoolExecutor(max_workers=ROSTER_JOB_WORKERS, thread_name_prefix='roster-import')
+_futures = {}
+_futures_lock = threading.Lock()
+
+
+def start_roster_import(subject, file_path, account_setup, user_id):
+    """Queue the import of a saved roster upload
+
+    Args:
+        subject: The subject to enroll the students in, or None for all of
+            the teacher's subjects
+        file_path: Path of the saved upload, with the roster columns checked
+        account_setup: How new accounts are set up, see import_roster
+        user_id: The teacher importing the roster
+
+    Returns:
+        RosterImportJob: The queued job; its id is used to poll progress
+    """
+    job = RosterImportJob(
+        id=uuid.uuid4().hex,
+        subject_id=subject.id if subject else None,
+        user_id=user_id,
+        file_path=file_path,
+        account_setup=account_setup,
+        total_bytes=os.path.getsize(file_path),
+        worker=current_worker()
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    future = _executor.submit(run_roster_import, app, job.id)
+    with _futures_lock:
+        _futures[job.id] = future
+    future.add_done_callback(lambda _: _forget(job.id))
+    return job
+
+
+def _forget(job_id):
+    with _futures_lock:
+        _futures.pop(job_id, None)
+
+
+def wait_for_roster_import(job_id, timeout=None):
+    """Block until a job started in this process has finished"""
+    with _futures_lock:
+        future = _futures.get(job_id)
+    if future:
+        future.result(timeout)
+
+
+def fail_interrupted_imports(app):
+    """Mark jobs whose worker process exited before they finished as failed
+
+    Called at startup. Jobs still running in another live worker are left
+    alone. The chunks the failed jobs committed stay imported, and importing
+    the file again skips the students already enrolled.
+    """
+    with app.app_context():
+        jobs = RosterImportJob.query.filter(RosterImportJob.status.in_(('queued', 'running'))).all()
+        jobs = [job for job in jobs if not worker_alive(job.worker)]
+        for job in jobs:
+            job.status = 'failed'
+            job.error = 'The import was interrupted by a restart; import the file again to finish it'
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+    return len(jobs)
+
+
+def report_path(job_id, kind):
+    """Where the `kind` ('errors' or 'activation_codes') report of a job is written"""
+    return os.path.join(get_upload_store().directory, 'reports', f'{job_id}_{kind}.csv')
+
+
+def run_roster_import(app, job_id):
+    """Stream a job's roster into its subject(s), updating the job after every chunk"""
+    with app.app_context():
+        job = db.session.get(RosterImportJob, job_id)
+        if not job or not job.is_active:
+            return
+        if job.subject_id:
+            subjects = db.session.get(Subject, job.subject_id)
+        else:
+            subjects = teacher_subjects(job.user_id)
+        job.status = 'running'
+        job.error_report_path = report_path(job_id, 'errors')
+        if job.account_setup == 'activation':
+            job.activation_report_path = report_path(job_id, 'activation_codes')
+        db.session.commit()
+
+        def on_chunk(bytes_done, total_bytes, totals):
+            # Runs right after the chunk's own commit
+            job.bytes_done = bytes_done
+            job.total_bytes = total_bytes
+            job.rows_done = totals.rows
+            job.matched_count = totals.matched
+            job.subject_codes = sorted(totals.subjects)
+            job.enrolled_count = totals.enrolled
+            job.already_enrolled_count = totals.already_enrolled
+            job.created_count = totals.created
+            job.error_count = totals.error_count
+            db.session.commit()
+
+        activation_report = None
+        try:
+            os.makedirs(os.path.dirname(job.error_report_path), exist_ok=True)
+            with open(job.error_report_path, 'w', newline='', encoding='utf-8') as error_report:
+                if job.activation_report_path:
+                    activation_report = open(job.activation_report_path, 'w', newline='', encoding='utf-8')
+                import_roster_file(job.file_path, subjects, error_report=error_report,
+                                   activation_report=activation_report, progress_callback=on_chunk,
+                                   account_setup=job.account_setup)
+
+            job.status = 'completed'
+            job.bytes_done = job.total_bytes
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+        except Exception as e:
+            print(f"Roster import job {job_id} failed: {str(e)}")
+            db.session.rollback()
+            # The chunks committed before the failure stay imported, and so do their counts
+            job = db.session.get(RosterImportJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+        finally:
+            if activation_report:
+                activation_report.close()
+            db.session.remove()
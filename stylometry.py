@@ -0,0 +1,178 @@
+import re
+import math
+from models import db, StylometricProfile, StylometricSample
+from phrase_matcher import get_phrase_matcher
+
+# Style features tracked per student; each maps to <name>_mean / <name>_m2
+# columns on StylometricProfile and a column on StylometricSample
+FEATURES = ['sentence_length', 'lexical_diversity', 'phrase_rate']
+
+FEATURE_LABELS = {
+    'sentence_length': 'Avg. Sentence Length',
+    'lexical_diversity': 'Lexical Diversity',
+    'phrase_rate': 'Formal Phrases per Sentence',
+}
+
+# Smallest spread assumed per feature, so a student whose essays never used a
+# formal phrase still gets a finite z-score when one suddenly does
+MIN_STD = {
+    'sentence_length': 1.0,
+    'lexical_diversity': 0.02,
+    'phrase_rate': 0.1,
+}
+
+# Number of graded essays needed before the baseline is trusted
+MIN_BASELINE_ESSAYS = 3
+
+# Mean absolute z-score that maps to a deviation score of 100
+MAX_DEVIATION_Z = 3.0
+
+
+class RunningStats:
+    """Mean and variance updated one value at a time (Welford's algorithm)"""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def push(self, value):
+        """Add a value in O(1)"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value):
+        """Undo push(value) in O(1), e.g. to compare an essay with the rest of the history"""
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        old_mean = (self.count * self.mean - value) / (self.count - 1)
+        self.m2 = max(self.m2 - (value - old_mean) * (value - self.mean), 0.0)
+        self.mean = old_mean
+        self.count -= 1
+
+    @property
+    def variance(self):
+        """Sample variance (0 until there are two values)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def zscore(self, value, min_std=0.0):
+        """Standard score of a value; 0 if the spread is not known yet"""
+        std = max(self.std, min_std)
+        if std == 0:
+            return 0.0
+        return (value - self.mean) / std
+
+
+def extract_features(text):
+    """Compute the tracked style features of an essay"""
+    flattened = re.sub(r'([.!?])\s+([A-Z])', r'\1\n\2', (text or '').replace('\n', ' '))
+    sentences = [s for s in flattened.split('\n') if s.strip()]
+    words = re.findall(r'\w+', (text or '').lower())
+    sentence_count = max(len(sentences), 1)
+
+    return {
+        'sentence_length': len(words) / sentence_count,
+        'lexical_diversity': len(set(words)) / len(words) if words else 0.0,
+        'phrase_rate': get_phrase_matcher().scan(text).total / sentence_count,
+    }
+
+
+def profile_stats(profile, feature):
+    """Read the running statistics of one feature from a profile"""
+    return RunningStats(
+        profile.essay_count,
+        getattr(profile, f'{feature}_mean'),
+        getattr(profile, f'{feature}_m2')
+    )
+
+
+class StylometryService:
+    """Maintain per-student style baselines and score essays against them"""
+
+    @staticmethod
+    def record_essay(submission, commit=True):
+        """Fold a graded essay into its author's profile
+
+        Each essay is recorded once; the profile update is O(1) and never
+        re-reads the student's earlier essays.
+
+        Returns:
+            True if the profile was updated, False if the essay was already recorded
+        """
+        if StylometricSample.query.filter_by(submission_id=submission.id).first():
+            return False
+
+        features = extract_features(submission.submitted_answer)
+
+        profile = StylometricProfile.query.filter_by(student_id=submission.student_id).first()
+        if not profile:
+            profile = StylometricProfile(student_id=submission.student_id, essay_count=0)
+            for feature in FEATURES:
+                setattr(profile, f'{feature}_mean', 0.0)
+                setattr(profile, f'{feature}_m2', 0.0)
+            db.session.add(profile)
+
+        for feature in FEATURES:
+            stats = profile_stats(profile, feature)
+            stats.push(features[feature])
+            setattr(profile, f'{feature}_mean', stats.mean)
+            setattr(profile, f'{feature}_m2', stats.m2)
+        profile.essay_count += 1
+
+        db.session.add(StylometricSample(
+            submission_id=submission.id,
+            student_id=submission.student_id,
+            **features
+        ))
+
+        if commit:
+            db.session.commit()
+        return True
+
+    @staticmethod
+    def compare_to_baseline(submission):
+        """Score an essay against the student's own baseline
+
+        If the essay is already part of the profile it is removed from the
+        running statistics first, so it is not compared with itself.
+
+        Returns:
+            Dict with per-feature z-scores and an overall deviation score
+            (0-100), or None if the student has too few graded essays
+        """
+        profile = StylometricProfile.query.filter_by(student_id=submission.student_id).first()
+        if not profile:
+            return None
+
+        sample = StylometricSample.query.filter_by(submission_id=submission.id).first()
+        if sample:
+            features = {feature: getattr(sample, feature) for feature in FEATURES}
+        else:
+            features = extract_features(submission.submitted_answer)
+
+        zscores = {}
+        baseline_count = profile.essay_count
+        for feature in FEATURES:
+            stats = profile_stats(profile, feature)
+            if sample:
+                stats.remove(features[feature])
+            baseline_count = stats.count
+            zscores[feature] = round(stats.zscore(features[feature], MIN_STD[feature]), 2)
+
+        if baseline_count < MIN_BASELINE_ESSAYS:
+            return None
+
+        mean_abs_z = sum(abs(z) for z in zscores.values()) / len(zscores)
+        return {
+            'essay_count': baseline_count,
+            'features': {feature: round(value, 3) for feature, value in features.items()},
+            'zscores': zscores,
+            'deviation_score': round(min(mean_abs_z / MAX_DEVIATION_Z, 1) * 100, 1)
+        }
@@ -1,13 +1,15 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response, jsonify, send_file
 from flask_login import login_required, current_user
 from flask_wtf import FlaskForm
-from wtforms import StringField, SubmitField, TextAreaField, HiddenField, FileField
+from wtforms import StringField, SubmitField, TextAreaField, HiddenField, FileField, RadioField
 from wtforms.validators import DataRequired, Length, Email, ValidationError
-from models import db, Subject, StudentSubject, User, Announcement
+from models import db, Subject, StudentSubject, User, Announcement, RosterImportJob
 from datetime import datetime
-import pandas as pd
 import os
-from werkzeug.utils import secure_filename
+import pandas as pd
+from upload_store import get_upload_store, UploadError
+from roster_import import check_roster_columns, RosterImportError
+from roster_jobs import start_roster_import
 
 # Create the blueprint
 subject_bp = Blueprint('subject', __name__)
@@ -37,6 +39,10 @@ class EnrollmentVerificationForm(FlaskForm):
 # CSV Import Form
 class CSVImportForm(FlaskForm):
     csv_file = FileField('CSV File', validators=[DataRequired()])
+    account_setup = RadioField('New Student Accounts', default='activation', choices=[
+        ('activation', 'Give each new student a one-time activation code (download the codes after the import)'),
+        ('password', 'Use the default password "changeme"')
+    ])
     submit = SubmitField('Import Students')
 
 @subject_bp.route('/create', methods=['GET', 'POST'])
@@ -111,150 +117,93 @@ def view_subject(subject_id):
                            enrolled_students=enrolled_students,
                            announcements=announcements)
 
-@subject_bp.route('/import_students/<int:subject_id>', methods=['GET', 'POST'])
-@login_required
-def import_students(subject_id):
-    """Import students from CSV file"""
-    if current_user.role != 'teacher':
-        flash('Only teachers can import students.')
-        return redirect(url_for('dashboard'))
-    
-    subject = Subject.query.filter_by(id=subject_id, teacher_id=current_user.id).first_or_404()
+def _import_page_url(subject_id):
+    """The import page of a subject, or of all the teacher's subjects if subject_id is None"""
+    if subject_id:
+        return url_for('subject.import_students', subject_id=subject_id)
+    return url_for('subject.import_roster')
+
+def _roster_import_page(subject):
+    """Queue an uploaded roster for a subject (None: all of the teacher's subjects) or show the latest import"""
     form = CSVImportForm()
+    page_url = _import_page_url(subject.id if subject else None)
     
     if form.validate_on_submit():
         try:
-            # Create uploads directory if it doesn't exist
-            uploads_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
-            if not os.path.exists(uploads_dir):
-                os.makedirs(uploads_dir, exist_ok=True)
-            
-            # Save the uploaded file
+            # Save the uploaded file; the upload store's janitor removes it later
             csv_file = request.files['csv_file']
-            filename = secure_filename(csv_file.filename)
-            file_path = os.path.join(uploads_dir, filename)
-            csv_file.save(file_path)
-            
-            # Process the CSV file with enhanced error handling
-            try:
-                # For newer pandas versions, with data type specifications
-                df = pd.read_csv(file_path, 
-                    on_bad_lines='skip', 
-                    delimiter=',',
-                    dtype={
-                        'Full Name': str,
-                        'Course and Year': str,
-                        'Student Email': str,
-                        'Subject Code': str  # Ensure subject code is treated as string
-                    })
-            except TypeError:
-                # For older pandas versions
-                df = pd.read_csv(file_path, error_bad_lines=False, delimiter=',')
-                
-            required_columns = ['Full Name', 'Course and Year', 'Student Email', 'Subject Code']
-            
-            # Check if all required columns are present
-            if not all(col in df.columns for col in required_columns):
-                flash('CSV file must contain columns: Full Name, Course and Year, Student Email, Subject Code')
-                return redirect(url_for('subject.import_students', subject_id=subject_id))
-            
-            # Clean and validate data
-            df = df.fillna('')  # Replace NaN with empty strings
-            df = df.applymap(lambda x: str(x).strip() if isinstance(x, str) else x)  # Strip whitespace
-            
-            # Convert subject codes to strings for comparison
-            df['Subject Code'] = df['Subject Code'].astype(str)
-            current_subject_code = str(subject.subject_code)
-            
-            # Filter rows for the current subject with proper string comparison
-            subject_df = df[df['Subject Code'].str.strip() == current_subject_code.strip()]
-            
-            if len(subject_df) == 0:
-                flash(f'No students found for subject code {current_subject_code} in the CSV file.')
-                return redirect(url_for('subject.import_students', subject_id=subject_id))
-            
-            # Initialize counters and error tracking
-            success_count = 0
-            error_count = 0
-            already_enrolled = 0
-            already_registered = 0
-            error_details = []  # Track specific error messages
-            
-            for _, row in subject_df.iterrows():
-                full_name = row['Full Name']
-                email = row['Student Email']
-                
-                # Enhanced email validation
-                email = str(email).strip().lower()
-                if not email or not email.endswith('@spist.edu'):
-                    error_count += 1
-                    error_details.append(f"Invalid email format for {full_name}: {email}")
-                    continue
-                
-                # Check if user already exists
-                user = User.query.filter_by(email=email).first()
-                
-                if not user:
-                    # Create new user
-                    username = email.split('@')[0]  # Use part before @ as username
-                    user = User(
-                        username=username,
-                        email=email,
-                        role='student'
-                    )
-                    # Set a default password (students should reset this)
-                    user.set_password('changeme')
-                    db.session.add(user)
-                    db.session.flush()  # Get user ID without committing
-                    already_registered += 1
-                
-                # Check if student is already enrolled
-                existing_enrollment = StudentSubject.query.filter_by(
-                    student_id=user.id,
-                    subject_id=subject.id
-                ).first()
-                
-                if existing_enrollment:
-                    already_enrolled += 1
-                    continue
-                
-                # Create enrollment
-                enrollment = StudentSubject(
-                    student_id=user.id,
-                    subject_id=subject.id,
-                    enrollment_status='approved'  # Auto-approve since it's from master list
-                )
-                db.session.add(enrollment)
-                success_count += 1
-            
-            # Commit all changes
-            db.session.commit()
-            
-            # Delete the uploaded file
-            os.remove(file_path)
-            
-            # Prepare detailed status message
-            status_msg = f'Import Summary:\n'
-            status_msg += f'- Successfully imported: {success_count} students\n'
-            status_msg += f'- Already enrolled: {already_enrolled}\n'
-            status_msg += f'- New accounts created: {already_registered}\n'
-            status_msg += f'- Errors: {error_count}'
+            file_path = get_upload_store().save(csv_file, allowed_extensions={'.csv'}).path
             
-            if error_details:
-                status_msg += '\n\nError Details:\n'
-                status_msg += '\n'.join(error_details[:5])  # Show first 5 errors
-                if len(error_details) > 5:
-                    status_msg += f'\n...and {len(error_details) - 5} more errors'
-            
-            flash(status_msg)
+            # Only the header is read now; the rows are streamed by the background job
+            check_roster_columns(file_path)
+            start_roster_import(subject, file_path, form.account_setup.data, current_user.id)
+            return redirect(page_url)
             
+        except (UploadError, RosterImportError) as e:
+            flash(str(e))
+            return redirect(page_url)
         except Exception as e:
             db.session.rollback()
             flash(f'An error occurred while importing students: {str(e)}')
         
         return redirect(url_for('dashboard'))
     
-    return render_template('subject/import_students.html', form=form, subject=subject)
+    # The teacher's latest import of this page, running or finished
+    job = RosterImportJob.query.filter_by(subject_id=subject.id if subject else None, user_id=current_user.id) \
+        .order_by(RosterImportJob.created_at.desc()).first()
+    return render_template('subject/import_students.html', form=form, subject=subject, job=job)
+
+@subject_bp.route('/import_students/<int:subject_id>', methods=['GET', 'POST'])
+@login_required
+def import_students(subject_id):
+    """Import students from CSV file"""
+    if current_user.role != 'teacher':
+        flash('Only teachers can import students.')
+        return redirect(url_for('dashboard'))
+    
+    subject = Subject.query.filter_by(id=subject_id, teacher_id=current_user.id).first_or_404()
+    return _roster_import_page(subject)
+
+@subject_bp.route('/import_roster', methods=['GET', 'POST'])
+@login_required
+def import_roster():
+    """Import a registrar CSV covering many subjects into all of the teacher's subjects in one pass"""
+    if current_user.role != 'teacher':
+        flash('Only teachers can import students.')
+        return redirect(url_for('dashboard'))
+    
+    return _roster_import_page(None)
+
+@subject_bp.route('/import_students/jobs/<job_id>')
+@login_required
+def roster_import_status(job_id):
+    """Progress and counts of a background roster import"""
+    job = RosterImportJob.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        return jsonify({'error': 'You do not have permission to view this import.'}), 403
+    return jsonify(job.to_dict())
+
+@subject_bp.route('/import_students/jobs/<job_id>/report/<string:kind>')
+@login_required
+def download_import_report(job_id, kind):
+    """Download a report of a roster import: the rejected rows or the activation codes"""
+    job = RosterImportJob.query.get_or_404(job_id)
+    paths = {'errors': job.error_report_path, 'activation_codes': job.activation_report_path}
+    if job.user_id != current_user.id or not paths.get(kind):
+        flash('This import report is not available.')
+        return redirect(url_for('dashboard'))
+    
+    if job.is_active or not os.path.exists(paths[kind]):
+        flash('This import report is not ready or has expired. Import the file again to create a new one.')
+        return redirect(_import_page_url(job.subject_id))
+    
+    subject = db.session.get(Subject, job.subject_id) if job.subject_id else None
+    return send_file(
+        paths[kind],
+        mimetype='text/csv',
+        as_attachment=True,
+        download_name=f'{subject.subject_code if subject else "all_subjects"}_{kind}.csv'
+    )
 
 @subject_bp.route('/download_csv_template')
 @login_required
@@ -0,0 +1,171 @@
+"""Synthetic question documents for tests and benchmarks
+
+    python synthetic_documents.py exam.pdf --pages 200
+    python synthetic_documents.py exam.docx --questions 5000
+"""
+import argparse
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+
+def generate_question_lines(count, start=1):
+    """Yield the lines of `count` numbered questions in the format the parser reads
+
+    Cycles through multiple choice (letter and numeric answers), true/false
+    (statements and True/False options), identification and essay questions.
+    """
+    for number in range(start, start + count):
+        kind = number % 6
+        if kind == 0:
+            yield f"{number}. Which option is correct for item {number}?"
+            yield "A. First option"
+            yield "B. Second option"
+            yield "C. Third option"
+            yield "D. Fourth option"
+            yield f"Answer: {'ABCD'[number % 4]}"
+        elif kind == 1:
+            yield f"{number}. The statement numbered {number} is true. True or False"
+            yield f"Answer: {'True' if number % 2 else 'False'}"
+        elif kind == 2:
+            yield f"{number}. Describe the meaning of concept {number} in a short paragraph."
+            yield "Answer: A clear definition with one example."
+        elif kind == 3:
+            yield f"Question {number}: Water boils at {90 + number % 20} degrees Celsius at sea level."
+            yield "a) True"
+            yield "b) False"
+            yield f"Correct: {'True' if number % 20 == 10 else 'False'}"
+        elif kind == 4:
+            yield f"{number}. What is the name of element number {number % 100}?"
+            yield f"Correct answer: Element {number % 100}"
+        else:
+            yield f"{number}. Pick the largest value in set {number}:"
+            yield f"A) {number}"
+            yield f"B) {number * 2}"
+            yield f"C) {number * 3}"
+            yield "Answer: 3"
+
+
+def generate_question_document(count=10000):
+    """Text of a document with `count` questions"""
+    return '\n'.join(generate_question_lines(count))
+
+
+def _pdf_string(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_text_pdf(path, pages, font_size=10):
+    """Write a plain-text PDF with one list of lines per page (no external dependencies)"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, filled in once the kids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for lines in pages:
+        y = 800
+        content = []
+        for line in lines:
+            content.append(f"BT /F1 {font_size} Tf 40 {y} Td ({_pdf_string(line)}) Tj ET")
+            y -= font_size + 4
+        stream = '\n'.join(content).encode('latin-1', 'replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(None)
+        kids.append(len(objects))
+        objects[-1] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects) - 1))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b' '.join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    with open(path, 'wb') as file:
+        file.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(file.tell())
+            file.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = file.tell()
+        file.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            file.write(b"%010d 00000 n \n" % offset)
+        file.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def write_question_pdf(path, page_count, lines_per_page=50):
+    """Write a PDF of numbered questions; questions may continue on the next page"""
+    lines = generate_question_lines(page_count * lines_per_page)
+    pages = []
+    for _ in range(page_count):
+        page = [line for _, line in zip(range(lines_per_page), lines)]
+        pages.append(page)
+    write_text_pdf(path, pages)
+
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def _docx_paragraph(text):
+    runs = '<w:br/>'.join(f'<w:t xml:space="preserve">{escape(part)}</w:t>' for part in text.split('\n'))
+    return f'<w:p><w:r>{runs}</w:r></w:p>'
+
+
+def write_text_docx(path, blocks):
+    """Write a .docx file without external dependencies
+
+    Args:
+        path: Where to write the file
+        blocks: Paragraph strings, or tables given as lists of rows of cell strings
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _DOCX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _DOCX_RELS)
+        with archive.open('word/document.xml', 'w') as document:
+            document.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                           b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                           b'<w:body>')
+            for block in blocks:
+                if isinstance(block, str):
+                    xml = _docx_paragraph(block)
+                else:
+                    columns = max(len(row) for row in block)
+                    xml = '<w:tbl><w:tblGrid>' + '<w:gridCol/>' * columns + '</w:tblGrid>' + ''.join(
+                        '<w:tr>' + ''.join(f'<w:tc>{_docx_paragraph(cell)}</w:tc>' for cell in row) + '</w:tr>'
+                        for row in block
+                    ) + '</w:tbl>'
+                document.write(xml.encode('utf-8'))
+            document.write(b'<w:sectPr/></w:body></w:document>')
+
+
+def write_question_docx(path, count):
+    """Write a .docx file with `count` numbered questions, one paragraph per line"""
+    write_text_docx(path, generate_question_lines(count))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic question PDF or DOCX file')
+    parser.add_argument('path')
+    parser.add_argument('--pages', type=int, default=100, help='Pages of a PDF')
+    parser.add_argument('--questions', type=int, default=1000, help='Questions in a DOCX file')
+    args = parser.parse_args()
+    if os.path.splitext(args.path)[1].lower() == '.docx':
+        write_question_docx(args.path, args.questions)
+        print(f"Wrote {args.questions} questions to {args.path}")
+    else:
+        write_question_pdf(args.path, args.pages)
+        print(f"Wrote {args.pages} pages to {args.path}")
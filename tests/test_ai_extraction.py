@@ -0,0 +1,71 @@
+"""Tests for chunked, concurrent AI question extraction against the local completion stub"""
+import pytest
+from document_processor import DocumentProcessor
+from openai_stub import start_completion_stub
+from synthetic_documents import generate_question_lines
+
+DOCUMENT = '\n'.join(generate_question_lines(60))
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Run the completion stub and point the processor at it"""
+    server, api_base = start_completion_stub(latency=0.02)
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    monkeypatch.setenv('OPENAI_API_BASE', api_base)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _processor(chunk_tokens=150, concurrency=3):
+    processor = DocumentProcessor(use_cache=False)
+    processor.AI_CHUNK_TOKENS = chunk_tokens
+    processor.AI_MAX_CONCURRENCY = concurrency
+    return processor
+
+
+def test_chunks_split_at_question_boundaries():
+    """Test that every chunk starts with a question and none exceeds the budget"""
+    processor = _processor()
+    chunks = processor._split_text_for_ai(DOCUMENT)
+
+    assert len(chunks) > 1
+    assert '\n'.join(chunks) == DOCUMENT
+    assert all(processor.QUESTION_START_PATTERN.match(chunk) for chunk in chunks)
+    assert all(len(chunk) <= 150 * processor.AI_CHARS_PER_TOKEN for chunk in chunks)
+
+
+def test_concurrent_chunks_merge_in_document_order(stub):
+    """Test that chunk results are merged in order with bounded concurrency"""
+    processor = _processor()
+
+    questions, error = processor._extract_questions_with_ai(DOCUMENT)
+
+    assert error is None
+    assert [q['question_text'] for q in questions] == \
+        [q['question_text'] for q in processor._parse_text_for_questions(DOCUMENT)]
+    assert stub.state.request_count == len(processor._split_text_for_ai(DOCUMENT))
+    assert 1 < stub.state.max_in_flight <= 3
+
+
+def test_failed_chunk_falls_back_to_regex(stub):
+    """Test that one failing chunk is regex-parsed and not cached as an AI result"""
+    stub.state.fail_marker = 'item 30?'
+    processor = _processor()
+
+    questions, error = processor._extract_questions_with_ai(DOCUMENT)
+
+    assert error is None
+    assert processor._ai_partial_fallback is True
+    assert len(questions) == 60
+
+
+def test_merge_drops_repeated_questions():
+    """Test that questions repeated across chunks are kept once"""
+    processor = _processor()
+    first = {'question_text': 'What is  2 + 2?', 'question_type': 'identification'}
+    repeat = {'question_text': 'what is 2 + 2?', 'question_type': 'identification'}
+    other = {'question_text': 'What is 2 + 2?', 'question_type': 'essay'}
+
+    assert processor._merge_question_lists([[first], [repeat, other]]) == [first, other]
@@ -0,0 +1,117 @@
+"""Tests for the pooled AI-detection provider client against the local stub server"""
+import pytest
+import ai_provider_client
+from ai_provider_client import (
+    CircuitBreaker, CircuitOpenError, ProviderClient, ProviderError, get_provider, get_provider_client
+)
+from ai_provider_stub import start_stub_server
+
+
+@pytest.fixture
+def stub():
+    """Run the stub provider for the duration of a test"""
+    server, base_url = start_stub_server()
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+
+def _client(base_url, **options):
+    options.setdefault('backoff_factor', 0)
+    return ProviderClient(get_provider('gptzero', base_url), 'test-key', **options)
+
+
+def test_detect_many_preserves_order_and_bounds_concurrency(stub):
+    """Test concurrent calls return in input order with at most max_concurrency in flight"""
+    server, base_url = stub
+    server.state.latency = 0.05
+    client = _client(base_url, max_concurrency=3)
+
+    texts = [f'essay number {i} with enough text' for i in range(9)]
+    results = client.detect_many(texts)
+
+    assert [client.detect(text) for text in texts[:2]] == results[:2]
+    assert all(isinstance(score, float) for score, _ in results)
+    assert server.state.max_in_flight <= 3
+
+
+def test_retries_transient_errors(stub):
+    """Test that 503 responses are retried before giving up"""
+    server, base_url = stub
+    server.state.failure_rate = 1.0
+    client = _client(base_url, max_retries=2)
+
+    with pytest.raises(ProviderError):
+        client.detect('some essay text to analyze')
+    assert server.state.request_count == 3
+
+
+def test_circuit_breaker_opens_and_recovers(stub):
+    """Test that the breaker fails fast when open and closes after a good probe"""
+    server, base_url = stub
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    client = _client(base_url, max_retries=0, breaker=breaker)
+
+    server.state.failure_rate = 1.0
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            client.detect('some essay text to analyze')
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        client.detect('some essay text to analyze')
+    assert server.state.request_count == 2
+
+    server.state.failure_rate = 0.0
+    now[0] = 11
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    client.detect('some essay text to analyze')
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_malformed_response_counts_as_a_failure(stub):
+    """Test that a body the provider cannot parse raises ProviderError and lets a half-open breaker close"""
+    server, base_url = stub
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    client = _client(base_url, max_retries=0, breaker=breaker)
+    parse = client.provider.parse_response
+    client.provider.parse_response = lambda result: parse({'documents': []})
+
+    with pytest.raises(ProviderError):
+        client.detect('some essay text to analyze')
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] = 11
+    with pytest.raises(ProviderError):
+        client.detect('some essay text to analyze')
+    assert breaker.state == CircuitBreaker.OPEN
+
+    client.provider.parse_response = parse
+    now[0] = 22
+    client.detect('some essay text to analyze')
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_detect_many_uses_fallback_for_failures(stub):
+    """Test that failed calls are replaced by the fallback result"""
+    server, base_url = stub
+    server.state.failure_rate = 1.0
+    client = _client(base_url, max_retries=0, breaker=CircuitBreaker(failure_threshold=100))
+
+    results = client.detect_many(['first essay text', 'second essay text'],
+                                 fallback=lambda text, error: ('local', text))
+
+    assert results == [('local', 'first essay text'), ('local', 'second essay text')]
+
+
+def test_pooled_client_keeps_one_breaker_per_provider(monkeypatch):
+    """Test that the shared client's breaker is built once and keeps counting failures"""
+    monkeypatch.setattr(ai_provider_client, '_clients', {})
+    options = {'breaker_failure_threshold': 3, 'breaker_reset_timeout': 12}
+    client = get_provider_client('gptzero', 'test-key', 'http://127.0.0.1:9', **options)
+    breaker = client.breaker
+
+    assert get_provider_client('gptzero', 'test-key', 'http://127.0.0.1:9', **options).breaker is breaker
+    assert (breaker.failure_threshold, breaker.reset_timeout) == (3, 12)
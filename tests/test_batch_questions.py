@@ -0,0 +1,142 @@
+"""Tests for bulk editing, reordering and deleting quiz questions"""
+import pytest
+from flask import g
+from sqlalchemy import event
+from app import create_app
+from app.models import db, User, Subject, Quiz, Question, QuizSubmission, StudentSubmission
+from app.quiz.services import QuizService
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """Create an app on an in-memory database"""
+    monkeypatch.setenv('DATABASE_URI', 'sqlite:///:memory:')
+    app = create_app('testing')
+    app.config.update({'TESTING': True, 'WTF_CSRF_ENABLED': False})
+
+    with app.app_context():
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def quiz(app):
+    """A teacher's quiz with four questions, one of them answered, and another teacher"""
+    teacher = User(username='teacher', email='teacher@example.com', role='teacher')
+    other = User(username='other', email='other@example.com', role='teacher')
+    student = User(username='student', email='student@example.com', role='student')
+    for user in (teacher, other, student):
+        user.set_password('password')
+    db.session.add_all([teacher, other, student])
+    db.session.commit()
+
+    subject = Subject(name='Biology', subject_code='BIO101', teacher_id=teacher.id)
+    db.session.add(subject)
+    db.session.commit()
+    quiz = Quiz(title='Cells', user_id=teacher.id, subject_id=subject.id)
+    db.session.add(quiz)
+    db.session.commit()
+
+    for index in range(4):
+        db.session.add(Question(question_text=f'Question {index}', question_type='identification',
+                                correct_answer='x', user_id=teacher.id, quiz_id=quiz.id, order_index=index))
+    db.session.commit()
+
+    submission = QuizSubmission(quiz_id=quiz.id, student_id=student.id)
+    db.session.add(submission)
+    db.session.commit()
+    db.session.add(StudentSubmission(student_id=student.id, question_id=quiz.questions[0].id,
+                                     quiz_submission_id=submission.id, submitted_answer='x'))
+    db.session.commit()
+    return quiz
+
+
+def _ids(quiz):
+    return [question.id for question in Question.query.filter_by(quiz_id=quiz.id).order_by(Question.order_index)]
+
+
+def test_update_and_reorder_use_set_based_statements(quiz):
+    """Test that edits and a full reorder each take one ownership SELECT and one UPDATE"""
+    ids = _ids(quiz)
+    quiz_id, teacher_id = quiz.id, quiz.user_id
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement.split()[0])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        success, message, count = QuizService.update_questions(quiz_id, teacher_id, [
+            {'id': ids[0], 'question_text': 'Edited', 'points': '2.5'},
+            {'id': ids[1], 'correct_answer': 'y'},
+        ])
+        assert success, message
+        assert count == 2
+        success, message = QuizService.reorder_questions(quiz_id, teacher_id, list(reversed(ids)))
+        assert success, message
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert statements.count('SELECT') == 2
+    assert statements.count('UPDATE') <= 3  # executemany may report once per row
+    db.session.expire_all()
+    assert _ids(quiz) == list(reversed(ids))
+    edited = db.session.get(Question, ids[0])
+    assert (edited.question_text, edited.points) == ('Edited', 2.5)
+    assert db.session.get(Question, ids[1]).correct_answer == 'y'
+
+
+def test_rejects_questions_of_other_quizzes_and_partial_orders(quiz):
+    """Test that nothing changes unless every question belongs to the teacher's quiz"""
+    ids = _ids(quiz)
+    other = User.query.filter_by(username='other').first()
+
+    assert not QuizService.update_questions(quiz.id, other.id, [{'id': ids[0], 'question_text': 'Hijacked'}])[0]
+    assert not QuizService.update_questions(quiz.id, quiz.user_id, [{'id': ids[0], 'points': -1}])[0]
+    assert not QuizService.reorder_questions(quiz.id, quiz.user_id, ids[:2])[0]
+    assert not QuizService.delete_questions(quiz.id, quiz.user_id, [ids[0], 9999])[0]
+
+    db.session.expire_all()
+    assert _ids(quiz) == ids
+    assert db.session.get(Question, ids[0]).question_text == 'Question 0'
+
+
+def test_delete_removes_questions_and_their_answers(quiz):
+    """Test that deleting a selection also removes the student answers to it"""
+    ids = _ids(quiz)
+
+    success, message, count = QuizService.delete_questions(quiz.id, quiz.user_id, ids[:2])
+
+    assert success, message
+    assert count == 2
+    db.session.expire_all()
+    assert _ids(quiz) == ids[2:]
+    assert StudentSubmission.query.count() == 0
+
+
+def test_json_endpoints(app, quiz):
+    """Test the bulk endpoints end to end, including the teacher-only check"""
+    ids = _ids(quiz)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(quiz.user_id)
+
+    response = client.patch(f'/batch/{quiz.id}/questions',
+                            json={'questions': [{'id': ids[0], 'question_text': 'Edited'}]})
+    assert response.status_code == 200
+    assert response.get_json()['updated'] == 1
+
+    response = client.put(f'/batch/{quiz.id}/order', json={'question_ids': [ids[1], ids[0]]})
+    assert response.status_code == 400
+    response = client.put(f'/batch/{quiz.id}/order', json={'question_ids': list(reversed(ids))})
+    assert response.status_code == 200
+
+    response = client.delete(f'/batch/{quiz.id}/questions', json={'question_ids': [ids[3]]})
+    assert response.get_json() == {'success': True, 'message': '1 question(s) deleted successfully!', 'deleted': 1}
+
+    student = User.query.filter_by(username='student').first()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(student.id)
+    g.pop('_login_user', None)  # The fixture's app context outlives each request
+    response = client.delete(f'/batch/{quiz.id}/questions', json={'question_ids': [ids[2]]})
+    assert response.status_code == 403
+
+    db.session.expire_all()
+    assert _ids(quiz) == [ids[2], ids[1], ids[0]]
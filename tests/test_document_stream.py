@@ -0,0 +1,124 @@
+"""Tests for page-streaming question extraction"""
+import os
+import docx
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from document_processor import DocumentProcessor, QuestionStreamParser
+from synthetic_documents import generate_question_document, write_question_docx, write_question_pdf
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), '..', 'uploads', 'documents', 'Test_Questionnaire.pdf')
+SAMPLE_DOCX = os.path.join(os.path.dirname(__file__), '..', 'sample files for test run', 'Test Questionnaire.docx')
+
+DOCUMENT = (
+    "1. What is the capital of France?\n"
+    "A. Berlin\nB. Paris\nC. Rome\nAnswer: B\n"
+    "2. The earth is flat.\nAnswer: False\n"
+    "3. Which of these are prime numbers?\n"
+    "A) 2\nB) 4\nC) 7\n"
+    "4. Explain photosynthesis.\n"
+)
+
+
+def test_chunked_feed_matches_whole_text_parse():
+    """Test that a question split across chunks (pages) is carried over intact"""
+    processor = DocumentProcessor()
+    expected = processor._parse_text_for_questions(DOCUMENT)
+
+    for size in (1, 7, 40):
+        parser = QuestionStreamParser(processor)
+        questions = []
+        for i in range(0, len(DOCUMENT), size):
+            questions.extend(parser.feed(DOCUMENT[i:i + size]))
+        questions.extend(parser.close())
+        assert questions == expected
+
+    assert len(expected) == 4
+    assert expected[0]['options'] == ['Berlin', 'Paris', 'Rome']
+
+
+def test_questions_are_emitted_before_the_end_of_the_document():
+    """Test that feed() returns questions as soon as the next one starts"""
+    parser = QuestionStreamParser(DocumentProcessor())
+
+    assert parser.feed("1. First question?\nA. Yes\nB. No\n") == []
+    emitted = parser.feed("2. Second question?\n")
+    assert [q['question_text'] for q in emitted] == ['First question?']
+
+
+def test_pdf_streaming_matches_full_extraction():
+    """Test that the streamed PDF parse equals parsing the fully extracted text"""
+    processor = DocumentProcessor(use_cache=False)
+    pages = []
+
+    questions, error = processor.process_file(
+        SAMPLE_PDF, progress_callback=lambda page, total, count: pages.append((page, total, count)))
+
+    assert error is None
+    assert questions == processor._parse_text_for_questions(processor._extract_text_from_pdf(SAMPLE_PDF))
+    assert [page for page, _, _ in pages] == list(range(1, pages[-1][1] + 1))
+
+
+def test_parallel_extraction_keeps_page_order(tmp_path):
+    """Test that pages extracted in a process pool are reassembled in order"""
+    path = str(tmp_path / 'exam.pdf')
+    write_question_pdf(path, 25, lines_per_page=7)
+    processor = DocumentProcessor(max_workers=2, use_cache=False)
+    processor.PARALLEL_PAGE_THRESHOLD = 20
+    processor.MIN_PAGES_PER_CHUNK = 3
+
+    sequential = list(processor._iter_pdf_pages(path, parallel=False))
+    assert list(processor._iter_pdf_pages(path)) == sequential
+    assert [page for page, _, _ in sequential] == list(range(1, 26))
+
+    questions, error = processor.process_file(path)
+    assert error is None
+    assert questions == processor._parse_text_for_questions('\n'.join(text for _, _, text in sequential))
+
+
+def _python_docx_lines(path):
+    """Paragraph and table row texts as python-docx reads them, in document order"""
+    document = docx.Document(path)
+    lines = []
+    for child in document.element.body.iterchildren():
+        if child.tag.endswith('}p'):
+            lines.append(Paragraph(child, document).text)
+        elif child.tag.endswith('}tbl'):
+            lines.extend(' | '.join(cell.text for cell in row.cells) for row in Table(child, document).rows)
+    return lines
+
+
+def test_docx_lines_match_python_docx(tmp_path):
+    """Test that streamed paragraphs and table rows read like python-docx, in document order"""
+    document = docx.Document()
+    document.add_paragraph('1. Name the tool:\tcolumn')
+    paragraph = document.add_paragraph('2. First line')
+    paragraph.add_run().add_break()
+    paragraph.add_run('second line')
+    table = document.add_table(rows=3, cols=3)
+    for row in range(3):
+        for column in range(3):
+            table.cell(row, column).text = f'r{row}c{column}'
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(1, 2).merge(table.cell(2, 2))
+    table.cell(2, 0).add_table(rows=1, cols=1).cell(0, 0).text = 'nested'
+    document.add_paragraph('A. After the table')
+    path = str(tmp_path / 'tables.docx')
+    document.save(path)
+
+    processor = DocumentProcessor()
+    for sample in (path, SAMPLE_DOCX):
+        assert list(processor._iter_docx_lines(sample)) == _python_docx_lines(sample)
+    assert list(processor._iter_docx_lines(path, chunk_size=16))[2] == 'r0c0\nr0c1 | r0c0\nr0c1 | r0c2'
+
+
+def test_docx_streaming_matches_full_extraction(tmp_path):
+    """Test that questions streamed from a .docx equal parsing its whole text"""
+    path = str(tmp_path / 'exam.docx')
+    write_question_docx(path, 450)
+    processor = DocumentProcessor(use_cache=False)
+
+    streamed = []
+    questions, error = processor.process_file(path, question_callback=streamed.append)
+
+    assert error is None
+    assert questions == streamed == processor._parse_text_for_questions(generate_question_document(450))
@@ -0,0 +1,111 @@
+"""Tests for MinHash/LSH near-duplicate essay detection"""
+import pytest
+from flask import Flask
+from models import db, User, Subject, Quiz, Question, QuizSubmission, StudentSubmission, EssaySignature
+from essay_similarity import (
+    EssaySimilarityService, LSHIndex, MinHasher, estimate_similarity, jaccard, shingle
+)
+
+ESSAY = (
+    "The industrial revolution changed the way people lived and worked. Factories "
+    "replaced small workshops and many families moved from farms into growing cities "
+    "where new machines created jobs but also crowded and unhealthy living conditions."
+)
+COPIED = ESSAY.replace("many families", "a lot of families")
+DIFFERENT = (
+    "Photosynthesis lets plants turn sunlight, water and carbon dioxide into sugar. "
+    "The oxygen we breathe is released as a by-product of this process in the leaves."
+)
+
+
+@pytest.fixture
+def app():
+    """Create a minimal app bound to the root models"""
+    app = Flask(__name__)
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def _submit_essays(answers):
+    teacher = User(username='teacher', email='teacher@example.com', role='teacher')
+    db.session.add(teacher)
+    db.session.flush()
+    subject = Subject(name='History', subject_code='HIST1', teacher_id=teacher.id)
+    db.session.add(subject)
+    db.session.flush()
+    quiz = Quiz(title='Essay', user_id=teacher.id, subject_id=subject.id)
+    db.session.add(quiz)
+    db.session.flush()
+    question = Question(question_text='Discuss', question_type='essay', correct_answer='',
+                        user_id=teacher.id, quiz_id=quiz.id)
+    db.session.add(question)
+    db.session.flush()
+
+    submissions = []
+    for i, answer in enumerate(answers):
+        student = User(username=f'student{i}', email=f'student{i}@spist.edu')
+        db.session.add(student)
+        db.session.flush()
+        quiz_submission = QuizSubmission(student_id=student.id, quiz_id=quiz.id)
+        db.session.add(quiz_submission)
+        db.session.flush()
+        submission = StudentSubmission(student_id=student.id, question_id=question.id,
+                                       quiz_submission_id=quiz_submission.id,
+                                       submitted_answer=answer, is_correct=False)
+        db.session.add(submission)
+        submissions.append(submission)
+    db.session.commit()
+    return quiz, submissions
+
+
+def test_minhash_estimates_jaccard():
+    """Test that signature agreement approximates exact Jaccard similarity"""
+    hasher = MinHasher()
+    a, b = shingle(ESSAY), shingle(COPIED)
+    estimate = estimate_similarity(hasher.signature(a), hasher.signature(b))
+
+    assert abs(estimate - jaccard(a, b)) < 0.15
+    assert estimate_similarity(hasher.signature(a), hasher.signature(shingle(DIFFERENT))) < 0.1
+
+
+def test_lsh_index_only_pairs_similar_essays():
+    """Test that LSH candidates include the copy but not the unrelated essay"""
+    hasher = MinHasher()
+    index = LSHIndex()
+    index.add('a', hasher.signature(shingle(ESSAY)))
+    index.add('b', hasher.signature(shingle(DIFFERENT)))
+
+    assert index.add('c', hasher.signature(shingle(COPIED))) == {'a'}
+    assert index.candidate_pairs() == {('a', 'c')}
+
+
+def test_incremental_check_on_new_submission(app):
+    """Test that a new essay is matched against stored signatures"""
+    _, (original, unrelated, copy) = _submit_essays([ESSAY, DIFFERENT, COPIED])
+
+    assert EssaySimilarityService.index_submission(original) == []
+    assert EssaySimilarityService.index_submission(unrelated) == []
+    matches = EssaySimilarityService.index_submission(copy)
+
+    assert [m['submission_id'] for m in matches] == [original.id]
+    assert matches[0]['similarity'] >= 0.5
+    assert EssaySignature.query.count() == 3
+
+
+def test_find_similar_pairs_indexes_missing_signatures(app):
+    """Test quiz-wide pair detection over submissions without signatures"""
+    quiz, (original, unrelated, copy) = _submit_essays([ESSAY, DIFFERENT, COPIED])
+
+    pairs = EssaySimilarityService.find_similar_pairs(quiz.id)
+
+    assert len(pairs) == 1
+    assert sorted(pairs[0]['submission_ids']) == sorted([original.id, copy.id])
+    assert EssaySignature.query.count() == 3
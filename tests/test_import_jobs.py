@@ -0,0 +1,163 @@
+"""Tests for background document import jobs"""
+from datetime import datetime
+import pytest
+from flask import Flask
+from models import db, User, Subject, Quiz, Question, Announcement, ImportJob
+from import_jobs import fail_interrupted_jobs, start_import_job, wait_for_job
+from job_workers import current_worker
+from synthetic_documents import write_question_pdf, write_text_pdf
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Create a minimal app bound to the root models, with a file database shared by worker threads"""
+    monkeypatch.setattr('parse_cache.CACHE_DIR', '')
+    app = Flask(__name__)
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def _quiz():
+    teacher = User(username='teacher', email='teacher@example.com', role='teacher')
+    teacher.set_password('password')
+    db.session.add(teacher)
+    db.session.commit()
+    subject = Subject(name='Physics', subject_code='PHY101', teacher_id=teacher.id)
+    db.session.add(subject)
+    db.session.commit()
+    quiz = Quiz(title='Imported', quiz_type='quiz', user_id=teacher.id, subject_id=subject.id)
+    db.session.add(quiz)
+    db.session.commit()
+    return teacher, quiz
+
+
+def test_job_saves_questions_and_reports_progress(app, tmp_path):
+    """Test that a PDF import runs in the background and saves every question in order"""
+    teacher, quiz = _quiz()
+    path = str(tmp_path / 'exam.pdf')
+    write_question_pdf(path, 4, lines_per_page=10)
+
+    job = start_import_job(quiz, path, False, teacher.id)
+    wait_for_job(job.id, timeout=30)
+    db.session.expire_all()
+
+    job = db.session.get(ImportJob, job.id)
+    questions = Question.query.filter_by(quiz_id=quiz.id).order_by(Question.order_index).all()
+    assert job.status == 'completed'
+    assert (job.pages_done, job.total_pages) == (4, 4)
+    assert job.question_count == len(questions) > 0
+    assert [q.order_index for q in questions] == list(range(len(questions)))
+    assert Announcement.query.filter_by(quiz_id=quiz.id).count() == 1
+
+
+def test_failed_job_removes_the_empty_quiz(app, tmp_path):
+    """Test that a document without questions does not leave an empty quiz behind"""
+    teacher, quiz = _quiz()
+    path = str(tmp_path / 'notes.pdf')
+    write_text_pdf(path, [['Just some lecture notes.', 'Nothing to import here.']])
+    quiz_id = quiz.id
+
+    job = start_import_job(quiz, path, False, teacher.id)
+    wait_for_job(job.id, timeout=30)
+    db.session.expire_all()
+
+    job = db.session.get(ImportJob, job.id)
+    assert job.status == 'failed'
+    assert job.error
+    assert db.session.get(Quiz, quiz_id) is None
+    assert Announcement.query.count() == 0
+
+
+def test_job_counts_questions_already_in_the_bank(app, tmp_path):
+    """Test that importing the same document again reports every question as a duplicate"""
+    teacher, quiz = _quiz()
+    path = str(tmp_path / 'exam.pdf')
+    write_question_pdf(path, 2, lines_per_page=10)
+
+    first = start_import_job(quiz, path, False, teacher.id)
+    wait_for_job(first.id, timeout=30)
+    again = Quiz(title='Imported again', quiz_type='quiz', user_id=teacher.id, subject_id=quiz.subject_id)
+    db.session.add(again)
+    db.session.commit()
+    second = start_import_job(again, path, False, teacher.id)
+    wait_for_job(second.id, timeout=30)
+    db.session.expire_all()
+
+    first = db.session.get(ImportJob, first.id)
+    second = db.session.get(ImportJob, second.id)
+    assert first.duplicate_count == 0
+    assert second.duplicate_count == second.question_count == first.question_count > 0
+
+
+def test_job_of_a_deleted_quiz_saves_nothing(app, tmp_path):
+    """Test that a job whose quiz was deleted stops instead of adding questions for the purge to miss"""
+    teacher, quiz = _quiz()
+    path = str(tmp_path / 'exam.pdf')
+    write_question_pdf(path, 2, lines_per_page=10)
+    quiz.deleted_at = datetime.utcnow()
+    db.session.commit()
+    quiz_id = quiz.id
+
+    job = start_import_job(quiz, path, False, teacher.id)
+    wait_for_job(job.id, timeout=30)
+    db.session.expire_all()
+
+    job = db.session.get(ImportJob, job.id)
+    assert job.status == 'failed'
+    assert 'deleted' in job.error
+    assert Question.query.filter_by(quiz_id=quiz_id).count() == 0
+    assert db.session.get(Quiz, quiz_id) is not None  # Left to the purge
+
+
+def test_job_reports_questions_it_could_not_save(app, tmp_path, monkeypatch):
+    """Test that a question rejected even after the import defaults shows up in the job's warning"""
+    teacher, quiz = _quiz()
+    path = str(tmp_path / 'exam.pdf')
+    write_question_pdf(path, 1, lines_per_page=10)
+    monkeypatch.setattr('document_processor.DocumentProcessor.process_file', lambda self, *args, **kwargs: ([
+        {'question_text': 'x' * 800, 'question_type': 'essay'},
+        {'question_text': 'Pick one', 'question_type': 'multiple_choice', 'options': ['', '']},
+    ], None))
+
+    job = start_import_job(quiz, path, False, teacher.id)
+    wait_for_job(job.id, timeout=30)
+    db.session.expire_all()
+
+    job = db.session.get(ImportJob, job.id)
+    assert job.status == 'completed'
+    assert job.question_count == 1
+    assert 'Skipped 1 question(s)' in job.error and 'Question 2' in job.error
+
+
+def test_restart_fails_jobs_of_exited_workers_only(app, tmp_path):
+    """Test that jobs left behind by an exited worker fail and lose their quiz, while live workers' jobs go on"""
+    teacher, quiz = _quiz()
+    other = Quiz(title='Still importing', quiz_type='quiz', user_id=teacher.id, subject_id=quiz.subject_id)
+    db.session.add(other)
+    db.session.commit()
+    orphaned = ImportJob(id='orphaned', quiz_id=quiz.id, user_id=teacher.id, file_path='exam.pdf',
+                         status='running', worker=f"{current_worker().rsplit(':', 2)[0]}:999999999:1")
+    alive = ImportJob(id='alive', quiz_id=other.id, user_id=teacher.id, file_path='exam.pdf',
+                      status='queued', worker=current_worker())
+    db.session.add_all([orphaned, alive])
+    db.session.add(Question(question_text='Saved before the restart', question_type='essay', correct_answer='',
+                            points=1.0, user_id=teacher.id, quiz_id=quiz.id))
+    db.session.commit()
+    quiz_id = quiz.id
+
+    assert fail_interrupted_jobs(app) == 1
+    db.session.expire_all()
+
+    orphaned = db.session.get(ImportJob, 'orphaned')
+    assert orphaned.status == 'failed' and orphaned.quiz_id is None
+    assert db.session.get(Quiz, quiz_id) is None
+    assert Question.query.filter_by(quiz_id=quiz_id).count() == 0
+    assert db.session.get(ImportJob, 'alive').status == 'queued'
@@ -0,0 +1,53 @@
+"""Tests for the file-hash parse cache"""
+import os
+from document_processor import DocumentProcessor
+from parse_cache import ParseCache, file_digest
+
+DOCUMENT = "1. What is 2 + 2?\nA. 3\nB. 4\nAnswer: B\n2. Explain gravity.\n"
+
+
+def test_lru_eviction_keeps_cache_under_size_limit(tmp_path):
+    """Test that the least recently used entries are evicted first"""
+    cache = ParseCache(str(tmp_path), max_bytes=10_000)
+    payload = [{'question_text': 'x' * 3000}]
+
+    for index, key in enumerate(['a', 'b', 'c']):
+        cache.set(key, payload)
+        os.utime(tmp_path / f'{key}.json', (index, index))
+
+    assert cache.get('a') == payload  # 'a' becomes the most recently used
+    cache.set('d', payload)
+
+    assert cache.get('b') is None
+    assert all(cache.get(key) == payload for key in ('a', 'c', 'd'))
+    assert cache.size() <= 10_000
+
+
+def test_repeat_upload_is_served_from_cache(tmp_path, monkeypatch):
+    """Test that identical bytes skip parsing, keyed by parser version and mode"""
+    document = tmp_path / 'upload.docx'
+    document.write_bytes(b'not parsed')
+    copy = tmp_path / 'copy.docx'
+    copy.write_bytes(b'not parsed')
+
+    processor = DocumentProcessor(cache=ParseCache(str(tmp_path / 'cache')))
+    calls = []
+
+    def fake_process(file_path, use_ai=False, progress_callback=None, question_callback=None):
+        calls.append(file_path)
+        return processor._parse_text_for_questions(DOCUMENT), None
+    monkeypatch.setattr(processor, '_process_file', fake_process)
+
+    first, _ = processor.process_file(str(document))
+    assert processor.last_cache_hit is False
+
+    second, error = processor.process_file(str(copy))
+    assert error is None
+    assert processor.last_cache_hit is True
+    assert second == first
+    assert len(calls) == 1
+
+    monkeypatch.setattr(DocumentProcessor, 'PARSER_VERSION', 'next')
+    processor.process_file(str(copy))
+    assert len(calls) == 2
+    assert file_digest(str(document)) == file_digest(str(copy))
@@ -0,0 +1,81 @@
+"""Tests for the compiled phrase matcher used by local AI detection"""
+import json
+import os
+from phrase_matcher import PhraseMatcher, get_phrase_matcher
+from ai_detection_config import AIDetectionConfig
+
+
+def test_counts_every_occurrence_with_positions():
+    """Test that repeated phrases are counted and located in one scan"""
+    matcher = PhraseMatcher({'formal': ['thus', 'moreover']})
+    result = matcher.scan('Thus it holds. Moreover, thus again.')
+
+    assert result.counts['thus'] == 2
+    assert result.counts['moreover'] == 1
+    assert result.category_counts['formal'] == 3
+    assert result.positions('thus') == [0, 25]
+
+
+def test_prefers_longest_phrase_and_whole_words():
+    """Test shared prefixes, whitespace runs and word boundaries"""
+    matcher = PhraseMatcher(['in', 'in addition', 'in other words', 'hence'])
+    result = matcher.scan('In\n addition, whence in other  words; inside')
+
+    assert [m[0] for m in result.matches] == ['in addition', 'in other words']
+
+
+def test_configured_phrase_lists_are_versioned():
+    """Test that the default matcher is built from the configured version"""
+    version, phrase_lists = AIDetectionConfig.get_phrase_lists()
+    matcher = get_phrase_matcher()
+
+    assert matcher.version == version
+    assert len(matcher) == len(phrase_lists['formal'])
+    assert get_phrase_matcher() is matcher
+
+
+def test_scales_to_large_phrase_lists():
+    """Test a list of hundreds of phrases still matches correctly"""
+    phrases = [f'phrase number {i}' for i in range(500)]
+    matcher = PhraseMatcher({'synthetic': phrases})
+    result = matcher.scan('Here is phrase number 42 and phrase number 420.')
+
+    assert result.counts == {'phrase number 42': 1, 'phrase number 420': 1}
+
+
+def test_phrase_list_file_is_read_again_only_when_it_changes(tmp_path, monkeypatch):
+    """Test that the extra phrase lists are cached on the file's mtime"""
+    path = tmp_path / 'phrase_lists.json'
+    path.write_text('{"v2": {"formal": ["thus"]}}')
+    monkeypatch.setattr(AIDetectionConfig, 'PHRASE_LIST_FILE', str(path))
+    monkeypatch.setattr(AIDetectionConfig, '_phrase_list_file_cache', None)
+    reads = []
+    real_load = json.load
+    monkeypatch.setattr(json, 'load', lambda f: reads.append(f.name) or real_load(f))
+
+    assert AIDetectionConfig.get_phrase_lists('v2') == ('v2', {'formal': ['thus']})
+    assert AIDetectionConfig.get_phrase_lists('v2') == ('v2', {'formal': ['thus']})
+    assert len(reads) == 1
+
+    path.write_text('{"v2": {"formal": ["hence"]}}')
+    os.utime(path, (path.stat().st_mtime + 10,) * 2)
+    assert AIDetectionConfig.get_phrase_lists('v2') == ('v2', {'formal': ['hence']})
+    assert len(reads) == 2
+
+
+def test_matcher_is_rebuilt_when_the_phrase_list_file_changes(tmp_path, monkeypatch):
+    """Test that an edited phrase list file reaches detection instead of the old compiled matcher"""
+    path = tmp_path / 'phrase_lists.json'
+    path.write_text('{"v2": {"formal": ["thus"]}}')
+    monkeypatch.setattr(AIDetectionConfig, 'PHRASE_LIST_FILE', str(path))
+    monkeypatch.setattr(AIDetectionConfig, '_phrase_list_file_cache', None)
+
+    matcher = get_phrase_matcher('v2')
+    assert get_phrase_matcher('v2') is matcher
+    assert matcher.scan('Thus it ends.').total == 1
+
+    path.write_text('{"v2": {"formal": ["hence"]}}')
+    os.utime(path, (path.stat().st_mtime + 10,) * 2)
+    matcher = get_phrase_matcher('v2')
+    assert matcher.scan('Thus it ends.').total == 0
+    assert matcher.scan('Hence it ends.').total == 1
@@ -0,0 +1,50 @@
+"""Tests for the single-pass question parser"""
+from collections import Counter
+from document_processor import DocumentProcessor
+from synthetic_documents import generate_question_document
+
+
+def _parse(text):
+    return DocumentProcessor(use_cache=False)._parse_text_for_questions(text)
+
+
+def test_line_kinds_and_answers():
+    """Test that questions, options and answers are classified and resolved"""
+    questions = _parse(
+        "  Question 1: Pick a color\r\n"
+        "a) Red\r\n"
+        "B ) Blue\r\n"
+        "CORRECT ANSWER: blue\r\n"
+        "A. stray option outside a question\n"
+        "2. This sentence is false.\n"
+        "Answer: yes\n"
+        "Q: Name the capital of Peru\n"
+        "Correct: Lima\n"
+        "3. Explain inertia.\n"
+        "Answer:\n"
+    )
+
+    assert [(q['question_text'], q['question_type'], q['correct_answer']) for q in questions] == [
+        ('Pick a color', 'multiple_choice', '1'),
+        ('This sentence is false.', 'true_false', 'true'),
+        ('Name the capital of Peru', 'identification', 'Lima'),
+        ('Explain inertia.', 'essay', ''),
+    ]
+    assert questions[0]['options'] == ['Red', 'Blue']
+    assert questions[3]['word_limit'] == 500
+
+
+def test_multi_letter_answer_matches_option_text():
+    """Test that an answer that is not a single letter is matched against the options"""
+    questions = _parse("1. Pick one\nA. cat\nB. dog\nAnswer: DOG\n4. Pick again\nA. x\nB. y\nAnswer: AB\n")
+
+    assert [q['correct_answer'] for q in questions] == ['1', '0']
+
+
+def test_synthetic_document_parses_every_question():
+    """Test the 10,000-question synthetic document end to end"""
+    questions = _parse(generate_question_document(10000))
+
+    assert len(questions) == 10000
+    counts = Counter(q['question_type'] for q in questions)
+    assert counts == {'true_false': 3334, 'multiple_choice': 3332, 'essay': 1667, 'identification': 1667}
@@ -0,0 +1,106 @@
+"""Tests for full-text search over the question bank"""
+import pytest
+from app import create_app
+from app.models import db, User, Subject, Quiz, Question
+from app.question.services import QuestionService
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """Create an app on an in-memory database; create_app builds the search index"""
+    monkeypatch.setenv('DATABASE_URI', 'sqlite:///:memory:')
+    app = create_app('testing')
+    app.config.update({'TESTING': True, 'WTF_CSRF_ENABLED': False})
+
+    with app.app_context():
+        assert QuestionService.ensure_search_index()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def bank(app):
+    """Two teachers with questions spread over two subjects"""
+    teacher = User(username='teacher', email='teacher@example.com', role='teacher')
+    other = User(username='other', email='other@example.com', role='teacher')
+    for user in (teacher, other):
+        user.set_password('password')
+    db.session.add_all([teacher, other])
+    db.session.commit()
+
+    biology = Subject(name='Biology', subject_code='BIO101', teacher_id=teacher.id)
+    history = Subject(name='History', subject_code='HIS101', teacher_id=teacher.id)
+    db.session.add_all([biology, history])
+    db.session.commit()
+    cells = Quiz(title='Cells', user_id=teacher.id, subject_id=biology.id)
+    wars = Quiz(title='Wars', user_id=teacher.id, subject_id=history.id)
+    db.session.add_all([cells, wars])
+    db.session.commit()
+
+    def add(text, user=teacher, quiz=None, question_type='identification', options=None):
+        question = Question(question_text=text, question_type=question_type, options=options,
+                            correct_answer='x', user_id=user.id, quiz_id=quiz.id if quiz else None)
+        db.session.add(question)
+        return question
+
+    questions = {
+        'photo': add('What is photosynthesis?', quiz=cells),
+        'organelle': add('Which organelle runs photosynthesis?', quiz=cells, question_type='multiple_choice',
+                         options=['Mitochondria', 'Chloroplast']),
+        'mito': add('Name the powerhouse of the cell', quiz=cells, question_type='multiple_choice',
+                    options=['Mitochondrion', 'Nucleus']),
+        'war': add('When did the war of photosynthesis end?', quiz=wars),
+        'other': add('Explain photosynthesis', user=other),
+    }
+    db.session.commit()
+    return teacher, biology, cells, questions
+
+
+def _ids(results):
+    questions, total = results
+    return [question.id for question in questions], total
+
+
+def test_search_ranks_matches_and_keeps_index_in_sync(bank):
+    """Test bm25 ranking, prefix and option matches, and trigger-maintained updates and deletes"""
+    teacher, _, _, questions = bank
+
+    ids, total = _ids(QuestionService.search_questions(teacher.id, 'photosynthesis'))
+    assert total == 3
+    assert ids[0] == questions['photo'].id
+    assert questions['other'].id not in ids
+
+    # Option text and word prefixes match too
+    assert _ids(QuestionService.search_questions(teacher.id, 'mitochond')) == (
+        sorted([questions['organelle'].id, questions['mito'].id]), 2)
+    assert _ids(QuestionService.search_questions(teacher.id, 'chloroplast photo')) == (
+        [questions['organelle'].id], 1)
+
+    questions['photo'].question_text = 'What is respiration?'
+    db.session.delete(questions['war'])
+    db.session.commit()
+    assert _ids(QuestionService.search_questions(teacher.id, 'photosynthesis')) == (
+        [questions['organelle'].id], 1)
+    assert _ids(QuestionService.search_questions(teacher.id, 'respiration')) == (
+        [questions['photo'].id], 1)
+
+    # Query syntax is treated as plain words
+    assert QuestionService.search_questions(teacher.id, 'photo* OR "NEAR(') == ([], 0)
+
+
+def test_search_filters_and_paginates(bank):
+    """Test type, quiz and subject filters and paging through the results"""
+    teacher, biology, cells, questions = bank
+
+    assert _ids(QuestionService.search_questions(teacher.id, 'photosynthesis', question_type='multiple_choice')) == (
+        [questions['organelle'].id], 1)
+    assert _ids(QuestionService.search_questions(teacher.id, 'photosynthesis', subject_id=biology.id))[1] == 2
+    assert _ids(QuestionService.search_questions(teacher.id, 'photosynthesis', quiz_id=cells.id))[1] == 2
+
+    first, total = _ids(QuestionService.search_questions(teacher.id, 'photosynthesis', page=1, per_page=2))
+    second, _ = _ids(QuestionService.search_questions(teacher.id, 'photosynthesis', page=2, per_page=2))
+    assert total == 3 and len(first) == 2 and len(second) == 1
+    assert not set(first) & set(second)
+
+    # Without a query the filtered bank is listed
+    assert _ids(QuestionService.search_questions(teacher.id, '', subject_id=biology.id))[1] == 3
@@ -0,0 +1,163 @@
+"""Tests for bulk question creation"""
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from models import db, User, Subject, Quiz, Question
+from question_service import QuestionService, MAX_TEXT_LENGTH
+
+
+@pytest.fixture
+def app():
+    """Create a minimal app bound to the root models"""
+    app = Flask(__name__)
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def quiz(app):
+    teacher = User(username='teacher', email='teacher@example.com', role='teacher')
+    teacher.set_password('password')
+    db.session.add(teacher)
+    db.session.commit()
+    subject = Subject(name='Physics', subject_code='PHY101', teacher_id=teacher.id)
+    db.session.add(subject)
+    db.session.commit()
+    quiz = Quiz(title='Bulk', quiz_type='quiz', user_id=teacher.id, subject_id=subject.id)
+    db.session.add(quiz)
+    db.session.commit()
+    return quiz
+
+
+def _questions(count):
+    return [{
+        'question_text': f'Question {i}?',
+        'question_type': 'multiple_choice',
+        'options': ['yes', 'no'],
+        'correct_answer': '0',
+        'points': 2
+    } for i in range(count)]
+
+
+def test_inserts_all_questions_in_one_statement(quiz):
+    """Test that 500 questions are inserted with a single INSERT and ordered after existing ones"""
+    QuestionService.add_questions(quiz, _questions(2), quiz.user_id)
+
+    inserts = []
+    listener = lambda conn, cursor, statement, *args: inserts.append(statement) if statement.startswith('INSERT') else None
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        success, message, questions = QuestionService.add_questions(quiz, _questions(500), quiz.user_id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert success is True
+    assert len(inserts) == 1
+    assert [q.order_index for q in questions] == list(range(2, 502))
+    assert Question.query.filter_by(quiz_id=quiz.id).count() == 502
+
+
+def test_invalid_question_rejects_the_whole_list(quiz):
+    """Test that validation errors insert nothing unless invalid questions are skipped"""
+    questions_data = _questions(3) + [{'question_text': '', 'question_type': 'essay'},
+                                      {'question_text': 'T or F', 'question_type': 'true_false', 'correct_answer': 'maybe'}]
+
+    success, message, questions = QuestionService.add_questions(quiz, questions_data, quiz.user_id)
+    assert success is False
+    assert 'Question 4' in message and 'Question 5' in message
+    assert Question.query.count() == 0
+
+    success, message, questions = QuestionService.add_questions(quiz, questions_data, quiz.user_id, skip_invalid=True)
+    assert success is True
+    assert len(questions) == 3
+
+
+def test_normalize_fills_in_import_defaults(quiz):
+    """Test the defaults applied to extracted questions"""
+    success, _, questions = QuestionService.add_questions(quiz, [
+        {'question_text': 'Pick one', 'question_type': 'multiple_choice'},
+        {'question_text': 'Statement', 'question_type': 'true_false', 'correct_answer': 'yes'},
+        {'question_text': 'Discuss', 'question_type': 'essay'},
+    ], quiz.user_id, normalize=True)
+
+    assert success is True
+    assert questions[0].options == ['Option 1', 'Option 2', 'Option 3', 'Option 4']
+    assert questions[1].correct_answer == 'true'
+    assert questions[2].word_limit == 500
+
+
+def test_normalize_keeps_long_and_unscored_questions(quiz):
+    """Test that imported questions with over-long text or bad points are fixed up instead of skipped"""
+    success, message, questions = QuestionService.add_questions(quiz, [
+        {'question_text': 'x' * 800, 'question_type': 'essay', 'points': 2},
+        {'question_text': 'Zero', 'question_type': 'essay', 'points': 0},
+        {'question_text': 'Text', 'question_type': 'essay', 'points': 'ten'},
+    ], quiz.user_id, normalize=True, skip_invalid=True)
+
+    assert success is True
+    assert 'Skipped' not in message
+    assert len(questions[0].question_text) == MAX_TEXT_LENGTH
+    assert [q.points for q in questions] == [2.0, 1.0, 1.0]
+
+
+def test_fingerprint_ignores_case_spacing_and_option_order(quiz):
+    """Test that reworded copies share a fingerprint and edits keep it current"""
+    _, _, (question,) = QuestionService.add_questions(quiz, [{
+        'question_text': 'What is  the Unit of force?',
+        'question_type': 'multiple_choice',
+        'options': ['Newton', 'Joule'],
+        'correct_answer': '0'
+    }], quiz.user_id)
+
+    assert question.fingerprint == Question.make_fingerprint('what is the unit of force?', ['joule', 'NEWTON'])
+    assert question.fingerprint != Question.make_fingerprint('What is the unit of force?', ['Newton', 'Watt'])
+
+    question.question_text = 'What is the unit of energy?'
+    db.session.commit()
+    assert question.fingerprint == Question.make_fingerprint('What is the unit of energy?', ['Newton', 'Joule'])
+
+
+def test_duplicates_can_be_merged_or_skipped(quiz):
+    """Test that imported copies of bank questions are found and resolved"""
+    bank = Quiz(title='Bank', quiz_type='quiz', user_id=quiz.user_id, subject_id=quiz.subject_id)
+    db.session.add(bank)
+    db.session.commit()
+    _, _, (original, _) = QuestionService.add_questions(bank, [
+        {'question_text': 'Define inertia.', 'question_type': 'identification', 'correct_answer': 'Resistance to change', 'points': 3},
+        {'question_text': 'Explain friction.', 'question_type': 'essay', 'word_limit': 200},
+    ], quiz.user_id)
+
+    _, _, imported = QuestionService.add_questions(quiz, [
+        {'question_text': 'DEFINE INERTIA.', 'question_type': 'identification', 'correct_answer': ''},
+        {'question_text': 'Explain friction.', 'question_type': 'essay'},
+        {'question_text': 'Something new?', 'question_type': 'identification', 'correct_answer': 'yes'},
+        {'question_text': 'Something  new?', 'question_type': 'identification', 'correct_answer': 'yes'},
+    ], quiz.user_id)
+
+    assert original.fingerprint in QuestionService.bank_fingerprints(quiz.user_id, exclude_quiz_id=quiz.id)
+    duplicates = QuestionService.find_duplicates(quiz)
+    assert {question_id: dup.id for question_id, dup in duplicates.items()} == {
+        imported[0].id: original.id,
+        imported[1].id: original.id + 1,
+        imported[3].id: imported[2].id
+    }
+
+    success, _, merged = QuestionService.resolve_duplicates(quiz, 'merge', [imported[0].id])
+    assert success is True
+    assert merged == [imported[0].id]
+    assert (imported[0].question_text, imported[0].correct_answer, imported[0].points) == \
+        ('Define inertia.', 'Resistance to change', 3)
+
+    success, _, skipped = QuestionService.resolve_duplicates(quiz, 'skip', ignore_ids=merged)
+    assert sorted(skipped) == [imported[1].id, imported[3].id]
+    assert success is True
+    assert [q.id for q in Question.query.filter_by(quiz_id=quiz.id)] == [imported[0].id, imported[2].id]
+    assert Question.query.filter_by(quiz_id=bank.id).count() == 2
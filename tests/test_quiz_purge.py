@@ -0,0 +1,127 @@
+"""Tests for soft-deleting quizzes and purging them in chunks"""
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from models import db, User, Subject, Quiz, Question, Announcement, QuizSubmission, StudentSubmission
+from question_service import QuestionService
+import quiz_purge
+from quiz_purge import purge_quiz
+from quiz_service import QuizService
+
+
+@pytest.fixture
+def app():
+    """Create a minimal app bound to the root models"""
+    app = Flask(__name__)
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def quizzes(app):
+    """Two quizzes of one subject, each answered by five students"""
+    teacher = User(username='teacher', email='teacher@example.com', role='teacher')
+    students = [User(username=f'student{i}', email=f'student{i}@example.com') for i in range(5)]
+    for user in [teacher] + students:
+        user.set_password('password')
+    db.session.add_all([teacher] + students)
+    db.session.commit()
+    subject = Subject(name='Physics', subject_code='PHY101', teacher_id=teacher.id)
+    db.session.add(subject)
+    db.session.commit()
+
+    quizzes = []
+    for title in ('Midterm', 'Final'):
+        quiz = Quiz(title=title, user_id=teacher.id, subject_id=subject.id)
+        db.session.add(quiz)
+        db.session.commit()
+        _, _, questions = QuestionService.add_questions(quiz, [{
+            'question_text': f'{title} question {i}?',
+            'question_type': 'identification',
+            'correct_answer': 'yes'
+        } for i in range(10)], teacher.id)
+        db.session.add(Announcement(title=title, content=title, user_id=teacher.id,
+                                    subject_id=subject.id, quiz_id=quiz.id, announcement_type='quiz_created'))
+        for student in students:
+            submission = QuizSubmission(quiz_id=quiz.id, student_id=student.id)
+            db.session.add(submission)
+            db.session.flush()
+            db.session.add_all([StudentSubmission(student_id=student.id, question_id=question.id,
+                                                  quiz_submission_id=submission.id, submitted_answer='yes',
+                                                  is_correct=True) for question in questions])
+        quizzes.append(quiz)
+    db.session.commit()
+    return subject, quizzes
+
+
+def test_delete_hides_the_quiz_until_it_is_purged(quizzes):
+    """Test that deleting only marks the quiz, hides it and removes its announcements"""
+    subject, (midterm, final) = quizzes
+
+    success, message = QuizService.delete_quiz(midterm, purge=False)
+
+    assert success, message
+    db.session.expire_all()
+    assert subject.quizzes == [final]
+    assert Announcement.query.filter_by(quiz_id=midterm.id).count() == 0
+    assert db.session.get(Quiz, midterm.id).deleted_at is not None
+    assert QuizSubmission.query.filter_by(quiz_id=midterm.id).count() == 5
+
+
+def test_purge_removes_rows_in_short_transactions(quizzes):
+    """Test that the purge commits every chunk and leaves other quizzes alone"""
+    subject, (midterm, final) = quizzes
+    midterm_id = midterm.id
+    assert purge_quiz(midterm_id) == 0  # Not deleted yet
+    QuizService.delete_quiz(midterm, purge=False)
+
+    commits = []
+    listener = lambda conn: commits.append(conn)
+    event.listen(db.engine, 'commit', listener)
+    try:
+        removed = purge_quiz(midterm_id, chunk_size=20, pause=0)
+    finally:
+        event.remove(db.engine, 'commit', listener)
+
+    # 50 answers, 5 submissions and 10 questions in chunks of 20, then the quiz
+    assert removed == 66
+    assert len(commits) == 3 + 1 + 1 + 1
+    db.session.expire_all()
+    assert db.session.get(Quiz, midterm_id) is None
+    assert Question.query.filter_by(quiz_id=midterm_id).count() == 0
+    assert StudentSubmission.query.count() == 50
+    assert QuizSubmission.query.filter_by(quiz_id=final.id).count() == 5
+    assert subject.quizzes == [final]
+
+
+def test_purge_removes_questions_saved_while_it_runs(quizzes, monkeypatch):
+    """Test that a question added after the question pass is removed with the quiz"""
+    subject, (midterm, final) = quizzes
+    midterm_id, teacher_id = midterm.id, midterm.user_id
+    QuizService.delete_quiz(midterm, purge=False)
+    passes = []
+    delete_in_chunks = quiz_purge._delete_in_chunks
+
+    def then_add_a_question(*args):
+        removed = delete_in_chunks(*args)
+        passes.append(removed)
+        if len(passes) == 3:  # Right after the question pass, as a running import job would
+            db.session.add(Question(quiz_id=midterm_id, user_id=teacher_id, question_text='Late?',
+                                    question_type='identification', correct_answer='yes'))
+            db.session.commit()
+        return removed
+
+    monkeypatch.setattr(quiz_purge, '_delete_in_chunks', then_add_a_question)
+    assert purge_quiz(midterm_id, chunk_size=20, pause=0) == 67
+
+    db.session.expire_all()
+    assert db.session.get(Quiz, midterm_id) is None
+    assert Question.query.filter_by(quiz_id=midterm_id).count() == 0
@@ -0,0 +1,141 @@
+"""Tests for set-based quiz cloning"""
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from datetime import datetime
+from models import db, User, Subject, Quiz, Question, Announcement, QuizSubmission, StudentSubmission
+from question_service import QuestionService
+from quiz_service import QuizService
+from quiz_shuffle import sample_questions
+
+
+@pytest.fixture
+def app():
+    """Create a minimal app bound to the root models"""
+    app = Flask(__name__)
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def exam(app):
+    teacher = User(username='teacher', email='teacher@example.com', role='teacher')
+    other = User(username='other', email='other@example.com', role='teacher')
+    for user in (teacher, other):
+        user.set_password('password')
+    db.session.add_all([teacher, other])
+    db.session.commit()
+    sections = [Subject(name=f'Physics {i}', subject_code=f'PHY10{i}', teacher_id=teacher.id) for i in range(4)]
+    foreign = Subject(name='Chemistry', subject_code='CHE101', teacher_id=other.id)
+    db.session.add_all(sections + [foreign])
+    db.session.commit()
+    exam = Quiz(title='Midterm', quiz_type='exam', duration=60, user_id=teacher.id, subject_id=sections[0].id)
+    db.session.add(exam)
+    db.session.commit()
+    QuestionService.add_questions(exam, [{
+        'question_text': f'Question {i}?',
+        'question_type': 'multiple_choice',
+        'options': ['yes', 'no'],
+        'correct_answer': '0',
+        'points': 2
+    } for i in range(200)], teacher.id)
+    return exam, sections, foreign
+
+
+def test_clones_quiz_and_questions_with_set_based_inserts(exam):
+    """Test that a 200-question exam is copied into three sections with three INSERTs"""
+    exam, sections, _ = exam
+    targets = [section.id for section in sections[1:]]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        success, message, clones = QuizService.clone_quiz(exam, targets, exam.user_id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert success, message
+    assert len([s for s in statements if s.startswith('INSERT')]) == 3
+    assert sorted(clone.subject_id for clone in clones) == targets
+    for clone in clones:
+        assert (clone.title, clone.quiz_type, clone.duration) == ('Midterm', 'exam', 60)
+        copied = Question.query.filter_by(quiz_id=clone.id).order_by(Question.order_index).all()
+        assert len(copied) == 200
+        assert [q.question_text for q in copied[:2]] == ['Question 0?', 'Question 1?']
+        assert copied[0].options == ['yes', 'no'] and copied[0].points == 2
+        assert copied[0].fingerprint == Question.query.filter_by(quiz_id=exam.id).first().fingerprint
+    assert Question.query.filter_by(quiz_id=exam.id).count() == 200
+    announcements = Announcement.query.filter(Announcement.quiz_id.in_([clone.id for clone in clones])).all()
+    assert sorted(a.subject_id for a in announcements) == targets
+    assert all(a.announcement_type == 'quiz_created' and a.is_read is False for a in announcements)
+
+
+def test_rejects_subjects_of_other_teachers(exam):
+    """Test that nothing is copied when a target subject belongs to someone else"""
+    exam, sections, foreign = exam
+
+    success, message, clones = QuizService.clone_quiz(exam, [sections[1].id, foreign.id], exam.user_id)
+
+    assert not success and clones == []
+    assert str(foreign.id) in message
+    assert Quiz.query.count() == 1
+    assert QuizService.clone_quiz(exam, [], exam.user_id)[0] is False
+
+
+def test_pool_scores_and_item_analysis_use_the_sampled_questions(exam):
+    """Test max_score, percentages and item statistics for students given different questions"""
+    exam, sections, _ = exam
+    student_ids = []
+    for i in range(2):
+        student = User(username=f'student{i}', email=f'student{i}@example.com', role='student')
+        student.set_password('password')
+        db.session.add(student)
+        db.session.commit()
+        student_ids.append(student.id)
+
+    assert QuizService.set_pool_size(exam, 10)[0]
+    samples = [sample_questions(exam, student_id) for student_id in student_ids]
+    assert [len(sample) for sample in samples] == [10, 10]
+    assert {q.id for q in samples[0]} != {q.id for q in samples[1]}
+
+    # The first student gets everything right, the second nothing
+    for student_id, sample, correct in zip(student_ids, samples, (True, False)):
+        submission = QuizSubmission(student_id=student_id, quiz_id=exam.id, submitted_at=datetime.utcnow(),
+                                    total_score=20.0 if correct else 0.0)
+        db.session.add(submission)
+        db.session.flush()
+        assert submission.max_score == 20.0  # From the sample, before any answers exist
+        db.session.add_all(StudentSubmission(
+            student_id=student_id, question_id=question.id, quiz_submission_id=submission.id,
+            submitted_answer='0' if correct else '1', is_correct=correct, score=2.0 if correct else 0.0
+        ) for question in sample)
+    db.session.commit()
+
+    submissions = QuizSubmission.query.order_by(QuizSubmission.student_id).all()
+    assert [s.max_score for s in submissions] == [20.0, 20.0]
+    assert [s.percentage for s in submissions] == [100.0, 0.0]
+    assert [q.id for q in submissions[0].questions] == [q.id for q in samples[0]]
+
+    analysis = QuizService.item_analysis(exam)
+    shared = {q.id for q in samples[0]} & {q.id for q in samples[1]}
+    assert set(analysis) == {q.id for sample in samples for q in sample}
+    for question_id, stats in analysis.items():
+        both = question_id in shared
+        assert stats['presented'] == (2 if both else 1)
+        assert stats['difficulty'] == (0.5 if both else stats['correct'])
+        assert stats['discrimination'] == (1.0 if both else None)
+
+    # The pool is fixed once students have started
+    success, message = QuizService.set_pool_size(exam, 20)
+    assert not success and exam.pool_size == 10
+    clones = QuizService.clone_quiz(exam, [sections[1].id], exam.user_id)[2]
+    assert clones[0].pool_size == 10
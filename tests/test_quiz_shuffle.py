@@ -0,0 +1,86 @@
+"""Tests for deterministic per-student question and option order"""
+from collections import Counter
+from models import Question, Quiz, QuizSubmission
+from quiz_shuffle import (canonical_answer, drawn_questions, option_order, option_orders, question_order,
+                          sample_questions)
+
+
+def _question(question_id, options, correct_answer='0', question_type='multiple_choice'):
+    return Question(id=question_id, question_text=f'Question {question_id}', question_type=question_type,
+                    options=options, correct_answer=correct_answer, points=1.0)
+
+
+def test_order_is_stable_per_student_and_differs_between_students():
+    """Test that the same student always gets the same order and students get different ones"""
+    questions = [_question(i, ['a', 'b', 'c', 'd']) for i in range(1, 21)]
+
+    first = [q.id for q in question_order(7, 1, questions)]
+    assert first == [q.id for q in question_order(7, 1, list(reversed(questions)))]
+    assert sorted(first) == list(range(1, 21))
+    assert len({tuple(q.id for q in question_order(7, student, questions)) for student in range(1, 11)}) == 10
+    assert first != [q.id for q in question_order(8, 1, questions)]
+
+    orders = {tuple(option_order(7, student, questions[0])) for student in range(1, 51)}
+    assert len(orders) > 10
+    assert all(sorted(order) == [0, 1, 2, 3] for order in orders)
+
+
+def test_chosen_position_maps_back_to_canonical_index():
+    """Test that a student picking the correct option by its shown position is graded correct"""
+    question = _question(3, ['Paris', 'London', 'Rome', 'Berlin'], correct_answer='0')
+
+    for student in range(1, 30):
+        shown = [question.options[index] for index in option_orders(5, student, [question])[3]]
+        answer = canonical_answer(5, student, question, str(shown.index('Paris')))
+        assert answer == '0'
+        assert question.validate_answer(answer) is True
+
+    essay = _question(4, None, correct_answer='', question_type='essay')
+    assert canonical_answer(5, 1, essay, '2') == '2'
+    assert canonical_answer(5, 1, question, '9') == '9'
+    assert canonical_answer(5, 1, question, None) is None
+
+
+def test_all_of_the_above_keeps_its_position():
+    """Test that options referring to the others are not moved"""
+    question = _question(9, ['Red', 'Green', 'Blue', 'All of the above'])
+
+    for student in range(1, 20):
+        assert option_order(1, student, question)[3] == 3
+
+
+def test_pool_sample_is_reproducible_and_stratified_by_type():
+    """Test that 30 of 120 questions are drawn per student in proportion to question types"""
+    kinds = ['multiple_choice'] * 60 + ['true_false'] * 40 + ['essay'] * 20
+    quiz = Quiz(id=11, title='Pool', pool_size=30)
+    quiz.questions = [_question(i, ['a', 'b'], question_type=kind) for i, kind in enumerate(kinds, 1)]
+
+    first = sample_questions(quiz, 1)
+    assert [q.id for q in first] == [q.id for q in sample_questions(quiz, 1)]
+    assert Counter(q.question_type for q in first) == {'multiple_choice': 15, 'true_false': 10, 'essay': 5}
+    assert [q.id for q in first] == sorted(q.id for q in first)
+    assert len({tuple(q.id for q in sample_questions(quiz, student)) for student in range(1, 11)}) == 10
+
+    # Largest remainder keeps the total exact when shares are fractional
+    quiz.pool_size = 7
+    assert len(sample_questions(quiz, 2)) == 7
+
+    quiz.pool_size = None
+    assert len(sample_questions(quiz, 1)) == 120
+
+
+def test_attempt_keeps_the_questions_drawn_when_it_started():
+    """Test that questions added after an attempt started change neither its draw nor its max score"""
+    quiz = Quiz(id=12, title='Pool', pool_size=5)
+    quiz.questions = [_question(i, ['a', 'b']) for i in range(1, 21)]
+    submission = QuizSubmission(student_id=3, quiz=quiz)
+
+    drawn = [q.id for q in drawn_questions(quiz, submission)]
+    assert submission.question_ids == drawn
+    assert submission.max_score == 5
+
+    quiz.questions.extend(_question(i, ['a', 'b']) for i in range(21, 41))
+    assert [q.id for q in sample_questions(quiz, 3)] != drawn
+    assert [q.id for q in drawn_questions(quiz, submission)] == drawn
+    assert [q.id for q in submission.questions] == drawn
+    assert submission.max_score == 5
@@ -0,0 +1,258 @@
+"""Tests for the vectorized roster import"""
+import csv
+import functools
+import io
+import pandas as pd
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from werkzeug.security import check_password_hash, generate_password_hash
+import roster_jobs
+from models import db, User, Subject, StudentSubject, RosterImportJob
+from job_workers import current_worker
+from roster_import import (import_roster, import_roster_file, read_roster, hash_passwords, teacher_subjects,
+                           RosterImportError)
+from upload_store import UploadStore
+
+
+@pytest.fixture
+def app():
+    """Create a minimal app bound to the root models"""
+    app = Flask(__name__)
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.fixture
+def subject(app):
+    teacher = User(username='teacher', email='teacher@example.com', role='teacher', password_hash='x')
+    known = User(username='ana.cruz', email='ana.cruz@spist.edu', role='student', password_hash='x')
+    clash = User(username='ben.lim', email='ben.lim@example.com', role='student', password_hash='x')
+    db.session.add_all([teacher, known, clash])
+    db.session.commit()
+    subject = Subject(name='Programming', subject_code='CS101', teacher_id=teacher.id)
+    db.session.add(subject)
+    db.session.commit()
+    return subject
+
+
+def _roster(rows):
+    return pd.DataFrame(rows, columns=['Full Name', 'Course and Year', 'Student Email', 'Subject Code'])
+
+
+def cheap_hash(password):
+    return generate_password_hash(password, method='pbkdf2:sha256:1')
+
+
+def test_imports_with_a_constant_number_of_statements(subject):
+    """Test validation, dedupe, existing accounts and enrollments without per-row queries"""
+    rows = [[f' Student {i} ', 'BSCS 1', f' Student.{i}@SPIST.edu ', 'CS101'] for i in range(300)]
+    rows += [
+        ['Ana Cruz', 'BSCS 2', 'ana.cruz@spist.edu', 'CS101'],     # Has an account
+        ['Ana Cruz', 'BSCS 2', 'ANA.CRUZ@spist.edu', 'CS101'],     # Listed twice
+        ['Bad Email', 'BSCS 2', 'bad@gmail.com', 'CS101'],
+        ['No Email', 'BSCS 2', None, 'CS101'],
+        ['Ben Lim', 'BSCS 2', 'ben.lim@spist.edu', 'CS101'],       # Username belongs to someone else
+        ['Other Subject', 'BSCS 2', 'other@spist.edu', 'MA101'],
+    ]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = import_roster(_roster(rows), subject, account_setup='password', hash_password=cheap_hash)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert (result.matched, result.enrolled, result.created, result.already_enrolled) == (305, 301, 300, 1)
+    assert [(error['row'], error['reason']) for error in result.errors] == [
+        (303, 'Invalid email format'), (304, 'Invalid email format'), (305, 'Username already taken')]
+    assert len(statements) < 10
+
+    student = User.query.filter_by(email='student.7@spist.edu').one()
+    assert student.username == 'student.7'
+    assert check_password_hash(student.password_hash, 'changeme')
+    assert StudentSubject.query.filter_by(subject_id=subject.id, enrollment_status='approved').count() == 301
+
+    again = import_roster(_roster(rows[:10]), subject)
+    assert (again.enrolled, again.created, again.already_enrolled) == (0, 0, 10)
+
+
+def test_read_roster_requires_the_columns(tmp_path):
+    """Test that a file without the roster columns is rejected"""
+    path = tmp_path / 'roster.csv'
+    path.write_text('Name,Email\nAna,ana@spist.edu\n')
+    with pytest.raises(RosterImportError):
+        read_roster(str(path))
+
+    path.write_text('Full Name,Course and Year,Student Email,Subject Code\nAna,BSCS 1,ana@spist.edu,0101\n')
+    assert read_roster(str(path))['Subject Code'].tolist() == ['0101']
+
+
+def test_activation_accounts_have_no_password_until_first_login(subject):
+    """Test that activation accounts skip hashing and take their password at first login"""
+    rows = [[f'Student {i}', 'BSCS 1', f'student.{i}@spist.edu', 'CS101'] for i in range(3)]
+
+    result = import_roster(_roster(rows), subject)
+
+    assert result.created == 3
+    assert [code['username'] for code in result.activation_codes] == ['student.0', 'student.1', 'student.2']
+    code = result.activation_codes[0]['activation_code']
+    student = User.query.filter_by(username='student.0').one()
+    assert student.password_hash is None and student.needs_activation
+    assert not student.check_password('changeme')
+    assert not student.check_activation_code(result.activation_codes[1]['activation_code'])
+    assert student.check_activation_code(f' {code} ')
+    assert student.check_activation_code(code.upper())
+
+    student.activate('my new password')
+    db.session.commit()
+    assert student.check_password('my new password')
+    assert not student.needs_activation
+    assert not student.check_activation_code(code)
+
+
+def test_hash_passwords_in_a_process_pool():
+    """Test that pooled hashing returns one valid, individually salted hash per password"""
+    hashes = hash_passwords(['changeme'] * 8, cheap_hash, workers=2)
+
+    assert len(set(hashes)) == 8
+    assert all(check_password_hash(password_hash, 'changeme') for password_hash in hashes)
+
+
+def _write_roster(path, rows):
+    _roster(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def test_import_roster_file_commits_chunks_and_reports_errors(subject, tmp_path):
+    """Test that a streamed import keeps its totals and writes every rejected row to the report"""
+    rows = [[f'Student {i}', 'BSCS 1', f'student.{i}@spist.edu' if i % 3 else f'student.{i}@gmail.com', 'CS101']
+            for i in range(10)]
+    path = _write_roster(tmp_path / 'roster.csv', rows)
+    errors, codes, progress = io.StringIO(), io.StringIO(), []
+
+    result = import_roster_file(path, subject, error_report=errors, activation_report=codes, chunksize=4,
+                                progress_callback=lambda done, total, totals: progress.append((done, total, totals.rows)))
+
+    assert (result.rows, result.matched, result.enrolled, result.created, result.error_count) == (10, 10, 6, 6, 4)
+    assert [step[2] for step in progress] == [4, 8, 10]
+    assert progress[-1][0] == progress[-1][1]
+    # Row numbers keep counting across chunks
+    assert [(row['row'], row['reason']) for row in csv.DictReader(io.StringIO(errors.getvalue()))] == [
+        ('1', 'Invalid email format'), ('4', 'Invalid email format'),
+        ('7', 'Invalid email format'), ('10', 'Invalid email format')]
+    assert len(list(csv.DictReader(io.StringIO(codes.getvalue())))) == 6
+    assert StudentSubject.query.filter_by(subject_id=subject.id).count() == 6
+
+
+def test_malformed_lines_are_reported_with_their_row(subject, tmp_path):
+    """Test that lines with extra fields reach the error report instead of being dropped silently"""
+    path = tmp_path / 'roster.csv'
+    path.write_text('Full Name,Course and Year,Student Email,Subject Code\n'
+                    'Ana Cruz,BSCS 1,ana.cruz@spist.edu,CS101\n'
+                    'Cruz, Ben,BSCS 1,ben.cruz@spist.edu,CS101\n'
+                    'Lim, Carla, Mae,BSCS 1,carla.lim@spist.edu,CS101\n'
+                    'Dan Reyes,BSCS 1,dan.reyes@gmail.com,CS101\n')
+    errors = io.StringIO()
+
+    result = import_roster_file(str(path), subject, error_report=errors, chunksize=2)
+
+    assert (result.rows, result.error_count, result.already_enrolled + result.enrolled) == (4, 3, 1)
+    assert [(row['row'], row['full_name'], row['reason']) for row in csv.DictReader(io.StringIO(errors.getvalue()))] == [
+        ('2', 'Cruz', 'Malformed CSV line'), ('3', 'Lim', 'Malformed CSV line'), ('4', 'Dan Reyes', 'Invalid email format')]
+
+
+def test_roster_job_keeps_committed_chunks_when_it_fails(app, subject, tmp_path, monkeypatch):
+    """Test that a job failing part-way keeps the chunks before the failure and their reports"""
+    calls = []
+
+    def import_then_fail(df, *args, **kwargs):
+        calls.append(len(df))
+        if len(calls) == 3:
+            raise RuntimeError('disk full')
+        return import_roster(df, *args, **kwargs)
+
+    monkeypatch.setattr(roster_jobs, 'get_upload_store', lambda: UploadStore(str(tmp_path / 'store')))
+    monkeypatch.setattr(roster_jobs, 'import_roster_file', functools.partial(import_roster_file, chunksize=3))
+    monkeypatch.setattr('roster_import.import_roster', import_then_fail)
+    rows = [[f'Student {i}', 'BSCS 1', f'student.{i}@spist.edu' if i != 4 else 'bad@gmail.com', 'CS101']
+            for i in range(8)]
+    path = _write_roster(tmp_path / 'roster.csv', rows)
+    job = RosterImportJob(id='job1', subject_id=subject.id, user_id=subject.teacher_id, file_path=path,
+                          account_setup='activation')
+    db.session.add(job)
+    db.session.commit()
+
+    roster_jobs.run_roster_import(app, 'job1')
+
+    job = db.session.get(RosterImportJob, 'job1')
+    assert (job.status, job.error) == ('failed', 'disk full')
+    assert (job.rows_done, job.enrolled_count, job.created_count, job.error_count) == (6, 5, 5, 1)
+    assert StudentSubject.query.filter_by(subject_id=subject.id).count() == 5
+    assert job.to_dict()['has_error_report'] and job.to_dict()['has_activation_report']
+    with open(job.error_report_path, newline='') as f:
+        assert [row['email'] for row in csv.DictReader(f)] == ['bad@gmail.com']
+    with open(job.activation_report_path, newline='') as f:
+        assert len(list(csv.DictReader(f))) == 5
+
+
+def test_imports_every_subject_of_the_teacher_in_one_pass(subject):
+    """Test that one pass enrolls each row in its own subject and skips subjects of other teachers"""
+    other_teacher = User(username='other', email='other@example.com', role='teacher', password_hash='x')
+    db.session.add(other_teacher)
+    db.session.commit()
+    math = Subject(name='Math', subject_code='MA101', teacher_id=subject.teacher_id)
+    physics = Subject(name='Physics', subject_code='PH101', teacher_id=other_teacher.id)
+    db.session.add_all([math, physics])
+    db.session.add(StudentSubject(student_id=User.query.filter_by(username='ana.cruz').one().id,
+                                  subject_id=subject.id, enrollment_status='approved'))
+    db.session.commit()
+    rows = [[f'Student {i}', 'BSCS 1', f'student.{i}@spist.edu', code]
+            for i in range(50) for code in ('CS101', 'MA101', 'PH101')]
+    rows += [
+        ['Ana Cruz', 'BSCS 2', 'ana.cruz@spist.edu', 'CS101'],     # Already enrolled here
+        ['Ana Cruz', 'BSCS 2', 'ana.cruz@spist.edu', 'MA101'],
+        ['Ben Lim', 'BSCS 2', 'ben.lim@spist.edu', 'CS101'],       # Username clash in both subjects
+        ['Ben Lim', 'BSCS 2', 'ben.lim@spist.edu', 'MA101'],
+    ]
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = import_roster(_roster(rows), teacher_subjects(subject.teacher_id))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(statements) < 10
+    assert result.subjects == {'CS101', 'MA101'}
+    assert (result.matched, result.created, result.enrolled, result.already_enrolled) == (104, 50, 101, 1)
+    assert [error['row'] for error in result.errors] == [153, 154]
+    assert User.query.filter_by(email='student.7@spist.edu').count() == 1
+    assert StudentSubject.query.filter_by(subject_id=math.id).count() == 51
+    assert StudentSubject.query.filter_by(subject_id=physics.id).count() == 0
+
+
+def test_jobs_interrupted_by_a_restart_are_marked_failed(app, subject):
+    """Test that jobs of an exited worker stop looking active, while a live worker's jobs go on"""
+    exited = f"{current_worker().rsplit(':', 2)[0]}:999999999:1"
+    for job_id, status, worker in (('running', 'running', exited), ('queued', 'queued', None),
+                                   ('done', 'completed', exited), ('elsewhere', 'running', current_worker())):
+        db.session.add(RosterImportJob(id=job_id, subject_id=subject.id, user_id=subject.teacher_id,
+                                       file_path='roster.csv', status=status, worker=worker))
+    db.session.commit()
+
+    assert roster_jobs.fail_interrupted_imports(app) == 2
+
+    statuses = {job.id: job.status for job in RosterImportJob.query}
+    assert statuses == {'running': 'failed', 'queued': 'failed', 'done': 'completed', 'elsewhere': 'running'}
+    assert not db.session.get(RosterImportJob, 'running').is_active
@@ -4,9 +4,11 @@ import os
 import sys
 from flask import Flask
 from app import create_app
-from app.models import db, User, Subject, StudentSubject
+from sqlalchemy import event
+from app.models import db, User, Subject, StudentSubject, Quiz, QuizSubmission, StudentSubmission
 from app.auth.services import AuthService
 from app.subject.services import SubjectService
+from app.quiz.services import QuizService
 from app.dashboard.services import DashboardService
 from app.services.config_service import ConfigService
 
@@ -150,6 +152,145 @@ def test_subject_service_enroll(app, init_database):
         assert success is False
         assert status == 'pending'
 
+# Quiz Service Tests
+def test_quiz_service_add_questions(app):
+    """Test bulk question creation with QuizService"""
+    with app.app_context():
+        teacher = User(username='author', email='author@example.com', role='teacher')
+        teacher.set_password('password')
+        db.session.add(teacher)
+        db.session.commit()
+        subject = Subject(name='Bulk Subject', subject_code='BULK101', teacher_id=teacher.id)
+        db.session.add(subject)
+        db.session.commit()
+        quiz = Quiz(title='Bulk Quiz', quiz_type='quiz', user_id=teacher.id, subject_id=subject.id)
+        db.session.add(quiz)
+        db.session.commit()
+        
+        questions_data = [{
+            'question_text': f'Question {i}',
+            'question_type': 'identification',
+            'correct_answer': f'Answer {i}',
+            'points': 1.0
+        } for i in range(50)]
+        success, message, questions = QuizService.add_questions(quiz.id, questions_data)
+        assert success is True
+        assert [q.order_index for q in questions] == list(range(50))
+        
+        # The next question continues the order
+        success, message, question = QuizService.add_question(
+            quiz.id, 'Pick one', 'multiple_choice', ['a', 'b'], 'a', 1.0, order_index=50)
+        assert success is True
+        assert question.order_index == 50
+        
+        # One invalid question rejects the whole list
+        success, message, questions = QuizService.add_questions(quiz.id, [
+            {'question_text': 'Valid', 'question_type': 'essay', 'correct_answer': ''},
+            {'question_text': 'Broken', 'question_type': 'multiple_choice', 'options': ['only one'], 'correct_answer': '0'}
+        ])
+        assert success is False
+        assert 'Question 2' in message
+        assert len(quiz.questions) == 51
+
+def test_dashboards_hide_deleted_quizzes(app):
+    """Test that a deleted quiz and its submissions leave the dashboards before the purge"""
+    with app.app_context():
+        teacher = User(username='owner', email='owner@example.com', role='teacher')
+        student = User(username='taker', email='taker@example.com', role='student')
+        teacher.set_password('password')
+        student.set_password('password')
+        db.session.add_all([teacher, student])
+        db.session.commit()
+        subject = Subject(name='Dash Subject', subject_code='DASH101', teacher_id=teacher.id)
+        db.session.add(subject)
+        db.session.commit()
+        kept = Quiz(title='Kept', quiz_type='quiz', user_id=teacher.id, subject_id=subject.id)
+        deleted = Quiz(title='Deleted', quiz_type='quiz', user_id=teacher.id, subject_id=subject.id)
+        db.session.add_all([kept, deleted])
+        db.session.commit()
+        db.session.add_all([QuizSubmission(student_id=student.id, quiz_id=quiz.id) for quiz in (kept, deleted)])
+        db.session.commit()
+
+        success, _ = QuizService.delete_quiz(deleted.id, purge=False)
+        assert success is True
+
+        teacher_data = DashboardService.get_teacher_dashboard_data(teacher.id)
+        student_data = DashboardService.get_student_dashboard_data(student.id)
+        assert [quiz.title for quiz in teacher_data['quizzes']] == ['Kept']
+        assert [s.quiz.title for s in teacher_data['quiz_submissions']] == ['Kept']
+        assert [s.quiz.title for s in student_data['quiz_submissions']] == ['Kept']
+        db.session.expire_all()
+        assert [quiz.title for quiz in db.session.get(Subject, subject.id).quizzes] == ['Kept']
+
+def test_submission_max_score_counts_only_its_questions(app):
+    """Test that an attempt is scored out of the questions it was given, not the whole quiz"""
+    with app.app_context():
+        teacher = User(username='scorer', email='scorer@example.com', role='teacher')
+        teacher.set_password('password')
+        db.session.add(teacher)
+        db.session.commit()
+        subject = Subject(name='Score Subject', subject_code='SCORE101', teacher_id=teacher.id)
+        db.session.add(subject)
+        db.session.commit()
+        quiz = Quiz(title='Pooled', quiz_type='quiz', user_id=teacher.id, subject_id=subject.id)
+        db.session.add(quiz)
+        db.session.commit()
+        success, _, questions = QuizService.add_questions(quiz.id, [
+            {'question_text': f'Question {i}', 'question_type': 'identification',
+             'correct_answer': 'x', 'points': 2.0} for i in range(6)])
+        assert success is True
+
+        drawn = QuizSubmission(student_id=teacher.id, quiz_id=quiz.id, question_ids=[q.id for q in questions[:3]])
+        whole = QuizSubmission(student_id=teacher.id, quiz_id=quiz.id)
+        db.session.add_all([drawn, whole])
+        db.session.commit()
+        assert drawn.max_score == 6.0
+        assert whole.max_score == 12.0
+
+def test_dashboard_scores_use_a_fixed_number_of_queries(app):
+    """Test that listing submissions with their max_score does not query once per submission"""
+    with app.app_context():
+        teacher = User(username='lister', email='lister@example.com', role='teacher')
+        student = User(username='listed', email='listed@example.com', role='student')
+        teacher.set_password('password')
+        student.set_password('password')
+        db.session.add_all([teacher, student])
+        db.session.commit()
+        subject = Subject(name='List Subject', subject_code='LIST101', teacher_id=teacher.id)
+        db.session.add(subject)
+        db.session.commit()
+
+        def count_queries(quiz_count):
+            for i in range(quiz_count):
+                quiz = Quiz(title=f'Quiz {i}', quiz_type='quiz', user_id=teacher.id, subject_id=subject.id)
+                db.session.add(quiz)
+                db.session.commit()
+                _, _, questions = QuizService.add_questions(quiz.id, [
+                    {'question_text': f'Question {j}', 'question_type': 'identification',
+                     'correct_answer': 'x', 'points': 1.0} for j in range(3)])
+                submission = QuizSubmission(student_id=student.id, quiz_id=quiz.id)
+                db.session.add(submission)
+                db.session.flush()
+                db.session.add(StudentSubmission(student_id=student.id, question_id=questions[0].id,
+                                                 quiz_submission_id=submission.id, submitted_answer='x'))
+                db.session.commit()
+            db.session.expire_all()
+
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                data = DashboardService.get_student_dashboard_data(student.id)
+                scores = [submission.max_score for submission in data['quiz_submissions']]
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            return len(scores), len(statements)
+
+        first = count_queries(1)
+        second = count_queries(5)
+        assert (first[0], second[0]) == (1, 6)
+        assert first[1] == second[1]
+
 # Config Service Tests
 def test_config_service():
     """Test configuration service"""
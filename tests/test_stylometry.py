@@ -0,0 +1,85 @@
+"""Tests for per-student stylometric baselines"""
+import statistics
+import pytest
+from flask import Flask
+from models import db, User, StudentSubmission, StylometricProfile
+from stylometry import RunningStats, StylometryService, MIN_BASELINE_ESSAYS
+
+HUMAN_ESSAYS = [
+    "I liked the trip. We saw big old trees and a river. My friend fell in the mud and we laughed a lot.",
+    "The game was fun. I scored once. Our coach was happy but tired after the long day in the sun.",
+    "My dog is small. He barks at the mailman every day. I think he wants to play with him.",
+    "We cooked pancakes on Sunday. Dad burned the first one. The rest were really good with honey.",
+]
+FORMAL_ESSAY = (
+    "Furthermore, the socioeconomic ramifications of industrialization consequently necessitated "
+    "comprehensive legislative interventions across numerous jurisdictions. Moreover, in conclusion, "
+    "the multifaceted transformation thus fundamentally restructured contemporary societal paradigms."
+)
+
+
+@pytest.fixture
+def app():
+    """Create a minimal app bound to the root models"""
+    app = Flask(__name__)
+    app.config.update({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+def _essay(student, text, index):
+    submission = StudentSubmission(student_id=student.id, question_id=index, quiz_submission_id=index,
+                                   submitted_answer=text, is_correct=False)
+    db.session.add(submission)
+    db.session.commit()
+    return submission
+
+
+def test_running_stats_matches_batch_statistics():
+    """Test that Welford updates and removals agree with the statistics module"""
+    values = [12.0, 15.5, 9.25, 20.0, 14.0]
+    stats = RunningStats()
+    for value in values:
+        stats.push(value)
+
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.variance == pytest.approx(statistics.variance(values))
+
+    stats.remove(values[-1])
+    assert stats.mean == pytest.approx(statistics.mean(values[:-1]))
+    assert stats.variance == pytest.approx(statistics.variance(values[:-1]))
+
+
+def test_record_essay_updates_profile_once(app):
+    """Test that grading the same essay twice does not change the profile"""
+    student = User(username='student', email='student@spist.edu')
+    db.session.add(student)
+    db.session.commit()
+    submission = _essay(student, HUMAN_ESSAYS[0], 1)
+
+    assert StylometryService.record_essay(submission) is True
+    assert StylometryService.record_essay(submission) is False
+    assert StylometricProfile.query.filter_by(student_id=student.id).one().essay_count == 1
+
+
+def test_out_of_character_essay_deviates_from_baseline(app):
+    """Test that an essay unlike the student's history gets a high deviation score"""
+    student = User(username='student', email='student@spist.edu')
+    db.session.add(student)
+    db.session.commit()
+    for i, text in enumerate(HUMAN_ESSAYS):
+        StylometryService.record_essay(_essay(student, text, i))
+
+    typical = StylometryService.compare_to_baseline(_essay(student, HUMAN_ESSAYS[1], 10))
+    unusual = StylometryService.compare_to_baseline(_essay(student, FORMAL_ESSAY, 11))
+
+    assert typical['essay_count'] == len(HUMAN_ESSAYS) >= MIN_BASELINE_ESSAYS
+    assert unusual['deviation_score'] > typical['deviation_score']
+    assert unusual['zscores']['phrase_rate'] > 2
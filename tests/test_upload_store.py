@@ -0,0 +1,65 @@
+"""Tests for the content-addressed upload store"""
+import io
+import os
+import time
+import pytest
+from werkzeug.datastructures import FileStorage
+from upload_store import UploadError, UploadStore
+
+
+def _upload(data, filename='roster.csv'):
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+
+def _files(store):
+    return sorted(os.path.relpath(path, store.directory) for path, _, _ in store._entries())
+
+
+def test_identical_uploads_are_stored_once(tmp_path):
+    """Test that files are named by content, so same names never collide and copies are shared"""
+    store = UploadStore(str(tmp_path))
+
+    first = store.save(_upload(b'name,email\nA,a@spist.edu\n'))
+    again = store.save(_upload(b'name,email\nA,a@spist.edu\n', 'renamed.csv'))
+    other = store.save(_upload(b'name,email\nB,b@spist.edu\n'))
+
+    assert again.path == first.path and again.deduplicated and not first.deduplicated
+    assert other.path != first.path
+    assert os.path.basename(first.path) == first.digest + '.csv'
+    assert len(_files(store)) == 2
+
+
+def test_rejected_uploads_leave_nothing_behind(tmp_path):
+    """Test the size limit, type checks and that partial writes are removed"""
+    store = UploadStore(str(tmp_path), max_bytes=100 * 1024)
+
+    with pytest.raises(UploadError, match='larger than'):
+        store.save(_upload(b'x' * (200 * 1024)))
+    with pytest.raises(UploadError, match='not a valid .pdf'):
+        store.save(_upload(b'not really a pdf', 'exam.pdf'))
+    with pytest.raises(UploadError, match='not allowed'):
+        store.save(_upload(b'%PDF-1.4', 'exam.pdf'), allowed_extensions={'.csv'})
+    with pytest.raises(UploadError, match='empty'):
+        store.save(_upload(b''))
+
+    assert _files(store) == []
+
+
+def test_sweep_removes_expired_files(tmp_path):
+    """Test that the janitor keeps recently used files and reclaims the rest"""
+    store = UploadStore(str(tmp_path), ttl=60)
+    old = store.save(_upload(b'old roster'))
+    reused = store.save(_upload(b'reused roster'))
+    stale = os.path.join(store.directory, 'abandoned.tmp')
+    with open(stale, 'wb') as file:
+        file.write(b'partial')
+    past = time.time() - 120
+    for path in (old.path, reused.path, stale):
+        os.utime(path, (past, past))
+
+    store.save(_upload(b'reused roster'))
+    removed, freed = store.sweep()
+
+    assert removed == 2
+    assert freed == len(b'old roster') + len(b'partial')
+    assert _files(store) == [os.path.relpath(reused.path, store.directory)]
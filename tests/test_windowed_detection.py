@@ -0,0 +1,47 @@
+"""Tests for windowed (per-paragraph) AI content detection"""
+from ai_detection_service_new import AIContentDetector
+
+FORMAL = (
+    "Furthermore, the socioeconomic ramifications consequently necessitated comprehensive "
+    "legislative interventions. Moreover, thus the transformation restructured paradigms. "
+    "In conclusion, hence it mattered."
+)
+ESSAY = "First paragraph here. It has Two sentences.\n\nSecond paragraph is Here. And more! Last one? Yes.\nFinal line."
+
+
+def test_windows_map_back_to_the_original_text():
+    """Test that window offsets slice the original essay, including chunked input"""
+    detector = AIContentDetector()
+    for window in ('paragraph', 'sentence'):
+        windows = list(detector.iter_windows(ESSAY, window))
+        assert all(ESSAY[start:end] == text for start, end, text in windows)
+
+        chunks = [ESSAY[i:i + 7] for i in range(0, len(ESSAY), 7)]
+        assert list(detector.iter_windows(chunks, window)) == windows
+
+    assert len(list(detector.iter_windows(ESSAY, 'paragraph'))) == 3
+
+
+def test_windows_carry_their_text_for_crlf_essays():
+    """Test that windowed results include each window's text, since CRLF offsets do not match the rendered page"""
+    essay = (FORMAL + '\r\n') * 3
+    windows = AIContentDetector().detect_windowed(essay, early_stop=False)['windows']
+
+    assert len(windows) == 3
+    assert all(window['text'] == FORMAL == essay[window['start']:window['end']] for window in windows)
+
+
+def test_stops_early_when_score_is_decisive():
+    """Test that a long, uniformly formal essay is not analyzed to the end"""
+    detector = AIContentDetector()
+    essay = "\n\n".join([FORMAL] * 500)
+
+    result = detector.detect_windowed(essay)
+
+    assert result['stopped_early'] is True
+    assert len(result['windows']) == 3
+    assert result['level'] == 'danger'
+
+    full = detector.detect_windowed(essay, early_stop=False)
+    assert len(full['windows']) == 500
+    assert full['score'] == result['score']
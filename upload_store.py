@@ -0,0 +1,211 @@
+"""Content-addressed store for uploaded files
+
+Uploads are copied to disk in chunks and hashed while they are written,
+then stored under their SHA-256, so the same file uploaded twice is kept
+once and uploads that share a filename never overwrite each other. An
+upload is rejected as soon as it passes the size limit or its first bytes
+do not look like the expected file type, instead of after it was saved.
+A janitor removes stored files that have not been used for UPLOAD_TTL_SECONDS
+(file mtimes are refreshed every time the same file is uploaded again).
+"""
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Iterable, Optional, Tuple
+from werkzeug.utils import secure_filename
+
+UPLOAD_DIR = os.environ.get(
+    'UPLOAD_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'store')
+)
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 32 * 1024 * 1024))
+UPLOAD_TTL_SECONDS = int(os.environ.get('UPLOAD_TTL_SECONDS', 24 * 60 * 60))
+JANITOR_INTERVAL_SECONDS = int(os.environ.get('UPLOAD_JANITOR_INTERVAL_SECONDS', 60 * 60))
+
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of the binary formats we accept; other types are not checked
+FILE_SIGNATURES = {
+    '.pdf': b'%PDF',
+    '.docx': b'PK\x03\x04',
+}
+
+
+class UploadError(ValueError):
+    """Raised when an upload is rejected"""
+
+
+class StoredUpload:
+    """A file saved in the upload store"""
+
+    def __init__(self, path: str, digest: str, size: int, filename: str, deduplicated: bool):
+        self.path = path
+        self.digest = digest
+        self.size = size
+        self.filename = filename  # The (secured) name it was uploaded under
+        self.deduplicated = deduplicated  # True if an identical file was already stored
+
+    def __repr__(self):
+        return f'<StoredUpload {self.filename} {self.digest[:12]}>'
+
+
+class UploadStore:
+    """Uploaded files on disk, named by content hash and expired after a TTL"""
+
+    def __init__(self, directory: str = UPLOAD_DIR, max_bytes: int = UPLOAD_MAX_BYTES,
+                 ttl: int = UPLOAD_TTL_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest: str, extension: str) -> str:
+        # Two-character fan-out keeps directories small
+        return os.path.join(self.directory, digest[:2], digest + extension)
+
+    def save(self, file, allowed_extensions: Optional[Iterable[str]] = None) -> StoredUpload:
+        """Stream an uploaded file into the store
+
+        Args:
+            file: The uploaded file object (werkzeug FileStorage or a binary file)
+            allowed_extensions: Extensions to accept, e.g. {'.csv'}; any if None
+
+        Returns:
+            StoredUpload: Where the file was stored
+
+        Raises:
+            UploadError: The file is too large, empty or of the wrong type
+        """
+        filename = secure_filename(getattr(file, 'filename', None) or '') or 'upload'
+        extension = os.path.splitext(filename)[1].lower()
+        if allowed_extensions is not None and extension not in allowed_extensions:
+            raise UploadError(f'Files of type {extension or "(none)"} are not allowed')
+
+        stream = getattr(file, 'stream', file)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    if size == 0:
+                        signature = FILE_SIGNATURES.get(extension)
+                        if signature and not chunk.startswith(signature):
+                            raise UploadError(f'The file is not a valid {extension} file')
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadError(f'The file is larger than {self.max_bytes // (1024 * 1024)} MB')
+                    digest.update(chunk)
+                    out.write(chunk)
+            if size == 0:
+                raise UploadError('The file is empty')
+
+            path = self._path(digest.hexdigest(), extension)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                # Refreshing the mtime first keeps the janitor from removing the copy we reuse
+                os.utime(path)
+                deduplicated = True
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                deduplicated = False
+                os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return StoredUpload(path, digest.hexdigest(), size, filename, deduplicated)
+
+    def touch(self, path: str) -> None:
+        """Mark a stored file as recently used, restarting its TTL"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def size(self) -> int:
+        """Total size of the stored files in bytes"""
+        return sum(size for _, _, size in self._entries())
+
+    def sweep(self, now: Optional[float] = None) -> Tuple[int, int]:
+        """Remove files unused for longer than the TTL, including abandoned partial writes
+
+        Returns:
+            Tuple[int, int]: The number of files removed and the bytes freed
+        """
+        cutoff = (now if now is not None else time.time()) - self.ttl
+        removed = 0
+        freed = 0
+        for path, mtime, size in list(self._entries()):
+            if mtime >= cutoff:
+                continue
+            try:
+                # Re-check: the file may have been uploaded again since it was listed
+                if os.stat(path).st_mtime >= cutoff:
+                    continue
+                os.remove(path)
+                removed += 1
+                freed += size
+            except OSError:
+                pass
+        return removed, freed
+
+
+_default_store = None
+_janitor = None
+_janitor_lock = threading.Lock()
+
+
+def get_upload_store() -> UploadStore:
+    """Shared store in UPLOAD_STORE_DIR"""
+    global _default_store
+    if _default_store is None:
+        _default_store = UploadStore()
+    return _default_store
+
+
+def _run_janitor(store: UploadStore, interval: int, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        try:
+            removed, freed = store.sweep()
+            if removed:
+                print(f"Upload janitor removed {removed} file(s), {freed / (1024 * 1024):.1f} MB")
+        except Exception as e:
+            print(f"Upload janitor failed: {str(e)}")
+
+
+def start_upload_janitor(interval: int = JANITOR_INTERVAL_SECONDS) -> threading.Event:
+    """Sweep the shared store every `interval` seconds in a daemon thread
+
+    Starting it again returns the running janitor's stop event.
+
+    Returns:
+        threading.Event: Set it to stop the janitor
+    """
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            stop = threading.Event()
+            thread = threading.Thread(target=_run_janitor, args=(get_upload_store(), interval, stop),
+                                      name='upload-janitor', daemon=True)
+            thread.start()
+            _janitor = stop
+        return _janitor
+
+
+if __name__ == '__main__':
+    removed, freed = get_upload_store().sweep()
+    print(f"Removed {removed} expired upload(s), freed {freed / (1024 * 1024):.1f} MB")